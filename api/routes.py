@@ -1,6 +1,8 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import json
+import os
+from security.auth import require_admin, rate_limit
 
 def create_api_app(monitor):
     app = Flask(__name__)
@@ -10,7 +12,7 @@ def create_api_app(monitor):
     def get_status():
         """获取系统状态"""
         try:
-            data = monitor.get_current_status()
+            data = monitor.get_current_status(request.args.get('max_age', type=float))
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -19,7 +21,34 @@ def create_api_app(monitor):
     def get_cpu():
         """获取CPU信息"""
         try:
-            data = monitor.monitors['cpu'].get_detailed_info()
+            data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))
+            return jsonify(data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/power')
+    def get_power():
+        """获取CPU封装、DRAM和GPU功耗（RAPL/hwmon）"""
+        try:
+            data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))['power']
+            return jsonify(data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/interrupts')
+    def get_interrupts():
+        """获取硬中断与软中断的每CPU分布"""
+        try:
+            data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))['interrupts']
+            return jsonify(data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/schedstat')
+    def get_schedstat():
+        """获取每CPU运行队列等待时间和进程调度延迟"""
+        try:
+            data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))['schedstat']
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -28,7 +57,7 @@ def create_api_app(monitor):
     def get_memory():
         """获取内存信息"""
         try:
-            data = monitor.monitors['memory'].get_detailed_info()
+            data = monitor.shared.get_section('memory', request.args.get('max_age', type=float))
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -37,7 +66,7 @@ def create_api_app(monitor):
     def get_gpu():
         """获取GPU信息"""
         try:
-            data = monitor.monitors['gpu'].get_detailed_info()
+            data = monitor.shared.get_section('gpu', request.args.get('max_age', type=float))
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -46,7 +75,66 @@ def create_api_app(monitor):
     def get_disk():
         """获取磁盘信息"""
         try:
-            data = monitor.monitors['disk'].get_detailed_info()
+            data = monitor.shared.get_section('disk', request.args.get('max_age', type=float))
+            return jsonify(data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/disk/devices')
+    def get_disk_devices():
+        """获取块设备延迟、队列深度和利用率"""
+        try:
+            data = monitor.monitors['disk'].get_device_stats(
+                include_partitions=request.args.get('partitions', 'false').lower() == 'true',
+                include_virtual=request.args.get('virtual', 'false').lower() == 'true'
+            )
+            return jsonify({"devices": data})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/disk/largest_files')
+    @require_admin  # 会暴露文件路径，需要管理员权限
+    @rate_limit(max_requests=5, window=60)
+    def get_largest_files():
+        """获取最大的文件，budget为扫描时间预算（秒），超时返回部分结果"""
+        try:
+            path = request.args.get('path', '/')
+            if not os.path.isabs(path) or not os.path.isdir(path):
+                return jsonify({"error": "无效的路径"}), 400
+            data = monitor.monitors['disk'].file_scanner.scan(
+                path,
+                min(max(request.args.get('limit', 10, type=int), 1), 100),
+                min(request.args.get('budget', 30, type=float), 60)
+            )
+            return jsonify(data)
+        except OSError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/disk/usage')
+    @require_admin  # 会暴露目录结构，需要管理员权限
+    @rate_limit(max_requests=30, window=60)
+    def get_disk_usage():
+        """获取目录占用树，refresh=true时重新扫描（未变化的目录复用索引）
+
+        扫描默认只占用请求线程很短的时间预算，未扫完时返回 complete=false，
+        剩余部分在后台继续扫描。
+        """
+        try:
+            path = request.args.get('path', '/')
+            if not os.path.isabs(path) or not os.path.isdir(path):
+                return jsonify({"error": "无效的路径"}), 400
+            budget = request.args.get('budget', type=float)
+            data = monitor.monitors['disk'].get_disk_usage(
+                path,
+                min(max(request.args.get('depth', 2, type=int), 0), 5),
+                min(max(request.args.get('limit', 20, type=int), 1), 100),
+                request.args.get('refresh', 'false').lower() == 'true',
+                min(budget, 60) if budget else None
+            )
+            if data is None or data["usage"] is None:
+                return jsonify({"error": "路径不在占用索引中"}), 404
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -55,7 +143,40 @@ def create_api_app(monitor):
     def get_network():
         """获取网络信息"""
         try:
-            data = monitor.monitors['network'].get_detailed_info()
+            data = monitor.shared.get_section('network', request.args.get('max_age', type=float))
+            return jsonify(data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/network/connections')
+    def get_network_connections():
+        """获取网络连接统计，pids=true时统计各进程的连接数"""
+        try:
+            top = request.args.get('top', 10, type=int)
+            resolve_pids = request.args.get('pids', 'false').lower() == 'true'
+            if top == 10 and not resolve_pids:
+                # 默认参数直接读取共享采集器发布的结果
+                data = monitor.shared.get_section('network', request.args.get('max_age', type=float))['connections']
+            else:
+                data = monitor.monitors['network'].get_network_connections(top, resolve_pids)
+            return jsonify(data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/pressure')
+    def get_pressure():
+        """获取CPU/内存/IO的PSI压力停顿信息（含各cgroup）"""
+        try:
+            data = monitor.shared.get_section('pressure', request.args.get('max_age', type=float))
+            return jsonify(data)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+    
+    @app.route('/api/cgroups')
+    def get_cgroups():
+        """获取cgroup v2资源树（systemd slice/service与容器）"""
+        try:
+            data = monitor.shared.get_section('cgroups', request.args.get('max_age', type=float))
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -82,40 +203,9 @@ def create_api_app(monitor):
     def get_alerts():
         """获取告警信息"""
         try:
-            alerts = []
-            
-            # 检查CPU告警
-            if monitor.monitors['cpu'].check_alerts():
-                alerts.append({
-                    "type": "cpu",
-                    "message": "CPU使用率过高",
-                    "level": "warning"
-                })
-            
-            # 检查内存告警
-            if monitor.monitors['memory'].check_alerts():
-                alerts.append({
-                    "type": "memory",
-                    "message": "内存使用率过高",
-                    "level": "warning"
-                })
-            
-            # 检查GPU告警
-            if monitor.monitors['gpu'].check_alerts():
-                alerts.append({
-                    "type": "gpu",
-                    "message": "GPU使用率过高",
-                    "level": "warning"
-                })
-            
-            # 检查磁盘告警
-            if monitor.monitors['disk'].check_alerts():
-                alerts.append({
-                    "type": "disk",
-                    "message": "磁盘使用率过高",
-                    "level": "warning"
-                })
-            
+            # 告警引擎随共享采集器持续评估，这里只读取状态
+            pending = request.args.get('pending', 'false').lower() == 'true'
+            alerts = monitor.shared.alerts.get_alerts(include_pending=pending)
             return jsonify({"alerts": alerts})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -145,25 +235,12 @@ def create_api_app(monitor):
     def get_processes():
         """获取进程信息"""
         try:
-            import psutil
-            processes = []
-            
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    proc_info = proc.info
-                    processes.append({
-                        "pid": proc_info['pid'],
-                        "name": proc_info['name'],
-                        "cpu_percent": proc_info['cpu_percent'],
-                        "memory_percent": proc_info['memory_percent']
-                    })
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            # 按CPU使用率排序
-            processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-            return jsonify({"processes": processes[:20]})  # 返回前20个进程
-            
+            sort = request.args.get('sort', 'cpu')
+            limit = request.args.get('limit', 20, type=int)
+            processes = monitor.shared.processes.top(limit, sort, request.args.get('max_age', type=float))
+            return jsonify({"processes": processes})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
     
@@ -194,9 +271,9 @@ def create_api_app(monitor):
             }
             
             # 检查各个模块
-            for module_name, monitor_instance in monitor.monitors.items():
+            for module_name in monitor.monitors:
                 try:
-                    monitor_instance.get_detailed_info()
+                    monitor.shared.get_section(module_name)
                 except Exception as e:
                     health_status["modules"][module_name] = f"error: {str(e)}"
                     health_status["status"] = "degraded"
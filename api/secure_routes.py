@@ -13,6 +13,7 @@ from flask import Flask, jsonify, request, current_app
 from flask_cors import CORS
 from security.auth import require_auth, require_admin, rate_limit, auth_manager, init_auth
 from security.validators import config_validator, input_validator, command_validator
+from core.process_tracker import SORT_KEYS
 from utils.logger import logger
 
 def create_secure_api_app(monitor):
@@ -49,7 +50,7 @@ def create_secure_api_app(monitor):
     @rate_limit(max_requests=60, window=60)
     def get_status():
         """获取系统状态"""
-        data = monitor.get_current_status()
+        data = monitor.get_current_status(request.args.get('max_age', type=float))
         return jsonify(data)
     
     @app.route('/api/cpu')
@@ -57,7 +58,31 @@ def create_secure_api_app(monitor):
     @rate_limit(max_requests=60, window=60)
     def get_cpu():
         """获取CPU信息"""
-        data = monitor.monitors['cpu'].get_detailed_info()
+        data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))
+        return jsonify(data)
+    
+    @app.route('/api/power')
+    @safe_api_response
+    @rate_limit(max_requests=60, window=60)
+    def get_power():
+        """获取CPU封装、DRAM和GPU功耗（RAPL/hwmon）"""
+        data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))['power']
+        return jsonify(data)
+    
+    @app.route('/api/interrupts')
+    @safe_api_response
+    @rate_limit(max_requests=60, window=60)
+    def get_interrupts():
+        """获取硬中断与软中断的每CPU分布"""
+        data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))['interrupts']
+        return jsonify(data)
+    
+    @app.route('/api/schedstat')
+    @safe_api_response
+    @rate_limit(max_requests=60, window=60)
+    def get_schedstat():
+        """获取每CPU运行队列等待时间和进程调度延迟"""
+        data = monitor.shared.get_section('cpu', request.args.get('max_age', type=float))['schedstat']
         return jsonify(data)
     
     @app.route('/api/memory')
@@ -65,7 +90,7 @@ def create_secure_api_app(monitor):
     @rate_limit(max_requests=60, window=60)
     def get_memory():
         """获取内存信息"""
-        data = monitor.monitors['memory'].get_detailed_info()
+        data = monitor.shared.get_section('memory', request.args.get('max_age', type=float))
         return jsonify(data)
     
     @app.route('/api/gpu')
@@ -73,7 +98,7 @@ def create_secure_api_app(monitor):
     @rate_limit(max_requests=60, window=60)
     def get_gpu():
         """获取GPU信息"""
-        data = monitor.monitors['gpu'].get_detailed_info()
+        data = monitor.shared.get_section('gpu', request.args.get('max_age', type=float))
         return jsonify(data)
     
     @app.route('/api/disk')
@@ -81,7 +106,56 @@ def create_secure_api_app(monitor):
     @rate_limit(max_requests=60, window=60)
     def get_disk():
         """获取磁盘信息"""
-        data = monitor.monitors['disk'].get_detailed_info()
+        data = monitor.shared.get_section('disk', request.args.get('max_age', type=float))
+        return jsonify(data)
+    
+    @app.route('/api/disk/devices')
+    @safe_api_response
+    @rate_limit(max_requests=60, window=60)
+    def get_disk_devices():
+        """获取块设备延迟、队列深度和利用率"""
+        data = monitor.monitors['disk'].get_device_stats(
+            include_partitions=request.args.get('partitions', 'false').lower() == 'true',
+            include_virtual=request.args.get('virtual', 'false').lower() == 'true'
+        )
+        return jsonify({"devices": data})
+    
+    @app.route('/api/disk/largest_files')
+    @safe_api_response
+    @require_admin  # 会暴露文件路径，需要管理员权限
+    @rate_limit(max_requests=5, window=60)
+    def get_largest_files():
+        """获取最大的文件（限制结果数量和扫描时间）"""
+        path = request.args.get('path', '/')
+        if not os.path.isabs(path) or not os.path.isdir(path):
+            return jsonify({"error": "无效的路径"}), 400
+        data = monitor.monitors['disk'].file_scanner.scan(
+            path,
+            min(max(request.args.get('limit', 10, type=int), 1), 100),
+            min(request.args.get('budget', 30, type=float), 60)
+        )
+        return jsonify(data)
+    
+    @app.route('/api/disk/usage')
+    @safe_api_response
+    @require_admin  # 会暴露目录结构，需要管理员权限
+    @rate_limit(max_requests=30, window=60)
+    def get_disk_usage():
+        """获取目录占用树（限制深度、数量和扫描时间）"""
+        path = request.args.get('path', '/')
+        if not os.path.isabs(path) or not os.path.isdir(path):
+            return jsonify({"error": "无效的路径"}), 400
+        # 未指定预算时使用监控器的默认短预算，未扫完的部分在后台继续
+        budget = request.args.get('budget', type=float)
+        data = monitor.monitors['disk'].get_disk_usage(
+            path,
+            min(max(request.args.get('depth', 2, type=int), 0), 5),
+            min(max(request.args.get('limit', 20, type=int), 1), 100),
+            request.args.get('refresh', 'false').lower() == 'true',
+            min(budget, 60) if budget else None
+        )
+        if data is None or data["usage"] is None:
+            return jsonify({"error": "路径不在占用索引中"}), 404
         return jsonify(data)
     
     @app.route('/api/network')
@@ -89,7 +163,35 @@ def create_secure_api_app(monitor):
     @rate_limit(max_requests=60, window=60)
     def get_network():
         """获取网络信息"""
-        data = monitor.monitors['network'].get_detailed_info()
+        data = monitor.shared.get_section('network', request.args.get('max_age', type=float))
+        return jsonify(data)
+    
+    @app.route('/api/network/connections')
+    @safe_api_response
+    @rate_limit(max_requests=30, window=60)
+    def get_network_connections():
+        """获取网络连接统计（不解析进程，避免扫描所有进程的fd）"""
+        top = request.args.get('top', 10, type=int)
+        if top == 10:
+            data = monitor.shared.get_section('network', request.args.get('max_age', type=float))['connections']
+        else:
+            data = monitor.monitors['network'].get_network_connections(min(max(top, 1), 50))
+        return jsonify(data)
+    
+    @app.route('/api/pressure')
+    @safe_api_response
+    @rate_limit(max_requests=60, window=60)
+    def get_pressure():
+        """获取CPU/内存/IO的PSI压力停顿信息（含各cgroup）"""
+        data = monitor.shared.get_section('pressure', request.args.get('max_age', type=float))
+        return jsonify(data)
+    
+    @app.route('/api/cgroups')
+    @safe_api_response
+    @rate_limit(max_requests=60, window=60)
+    def get_cgroups():
+        """获取cgroup v2资源树（systemd slice/service与容器）"""
+        data = monitor.shared.get_section('cgroups', request.args.get('max_age', type=float))
         return jsonify(data)
     
     @app.route('/api/speedtest')
@@ -113,40 +215,9 @@ def create_secure_api_app(monitor):
     @rate_limit(max_requests=60, window=60)
     def get_alerts():
         """获取告警信息"""
-        alerts = []
-        
-        # 检查CPU告警
-        if monitor.monitors['cpu'].check_alerts():
-            alerts.append({
-                "type": "cpu",
-                "message": "CPU使用率过高",
-                "level": "warning"
-            })
-        
-        # 检查内存告警
-        if monitor.monitors['memory'].check_alerts():
-            alerts.append({
-                "type": "memory",
-                "message": "内存使用率过高",
-                "level": "warning"
-            })
-        
-        # 检查GPU告警
-        if monitor.monitors['gpu'].check_alerts():
-            alerts.append({
-                "type": "gpu",
-                "message": "GPU使用率过高",
-                "level": "warning"
-            })
-        
-        # 检查磁盘告警
-        if monitor.monitors['disk'].check_alerts():
-            alerts.append({
-                "type": "disk",
-                "message": "磁盘使用率过高",
-                "level": "warning"
-            })
-        
+        # 告警引擎随共享采集器持续评估，这里只读取状态
+        pending = request.args.get('pending', 'false').lower() == 'true'
+        alerts = monitor.shared.alerts.get_alerts(include_pending=pending)
         return jsonify({"alerts": alerts})
     
     @app.route('/api/config')
@@ -196,27 +267,16 @@ def create_secure_api_app(monitor):
     def get_processes():
         """获取进程信息"""
         try:
-            import psutil
-            processes = []
-            
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    proc_info = proc.info
-                    # 清理进程名称
-                    name = input_validator.sanitize_string(proc_info['name'], max_length=100)
-                    
-                    processes.append({
-                        "pid": proc_info['pid'],
-                        "name": name,
-                        "cpu_percent": round(proc_info['cpu_percent'], 2),
-                        "memory_percent": round(proc_info['memory_percent'], 2)
-                    })
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            # 按CPU使用率排序，只返回前20个进程
-            processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-            return jsonify({"processes": processes[:20]})
+            sort = request.args.get('sort', 'cpu')
+            if sort not in SORT_KEYS:
+                return jsonify({"error": "不支持的排序方式"}), 400
+            limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+            # 清理进程名称（复制一份，不修改跟踪器缓存的结果）
+            processes = [
+                {**proc, "name": input_validator.sanitize_string(proc["name"], max_length=100)}
+                for proc in monitor.shared.processes.top(limit, sort)
+            ]
+            return jsonify({"processes": processes})
             
         except Exception as e:
             logger.error(f"获取进程信息失败: {e}")
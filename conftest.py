@@ -0,0 +1,28 @@
+import os
+import pytest
+
+class FakeClock:
+    """可手动推进的单调时钟，替代 time.monotonic_ns 注入被测对象"""
+
+    def __init__(self, now_ns=0):
+        self.now_ns = now_ns
+
+    def __call__(self):
+        return self.now_ns
+
+    def advance(self, seconds):
+        self.now_ns += int(seconds * 1e9)
+
+@pytest.fixture
+def write():
+    """写入伪造的 /proc、/sys 文件，自动创建上级目录"""
+    def _write(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+    return _write
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,190 @@
+import math
+import threading
+import time
+from datetime import datetime
+from utils.logger import logger
+
+# 告警指标: 名称 -> (数据来源, 显示名称, 单位)
+# 来源为 ("history", 监控器, 历史列) 时逐条处理环形历史中的新样本；
+# 为 ("data", 提取函数) 时读取共享采集器发布的数据，按实例（挂载点等）分别判断
+def _disk_usage(data):
+    disks = (data.get('disk', {}).get('basic_info') or {}).get('disks', [])
+    return {disk['mountpoint']: disk.get('percent') for disk in disks}
+
+def _disk_temperature(data):
+    temperature = data.get('disk', {}).get('temperature')
+    if not isinstance(temperature, dict):
+        return {}
+    return {name: value for name, value in temperature.items() if isinstance(value, (int, float))}
+
+METRICS = {
+    "cpu_usage": (("history", "cpu", "cpu_usage_percent"), "CPU使用率", "%"),
+    "cpu_temperature": (("history", "cpu", "cpu_temperature"), "CPU温度", "°C"),
+    "cpu_power": (("history", "cpu", "cpu_power_watts"), "CPU封装功耗", "W"),
+    "memory_usage": (("history", "memory", "percent"), "内存使用率", "%"),
+    "gpu_usage": (("history", "gpu", "load_percent"), "GPU使用率", "%"),
+    "gpu_temperature": (("history", "gpu", "temperature"), "GPU温度", "°C"),
+    "gpu_memory": (("history", "gpu", "memory_percent"), "GPU内存使用率", "%"),
+    "cpu_pressure": (("history", "pressure", "cpu_some"), "CPU压力停顿", "%"),
+    "memory_pressure": (("history", "pressure", "memory_some"), "内存压力停顿", "%"),
+    "io_pressure": (("history", "pressure", "io_some"), "IO压力停顿", "%"),
+    "disk_usage": (("data", _disk_usage), "磁盘使用率", "%"),
+    "disk_temperature": (("data", _disk_temperature), "磁盘温度", "°C")
+}
+
+# 配置项名称与默认阈值，temperature_threshold 作为各温度阈值的通用后备；
+# 默认阈值为None的指标（功耗、PSI等与具体硬件和负载相关）只在配置了阈值时启用
+CONFIG_KEYS = {
+    "cpu_usage": ("cpu_usage_threshold", 90),
+    "cpu_temperature": ("cpu_temp_threshold", 85),
+    "cpu_power": ("cpu_power_threshold", None),
+    "memory_usage": ("memory_usage_threshold", 85),
+    "gpu_usage": ("gpu_usage_threshold", 95),
+    "gpu_temperature": ("gpu_temp_threshold", 85),
+    "gpu_memory": ("gpu_memory_threshold", 90),
+    "cpu_pressure": ("cpu_pressure_threshold", None),
+    "memory_pressure": ("memory_pressure_threshold", None),
+    "io_pressure": ("io_pressure_threshold", None),
+    "disk_usage": ("disk_usage_threshold", 90),
+    "disk_temperature": ("disk_temp_threshold", 60)
+}
+
+def compile_rules(alerts_config=None):
+    """把配置中的 alerts 部分编译为规则列表
+
+    每条规则: 超过 threshold 持续 duration 秒后触发，回落到
+    threshold - hysteresis 以下才恢复。alerts.rules 可按指标覆盖
+    threshold/duration/hysteresis/level，enabled 为 false 时禁用。
+    """
+    alerts_config = alerts_config or {}
+    duration = alerts_config.get('duration', 0)
+    hysteresis = alerts_config.get('hysteresis', 5)
+    overrides = alerts_config.get('rules', {})
+    rules = []
+    for metric, (key, default) in CONFIG_KEYS.items():
+        threshold = alerts_config.get(key)
+        if threshold is None and metric.endswith('_temperature'):
+            threshold = alerts_config.get('temperature_threshold')
+        rule = {
+            "metric": metric,
+            "threshold": default if threshold is None else threshold,
+            "duration": duration,
+            "hysteresis": hysteresis,
+            "level": "warning",
+            "enabled": True
+        }
+        rule.update(overrides.get(metric, {}))
+        if not rule["enabled"] or rule["threshold"] is None:
+            continue
+        rule["clear"] = rule["threshold"] - rule["hysteresis"]
+        rule["duration_ns"] = int(rule["duration"] * 1e9)
+        rules.append(rule)
+    return rules
+
+class AlertEngine:
+    """基于已采集数据的告警规则引擎
+
+    规则只在初始化时编译一次。每次共享采集器发布数据后调用 evaluate()：
+    历史型指标逐条处理环形历史中自上次以来的新样本，其余指标读取发布的数据。
+    每个 (指标, 实例) 保存状态 ok -> pending -> firing，get_alerts() 只读取
+    状态，不访问硬件。
+    """
+
+    def __init__(self, config=None, monitors=None):
+        self.rules = compile_rules((config or {}).get('alerts'))
+        self.monitors = monitors or {}
+        self._states = {}
+        self._last_seen = {}
+        self._lock = threading.Lock()
+
+    def _update(self, rule, instance, value, monotonic_ns, timestamp_ns):
+        """用一个样本推进状态机，持续时间按单调时钟计算，墙上时间只用于显示"""
+        if value is None or math.isnan(value):
+            return
+        key = (rule["metric"], instance)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = {"state": "ok", "started_ns": None, "since": None, "fired_at": None}
+        state["value"] = value
+        state["updated_at"] = timestamp_ns
+
+        if value > rule["threshold"]:
+            if state["state"] == "ok":
+                state["state"] = "pending"
+                state["started_ns"] = monotonic_ns
+                state["since"] = timestamp_ns
+            if state["state"] == "pending" and monotonic_ns - state["started_ns"] >= rule["duration_ns"]:
+                state["state"] = "firing"
+                state["fired_at"] = timestamp_ns
+                logger.warning(self._message(rule, instance, value))
+        elif state["state"] == "pending":
+            state["state"] = "ok"
+            state["started_ns"] = state["since"] = None
+        elif state["state"] == "firing" and value <= rule["clear"]:
+            state["state"] = "ok"
+            state["started_ns"] = state["since"] = None
+            logger.info(f"告警恢复: {self._message(rule, instance, value)}")
+
+    def _message(self, rule, instance, value):
+        label, unit = METRICS[rule["metric"]][1:]
+        prefix = f"{label}过高: {instance} - " if instance else f"{label}过高: "
+        return f"{prefix}{value:.1f}{unit}"
+
+    def evaluate(self, data=None, snapshot=None):
+        """根据新发布的数据和历史样本更新告警状态"""
+        if snapshot is not None:
+            monotonic_ns, timestamp_ns = snapshot.monotonic_ns, int(snapshot.timestamp * 1e9)
+        else:
+            monotonic_ns, timestamp_ns = time.monotonic_ns(), time.time_ns()
+        with self._lock:
+            for rule in self.rules:
+                try:
+                    source = METRICS[rule["metric"]][0]
+                    if source[0] == "history":
+                        monitor = self.monitors.get(source[1])
+                        if monitor is None:
+                            continue
+                        last_seen = self._last_seen.get(rule["metric"], -1)
+                        monotonic, timestamps, columns = monitor.history.since(last_seen)
+                        values = columns[source[2]]
+                        for k, sample_ns in enumerate(monotonic):
+                            self._update(rule, None, values[k], sample_ns, timestamps[k])
+                        if len(monotonic):
+                            self._last_seen[rule["metric"]] = monotonic[-1]
+                    elif data is not None:
+                        values = source[1](data)
+                        for instance, value in values.items():
+                            self._update(rule, instance, value, monotonic_ns, timestamp_ns)
+                        # 消失的实例（如已卸载的分区）不再保留状态
+                        for key in [k for k in self._states if k[0] == rule["metric"] and k[1] not in values]:
+                            del self._states[key]
+                except Exception as e:
+                    logger.error(f"评估告警规则 {rule['metric']} 失败: {e}")
+        return self.get_alerts()
+
+    def get_alerts(self, include_pending=False):
+        """返回当前告警列表，不访问硬件"""
+        rules = {rule["metric"]: rule for rule in self.rules}
+        alerts = []
+        with self._lock:
+            for (metric, instance), state in self._states.items():
+                if state["state"] == "ok" or (state["state"] == "pending" and not include_pending):
+                    continue
+                rule = rules[metric]
+                alerts.append({
+                    "type": metric,
+                    "level": rule["level"],
+                    "state": state["state"],
+                    "instance": instance,
+                    "value": round(state["value"], 2),
+                    "threshold": rule["threshold"],
+                    "message": self._message(rule, instance, state["value"]),
+                    "since": datetime.fromtimestamp(state["since"] / 1e9).isoformat(),
+                    "timestamp": datetime.fromtimestamp(state["updated_at"] / 1e9).isoformat()
+                })
+        return alerts
+
+    def reset(self):
+        with self._lock:
+            self._states.clear()
+            self._last_seen.clear()
@@ -0,0 +1,163 @@
+import glob
+import os
+import re
+from utils.procfs import CachedFile
+from utils.logger import logger
+
+AMD_VENDOR_ID = "0x1002"
+
+# amdgpu 设备目录下的属性文件
+DEVICE_FILES = {
+    "busy_percent": "gpu_busy_percent",
+    "memory_busy_percent": "mem_busy_percent",
+    "vram_used": "mem_info_vram_used",
+    "vram_total": "mem_info_vram_total",
+    "gtt_used": "mem_info_gtt_used",
+    "gtt_total": "mem_info_gtt_total"
+}
+
+# hwmon 属性文件（温度按 tempN_label 识别，见 _hwmon_files）
+HWMON_FILES = {
+    "power_average": "power1_average",
+    "power_input": "power1_input",
+    "fan_rpm": "fan1_input",
+    "sclk": "freq1_input",
+    "mclk": "freq2_input"
+}
+
+TEMP_LABELS = {"edge": "temp_edge", "junction": "temp_junction", "mem": "temp_mem"}
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+class AMDGPUSampler:
+    """读取 amdgpu 驱动的 sysfs/hwmon 实时数据
+
+    初始化时发现 /sys/class/drm/card*/device 中厂商为AMD的设备，并为每个属性
+    文件保持打开的文件描述符，每次采样只做一次pread。sysfs_root 可指向伪造的
+    目录树用于测试。
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sysfs_root = sysfs_root
+        self.cards = self._discover()
+
+    def _hwmon_files(self, device):
+        files = {}
+        hwmons = sorted(glob.glob(os.path.join(device, "hwmon", "hwmon*")))
+        if not hwmons:
+            return files
+        hwmon = hwmons[0]
+        for key, filename in HWMON_FILES.items():
+            path = os.path.join(hwmon, filename)
+            if os.path.exists(path):
+                files[key] = CachedFile(path)
+        for temp_input in glob.glob(os.path.join(hwmon, "temp*_input")):
+            label = _read_text(temp_input.replace("_input", "_label"))
+            key = TEMP_LABELS.get(label)
+            if key is None and os.path.basename(temp_input) == "temp1_input":
+                key = "temp_edge"
+            if key:
+                files[key] = CachedFile(temp_input)
+        return files
+
+    def _discover(self):
+        cards = []
+        drm = os.path.join(self.sysfs_root, "class", "drm")
+        try:
+            names = sorted(os.listdir(drm), key=lambda n: int(n[4:]) if re.fullmatch(r"card\d+", n) else -1)
+        except OSError:
+            return cards
+        for name in names:
+            if not re.fullmatch(r"card\d+", name):
+                # 跳过 card0-DP-1 等显示接口
+                continue
+            device = os.path.join(drm, name, "device")
+            if _read_text(os.path.join(device, "vendor")) != AMD_VENDOR_ID:
+                continue
+            uevent = {}
+            for line in (_read_text(os.path.join(device, "uevent")) or "").splitlines():
+                key, _, value = line.partition("=")
+                uevent[key] = value
+            files = {
+                key: CachedFile(os.path.join(device, filename))
+                for key, filename in DEVICE_FILES.items()
+                if os.path.exists(os.path.join(device, filename))
+            }
+            files.update(self._hwmon_files(device))
+            pci_slot = uevent.get("PCI_SLOT_NAME", name)
+            cards.append({
+                "card": name,
+                "pci_slot": pci_slot,
+                "pci_id": uevent.get("PCI_ID"),
+                "driver": uevent.get("DRIVER", "amdgpu"),
+                "name": _read_text(os.path.join(device, "product_name")) or f"AMD Radeon GPU ({pci_slot})",
+                "files": files
+            })
+        if cards:
+            logger.info(f"通过amdgpu sysfs检测到 {len(cards)} 个AMD GPU")
+        return cards
+
+    @staticmethod
+    def _read(files, key):
+        cached = files.get(key)
+        if cached is None:
+            return None
+        try:
+            return cached.read_int()
+        except (OSError, ValueError):
+            # GPU处于低功耗状态等情况下部分属性会读取失败
+            return None
+
+    def sample(self):
+        """读取所有AMD GPU的当前数据，格式与 GPUMonitor.gpus 一致"""
+        gpus = []
+        for card in self.cards:
+            files = card["files"]
+            read = lambda key: self._read(files, key)
+            busy = read("busy_percent")
+            vram_used = read("vram_used")
+            vram_total = read("vram_total")
+            gtt_used = read("gtt_used")
+            gtt_total = read("gtt_total")
+            temp_edge = read("temp_edge")
+            temp_junction = read("temp_junction")
+            temp_mem = read("temp_mem")
+            power = read("power_average")
+            if power is None:
+                power = read("power_input")
+            sclk = read("sclk")
+            mclk = read("mclk")
+
+            memory_total = vram_total / (1024 * 1024) if vram_total is not None else 0
+            memory_used = vram_used / (1024 * 1024) if vram_used is not None else 0
+            gpus.append({
+                "name": card["name"],
+                "card": card["card"],
+                "pci_slot": card["pci_slot"],
+                "driver": card["driver"],
+                "load": busy / 100 if busy is not None else 0,
+                "memory_total": round(memory_total, 2),
+                "memory_used": round(memory_used, 2),
+                "memory_free": round(memory_total - memory_used, 2),
+                "temperature": temp_edge / 1000 if temp_edge is not None else 0,
+                "temperature_junction": temp_junction / 1000 if temp_junction is not None else None,
+                "temperature_memory": temp_mem / 1000 if temp_mem is not None else None,
+                "memory_busy_percent": read("memory_busy_percent"),
+                "gtt_used_mb": round(gtt_used / (1024 * 1024), 2) if gtt_used is not None else None,
+                "gtt_total_mb": round(gtt_total / (1024 * 1024), 2) if gtt_total is not None else None,
+                "power_watts": round(power / 1e6, 2) if power is not None else None,
+                "fan_rpm": read("fan_rpm"),
+                "sclk_mhz": round(sclk / 1e6) if sclk is not None else None,
+                "mclk_mhz": round(mclk / 1e6) if mclk is not None else None
+            })
+        return gpus
+
+    def close(self):
+        for card in self.cards:
+            for cached in card["files"].values():
+                cached.close()
@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from datetime import datetime
+from core.pressure_monitor import _default_cgroup_root
+from core.rate import RateCalculator
+from utils.procfs import CachedFile, parse_key_value
+from utils.logger import logger
+
+# 每个cgroup读取的接口文件，控制器未启用的文件不存在，对应字段为None
+CGROUP_FILES = ("cpu.stat", "memory.current", "memory.stat", "io.stat", "pids.current")
+
+MEMORY_STAT_KEYS = ("anon", "file", "shmem", "slab", "sock")
+
+# 计算速率的计数器：cpu.stat(微秒/次数)、io.stat(字节/次数)、memory.stat(次数)
+RATE_COUNTERS = ("usage_usec", "throttled_usec", "nr_throttled",
+                 "rbytes", "wbytes", "rios", "wios", "pgmajfault")
+
+IO_FIELDS = (b"rbytes", b"wbytes", b"rios", b"wios")
+
+def parse_io_stat(data):
+    """解析io.stat（"8:0 rbytes=1 wbytes=2 rios=3 wios=4 dbytes=0 dios=0" 每设备一行），按设备求和"""
+    totals = dict.fromkeys(IO_FIELDS, 0)
+    for line in data.split(b'\n'):
+        for field in line.split()[1:]:
+            key, _, value = field.partition(b'=')
+            if key in totals:
+                totals[key] += int(value)
+    return {key.decode(): value for key, value in totals.items()}
+
+class CgroupMonitor:
+    """cgroup v2 资源统计（systemd slice/service 与容器）
+
+    遍历cgroup v2层级，读取每个cgroup的 cpu.stat、memory.current、memory.stat、
+    io.stat 和 pids.current，按计数器增量计算CPU使用率、CPU节流、IO吞吐与IOPS，
+    以树的形式输出。cgroup v2 的计数器本身包含所有子孙cgroup，因此父节点不再
+    累加子节点；根cgroup没有的文件（memory.current、pids.current）由其子节点
+    汇总得出。
+
+    目录结构每 rescan_interval 秒增量重新扫描一次：已知cgroup保留已打开的文件
+    句柄，只为新出现的目录创建句柄，消失的目录关闭句柄并清理计数器；两次扫描
+    之间读取失败且目录已不存在时立即移除，下次采样触发重新扫描。保持打开的
+    文件句柄总数不超过 max_open_files（容器数量很多时避免EMFILE），超出部分
+    每次采样打开读取后立即关闭。max_depth 限制遍历深度（根为0），
+    cgroup_root 可指向伪造的目录树、clock 可替换为测试时钟。
+    """
+
+    def __init__(self, cgroup_root=None, max_depth=None, rescan_interval=10, max_open_files=512,
+                 clock=time.monotonic_ns):
+        self.cgroup_root = cgroup_root or _default_cgroup_root()
+        self.max_depth = max_depth
+        self.rescan_interval = rescan_interval
+        self.max_open_files = max_open_files
+        self.clock = clock
+        self.rates = RateCalculator()
+        self._groups = {}
+        self._open_files = 0
+        self._scanned_ns = None
+        self._lock = threading.Lock()
+        self.available = os.path.exists(os.path.join(self.cgroup_root, "cgroup.controllers"))
+        if not self.available:
+            logger.warning(f"{self.cgroup_root} 不是cgroup v2层级，cgroup资源统计不可用")
+
+    def _discover(self):
+        """增量扫描cgroup目录，按路径排序保存（父cgroup总在子cgroup之前）"""
+        previous = self._groups
+        groups = {}
+        pending = [("", self.cgroup_root, 0)]
+        while pending:
+            path, directory, depth = pending.pop()
+            group = previous.get(path)
+            if group is None:
+                group = {
+                    "path": path or "/",
+                    "name": os.path.basename(path) or "/",
+                    "parent": os.path.dirname(path) if path else None,
+                    "directory": directory,
+                    # None表示未缓存句柄，每次读取时打开
+                    "files": {
+                        name: None for name in CGROUP_FILES if os.path.exists(os.path.join(directory, name))
+                    }
+                }
+            self._cache_files(group)
+            groups[path] = group
+            if self.max_depth is not None and depth >= self.max_depth:
+                continue
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    child = f"{path}/{entry.name}" if path else entry.name
+                    pending.append((child, entry.path, depth + 1))
+
+        for path, group in previous.items():
+            if path not in groups:
+                self._close_group(group)
+        self.rates.prune({group["path"] for group in groups.values()})
+        self._groups = dict(sorted(groups.items()))
+        self._scanned_ns = self.clock()
+
+    def _cache_files(self, group):
+        """在句柄上限内为cgroup的接口文件创建常驻句柄"""
+        files = group["files"]
+        for name, cached in files.items():
+            if cached is None and self._open_files < self.max_open_files:
+                files[name] = CachedFile(os.path.join(group["directory"], name))
+                self._open_files += 1
+
+    def _close_group(self, group):
+        files = group["files"]
+        for name, cached in files.items():
+            if cached is not None:
+                cached.close()
+                files[name] = None
+                self._open_files -= 1
+
+    def _read_group(self, group):
+        """读取一个cgroup的接口文件，cgroup已被删除时返回None"""
+        values = {}
+        for name, cached in group["files"].items():
+            try:
+                if cached is not None:
+                    values[name] = cached.read()
+                else:
+                    with open(os.path.join(group["directory"], name), "rb") as f:
+                        values[name] = f.read()
+            except OSError:
+                # 文件描述符耗尽等情况下目录仍在，只跳过该文件
+                if not os.path.isdir(group["directory"]):
+                    return None
+        return values
+
+    def _parse_group(self, group, values, now_ns):
+        cpu = parse_key_value(values.get("cpu.stat", b""))
+        memory = parse_key_value(values.get("memory.stat", b""))
+        io = parse_io_stat(values["io.stat"]) if "io.stat" in values else {}
+        counters = {**cpu, **io, "pgmajfault": memory.get("pgmajfault", 0)}
+        rates = dict(zip(RATE_COUNTERS, self.rates.update(
+            group["path"], tuple(counters.get(key, 0) for key in RATE_COUNTERS), now_ns
+        )))
+        has_cpu = "cpu.stat" in values
+        has_io = "io.stat" in values
+        result = {
+            "name": group["name"],
+            "path": group["path"],
+            # usage_usec 每秒增量 / 1e6 * 100，即占单个CPU的百分比
+            "cpu_percent": round(rates["usage_usec"] / 1e4, 2) if has_cpu else None,
+            "cpu_throttled_percent": round(rates["throttled_usec"] / 1e4, 2) if has_cpu else None,
+            "nr_throttled_per_sec": round(rates["nr_throttled"], 2) if has_cpu else None,
+            "memory_current": int(values["memory.current"]) if "memory.current" in values else None,
+            "pgmajfault_per_sec": round(rates["pgmajfault"], 2) if memory else None,
+            "io_read_bytes_per_sec": round(rates["rbytes"], 1) if has_io else None,
+            "io_write_bytes_per_sec": round(rates["wbytes"], 1) if has_io else None,
+            "io_read_ops_per_sec": round(rates["rios"], 1) if has_io else None,
+            "io_write_ops_per_sec": round(rates["wios"], 1) if has_io else None,
+            "pids_current": int(values["pids.current"]) if "pids.current" in values else None,
+            "children": []
+        }
+        for key in MEMORY_STAT_KEYS:
+            result[f"memory_{key}"] = memory.get(key) if memory else None
+        return result
+
+    @staticmethod
+    def _rollup(node):
+        """自底向上汇总：节点缺少的字段（根cgroup没有的文件）取子节点之和"""
+        for child in node["children"]:
+            CgroupMonitor._rollup(child)
+        if not node["children"]:
+            return
+        for key, value in node.items():
+            if value is not None or key in ("name", "path"):
+                continue
+            values = [child[key] for child in node["children"] if child[key] is not None]
+            if values:
+                node[key] = round(sum(values), 2)
+
+    def sample(self):
+        """采集所有cgroup，返回以根cgroup为根的资源树"""
+        try:
+            if not self.available:
+                return {"timestamp": datetime.now().isoformat(), "available": False, "count": 0, "root": None}
+            with self._lock:
+                now_ns = self.clock()
+                if self._scanned_ns is None or (now_ns - self._scanned_ns) / 1e9 >= self.rescan_interval:
+                    self._discover()
+                nodes = {}
+                for path, group in list(self._groups.items()):
+                    values = self._read_group(group)
+                    if values is None:
+                        # cgroup已删除，下次采样重新扫描目录
+                        self._close_group(self._groups.pop(path))
+                        self._scanned_ns = None
+                        continue
+                    node = self._parse_group(group, values, now_ns)
+                    nodes[path] = node
+                    # 按路径排序，父节点总是先于子节点
+                    parent = nodes.get(group["parent"]) if group["parent"] is not None else None
+                    if parent is not None:
+                        parent["children"].append(node)
+
+            root = nodes.get("")
+            if root is not None:
+                self._rollup(root)
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "available": True,
+                "count": len(nodes),
+                "root": root
+            }
+
+        except Exception as e:
+            logger.error(f"采集cgroup资源统计失败: {e}")
+            return None
+
+    def get_detailed_info(self, snapshot=None):
+        """获取cgroup资源树"""
+        return self.sample()
+
+    def close(self):
+        with self._lock:
+            for group in self._groups.values():
+                self._close_group(group)
+            self._groups = {}
@@ -0,0 +1,182 @@
+import threading
+import time
+from core.alerts import AlertEngine
+from core.cgroup_monitor import CgroupMonitor
+from core.cpu_monitor import CPUMonitor
+from core.memory_monitor import MemoryMonitor
+from core.gpu_monitor import GPUMonitor
+from core.disk_monitor import DiskMonitor
+from core.network_monitor import NetworkMonitor
+from core.pressure_monitor import PressureMonitor
+from core.proc_snapshot import get_default_collector
+from core.process_tracker import ProcessTracker
+from core.scheduler import CollectionScheduler, register_monitor_jobs
+from utils.logger import logger
+
+SECTIONS = ('cpu', 'memory', 'gpu', 'disk', 'network', 'pressure', 'cgroups')
+
+class SharedCollector:
+    """进程内唯一的后台采集器
+
+    按调度周期采样并发布最新的系统数据，所有HTTP路由、Socket.IO推送和
+    Blueprint都从这里读取，而不是各自重新采样。发布复用调度任务已经采集的
+    快照和速率，不会在任务之后立刻再采一次（否则速率窗口只有几毫秒，历史中
+    也会出现重复样本）。只有取快照、补齐缺失的采样结果在采集锁内与采样任务
+    串行执行；cgroup遍历、进程top-N、DRM fdinfo等较慢的明细在锁外读取，
+    发布之间由单独的发布锁串行，不阻塞高频采样任务。
+
+    读取时可传入max_age（秒），已发布数据过旧时同步发布一次，并发请求只会
+    触发一次发布；各模块的数据仍按各自的采集周期刷新。max_age为0时丢弃所有
+    模块缓存，基于新快照重新采样（进程表受 ProcessTracker.min_interval 限制）。
+    每次发布后由告警引擎评估规则，结果随数据一起发布在 alerts 字段中。
+    """
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        monitoring = self.config.get('monitoring', {})
+        self.interval = monitoring.get('interval', 2)
+        self.default_max_age = self.interval * 2
+        history_size = monitoring.get('history_size', 1000)
+
+        self.snapshots = get_default_collector()
+        self.processes = ProcessTracker()
+        self.monitors = {
+            'cpu': CPUMonitor(self.snapshots, history_size=history_size, process_tracker=self.processes),
+            'memory': MemoryMonitor(self.snapshots, history_size=history_size, process_tracker=self.processes),
+            'gpu': GPUMonitor(history_size=history_size),
+            'disk': DiskMonitor(self.snapshots, history_size=history_size),
+            'network': NetworkMonitor(self.snapshots, history_size=history_size),
+            'pressure': PressureMonitor(cgroups=monitoring.get('pressure_cgroups'), history_size=history_size),
+            'cgroups': CgroupMonitor(max_depth=monitoring.get('cgroup_max_depth'))
+        }
+        self.alerts = AlertEngine(self.config, self.monitors)
+        self._published = None
+        self._published_at = 0.0
+        self._collect_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._subscribers = []
+
+        self.scheduler = CollectionScheduler()
+        self.periods = register_monitor_jobs(
+            self.scheduler, self.monitors, self.snapshots, monitoring.get('collector_intervals'),
+            lock=self._collect_lock
+        )
+        # 与采样任务相同的快照有效期，发布时复用任务刚采集的快照
+        self.snapshot_max_age = min(self.periods["cpu"], self.periods["memory"]) / 2
+        # 发布读取cgroup、进程、DRM等较慢的明细，在单独的线程中执行
+        self.scheduler.register('publish', self.publish, self.interval, worker="publish")
+
+    def _sample(self, fresh=False):
+        """在采集锁内取得快照并确保各采样任务的结果已缓存，返回快照
+
+        调度器正常运行时缓存都有效，这里只是读取；缓存过期（调度器未运行）或
+        fresh为True（先清空所有模块缓存）时在锁内采样一次，不与采样任务并发计算速率。
+        """
+        monitors = self.monitors
+        with self._collect_lock:
+            if fresh:
+                for monitor in monitors.values():
+                    cache = getattr(monitor, 'cache', None)
+                    if cache is not None:
+                        cache.clear()
+            snapshot = self.snapshots.get_snapshot(None if fresh else self.snapshot_max_age)
+            loaders = (
+                ('cpu', "cpu_info", lambda: monitors['cpu'].get_cpu_info(snapshot)),
+                ('memory', "memory_info", lambda: monitors['memory'].get_memory_info(snapshot)),
+                ('memory', "vmstat", lambda: monitors['memory'].vmstat.collect(snapshot) or {}),
+                ('disk', "io", lambda: monitors['disk'].sample_io(snapshot)),
+                ('network', "io", lambda: monitors['network'].sample_io(snapshot)),
+                ('gpu', "gpu_info", monitors['gpu'].get_gpu_info),
+                ('pressure', "system", monitors['pressure'].sample_system)
+            )
+            for name, key, loader in loaders:
+                monitor = monitors[name]
+                monitor.cache.get(key, loader, monitor.cache_ttl[key])
+        return snapshot
+
+    def collect(self, fresh=False):
+        """基于一份快照采集所有模块的详细数据，优先复用调度任务的快照和采样结果"""
+        snapshot = self._sample(fresh)
+        if fresh:
+            self.processes.get_table(0)
+        data = {"timestamp": snapshot.isoformat()}
+        for name in SECTIONS:
+            monitor = self.monitors[name]
+            if name == 'gpu':
+                data[name] = monitor.get_detailed_info()
+            else:
+                data[name] = monitor.get_detailed_info(snapshot)
+        return data, snapshot
+
+    def _publish(self, fresh=False):
+        """采集并保存最新数据，调用方需持有发布锁"""
+        data, snapshot = self.collect(fresh)
+        data["alerts"] = self.alerts.evaluate(data, snapshot)
+        self._published = data
+        self._published_at = time.monotonic()
+        return data, snapshot
+
+    def _notify(self, data, snapshot):
+        for callback in list(self._subscribers):
+            try:
+                callback(data, snapshot)
+            except Exception as e:
+                logger.error(f"数据订阅回调执行失败: {e}")
+
+    def publish(self):
+        """采集并发布最新数据，然后通知订阅者"""
+        with self._publish_lock:
+            data, snapshot = self._publish()
+        self._notify(data, snapshot)
+        return data
+
+    def _age(self):
+        return time.monotonic() - self._published_at
+
+    def get_system_data(self, max_age=None):
+        """返回不超过max_age秒的已发布数据，必要时同步发布；max_age为0时强制重新采样"""
+        if max_age is None:
+            max_age = self.default_max_age
+        fresh = max_age <= 0
+        data = self._published
+        if not fresh and data is not None and self._age() <= max_age:
+            return data
+        with self._publish_lock:
+            # 等锁期间其他请求可能已经完成采集
+            if not fresh and self._published is not None and self._age() <= max_age:
+                return self._published
+            data, snapshot = self._publish(fresh)
+        self._notify(data, snapshot)
+        return data
+
+    def get_section(self, name, max_age=None):
+        """返回单个模块的数据（cpu/memory/gpu/disk/network/pressure/cgroups）"""
+        return self.get_system_data(max_age)[name]
+
+    def subscribe(self, callback):
+        """注册发布回调 callback(data, snapshot)，每次发布后调用"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def start(self):
+        self.scheduler.start()
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def is_running(self):
+        return self.scheduler.is_running()
+
+_shared_collector = None
+_shared_lock = threading.Lock()
+
+def get_shared_collector(config=None):
+    """获取进程内共享采集器，首次调用时按传入配置创建"""
+    global _shared_collector
+    with _shared_lock:
+        if _shared_collector is None:
+            _shared_collector = SharedCollector(config)
+        return _shared_collector
@@ -0,0 +1,189 @@
+import os
+import threading
+from datetime import datetime
+import psutil
+from utils.procfs import CachedFile, parse_cpu_list
+from utils.logger import logger
+
+# 混合架构（Intel Alder Lake及以后）的核心类型：PMU设备目录 -> (类型, 显示名称)
+CORE_TYPES = (("cpu_core", "p_core", "P-core"), ("cpu_atom", "e_core", "E-core"))
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _read_int(path):
+    value = _read_text(path)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+class CPUFrequencyCollector:
+    """每核频率、热节流计数与混合架构核心类型统计
+
+    初始化时读取在线CPU列表、每个CPU的核心类型（/sys/devices/cpu_core/cpus
+    与 cpu_atom/cpus）和拓扑，并保持 scaling_cur_freq 与
+    thermal_throttle/*_throttle_count 打开。每次采样按核心类型汇总频率、
+    使用率和自上次采样以来的节流次数。同一物理核的超线程共享 core 计数器、
+    同一封装共享 package 计数器，均只计一次。sysfs_root 可指向伪造的目录树
+    用于测试；没有cpufreq时频率退回 psutil.cpu_freq(percpu=True)。
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sysfs_root = sysfs_root
+        self._lock = threading.Lock()
+        self._last_counts = None
+        self.cpus = self._discover()
+        self.hybrid = len({cpu["type"] for cpu in self.cpus}) > 1
+
+    def _discover(self):
+        cpu_root = os.path.join(self.sysfs_root, "devices", "system", "cpu")
+        online = parse_cpu_list(_read_text(os.path.join(cpu_root, "online")))
+        if not online:
+            online = list(range(psutil.cpu_count() or 0))
+        core_types = {}
+        for pmu, key, label in CORE_TYPES:
+            for cpu in parse_cpu_list(_read_text(os.path.join(self.sysfs_root, "devices", pmu, "cpus"))):
+                core_types[cpu] = (key, label)
+
+        cpus = []
+        packages = set()
+        for cpu in online:
+            base = os.path.join(cpu_root, f"cpu{cpu}")
+            package = _read_int(os.path.join(base, "topology", "physical_package_id")) or 0
+            counters = [("freq", "cpufreq/scaling_cur_freq"),
+                        ("core_throttle", "thermal_throttle/core_throttle_count")]
+            if package not in packages:
+                # 封装计数器在该封装的所有CPU上相同，只读取第一个CPU的
+                packages.add(package)
+                counters.append(("package_throttle", "thermal_throttle/package_throttle_count"))
+            files = {}
+            for key, relative in counters:
+                path = os.path.join(base, relative)
+                if os.path.exists(path):
+                    files[key] = CachedFile(path)
+            core = _read_int(os.path.join(base, "topology", "core_id"))
+            max_freq = _read_int(os.path.join(base, "cpufreq", "cpuinfo_max_freq"))
+            core_type, label = core_types.get(cpu, ("core", "Core"))
+            cpus.append({
+                "cpu": cpu,
+                "type": core_type,
+                "label": label,
+                "package": package,
+                "core": (package, core if core is not None else cpu),
+                "max_freq_mhz": max_freq // 1000 if max_freq else None,
+                "files": files
+            })
+        return cpus
+
+    @staticmethod
+    def _read(files, key):
+        cached = files.get(key)
+        if cached is None:
+            return None
+        try:
+            return cached.read_int()
+        except (OSError, ValueError):
+            return None
+
+    def _fallback_freqs(self):
+        try:
+            freqs = psutil.cpu_freq(percpu=True) or []
+            return [freq.current for freq in freqs]
+        except Exception:
+            return []
+
+    def sample(self, usage_per_core=None):
+        """读取每个CPU的频率和节流计数
+
+        usage_per_core 为按在线CPU顺序排列的使用率（与/proc/stat一致），
+        用于计算各核心类型的平均使用率。
+        """
+        try:
+            with self._lock:
+                fallback = None
+                counts = {}
+                cpus = []
+                for index, cpu in enumerate(self.cpus):
+                    files = cpu["files"]
+                    freq = self._read(files, "freq")
+                    if freq is not None:
+                        freq_mhz = round(freq / 1000)
+                    else:
+                        if fallback is None:
+                            fallback = self._fallback_freqs()
+                        freq_mhz = round(fallback[index]) if index < len(fallback) else None
+                    core_count = self._read(files, "core_throttle")
+                    if core_count is not None:
+                        counts[("core", cpu["core"])] = core_count
+                    package_count = self._read(files, "package_throttle")
+                    if package_count is not None:
+                        counts[("package", cpu["package"])] = package_count
+                    usage = usage_per_core[index] if usage_per_core and index < len(usage_per_core) else None
+                    cpus.append({
+                        "cpu": cpu["cpu"],
+                        "type": cpu["type"],
+                        "freq_mhz": freq_mhz,
+                        "max_freq_mhz": cpu["max_freq_mhz"],
+                        "usage_percent": usage,
+                        "core_throttle_count": core_count
+                    })
+
+                # 计数器增量；首次采样或计数器重置（CPU热插拔）时记为0
+                previous = self._last_counts or counts
+                events = {key: max(value - previous.get(key, value), 0) for key, value in counts.items()}
+                self._last_counts = counts
+
+            groups = {}
+            for cpu, info in zip(self.cpus, cpus):
+                group = groups.setdefault(cpu["type"], {
+                    "label": cpu["label"], "cpus": [], "freqs": [], "usages": [], "cores": set()
+                })
+                group["cpus"].append(cpu["cpu"])
+                group["cores"].add(cpu["core"])
+                if info["freq_mhz"] is not None:
+                    group["freqs"].append(info["freq_mhz"])
+                if info["usage_percent"] is not None:
+                    group["usages"].append(info["usage_percent"])
+
+            core_types = {}
+            for core_type, group in groups.items():
+                freqs = group["freqs"]
+                usages = group["usages"]
+                core_types[core_type] = {
+                    "label": group["label"],
+                    "cpus": group["cpus"],
+                    "cpu_count": len(group["cpus"]),
+                    "usage_percent": round(sum(usages) / len(usages), 1) if usages else None,
+                    "freq_mhz_avg": round(sum(freqs) / len(freqs)) if freqs else None,
+                    "freq_mhz_min": min(freqs, default=None),
+                    "freq_mhz_max": max(freqs, default=None),
+                    "throttle_events": sum(events.get(("core", core), 0) for core in group["cores"])
+                }
+
+            freqs = [cpu["freq_mhz"] for cpu in cpus if cpu["freq_mhz"] is not None]
+            package_events = sum(value for (kind, _), value in events.items() if kind == "package")
+            core_events = sum(value for (kind, _), value in events.items() if kind == "core")
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "hybrid": self.hybrid,
+                "freq_mhz_avg": round(sum(freqs) / len(freqs)) if freqs else None,
+                "cpus": cpus,
+                "core_types": core_types,
+                "core_throttle_events": core_events,
+                "package_throttle_events": package_events,
+                "throttling": core_events + package_events > 0
+            }
+
+        except Exception as e:
+            logger.error(f"读取CPU频率失败: {e}")
+            return None
+
+    def close(self):
+        for cpu in self.cpus:
+            for cached in cpu["files"].values():
+                cached.close()
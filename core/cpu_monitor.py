@@ -1,92 +1,240 @@
 import psutil
+import threading
 import time
-from datetime import datetime
+from core.cpu_freq import CPUFrequencyCollector
+from core.history import RingHistory
+from core.interrupts import InterruptCollector
+from core.numa import get_default_topology
+from core.power import PowerCollector
+from core.proc_snapshot import get_default_collector, CPU_TIME_FIELDS
+from core.rate import RateCalculator
+from core.schedstat import SchedStatCollector
+from core.sensors import get_default_sensors
+from utils.cache import TTLCache
 from utils.helpers import get_temperature, bytes_to_mb
 from utils.logger import logger
 
+class CPUUsageSampler:
+    """基于/proc/stat计数器差值的非阻塞CPU使用率采样器，clock 可替换为测试时钟"""
+
+    def __init__(self, min_interval=0.1, clock=time.monotonic_ns):
+        self.min_interval = min_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._last_total = None
+        self._last_percpu = None
+        self._last_update = 0
+        self._usage = 0.0
+        self._usage_per_core = []
+
+    @staticmethod
+    def _busy_percent(prev, curr):
+        """根据两次计数器计算忙碌百分比，与psutil口径一致（idle+iowait视为空闲）"""
+        total_delta = sum(curr) - sum(prev)
+        if total_delta <= 0:
+            return None
+        idle_delta = (curr[3] + curr[4]) - (prev[3] + prev[4])
+        busy = (total_delta - idle_delta) / total_delta * 100
+        return round(min(max(busy, 0.0), 100.0), 1)
+
+    def update(self, total, percpu):
+        """用一组新的计数器更新使用率，距上次更新过近时沿用上次结果"""
+        with self._lock:
+            now = self.clock()
+            if self._last_total is not None and (now - self._last_update) / 1e9 < self.min_interval:
+                return self._usage, list(self._usage_per_core)
+
+            # 首次采样以开机以来的平均值作为基线
+            prev_total = self._last_total or (0,) * len(total)
+            prev_percpu = self._last_percpu
+            if prev_percpu is None or len(prev_percpu) != len(percpu):
+                prev_percpu = [(0,) * len(times) for times in percpu]
+
+            usage = self._busy_percent(prev_total, total)
+            if usage is None:
+                return self._usage, list(self._usage_per_core)
+
+            per_core = []
+            for i, times in enumerate(percpu):
+                core_usage = self._busy_percent(prev_percpu[i], times)
+                if core_usage is None:
+                    core_usage = self._usage_per_core[i] if i < len(self._usage_per_core) else 0.0
+                per_core.append(core_usage)
+
+            self._usage = usage
+            self._usage_per_core = per_core
+            self._last_total = total
+            self._last_percpu = percpu
+            self._last_update = now
+            return self._usage, list(self._usage_per_core)
+
+    def sample(self, snapshot):
+        """根据快照返回自上次采样以来的总使用率和每核使用率"""
+        return self.update(snapshot.cpu_total, snapshot.cpu_percpu)
+
 class CPUMonitor:
-    def __init__(self):
+    HISTORY_COLUMNS = ("cpu_usage_percent", "cpu_temperature", "cpu_freq_current", "load_avg_1", "cpu_power_watts")
+
+    def __init__(self, collector=None, snapshot_max_age=0.5, history_size=1000, sensors=None, sensor_max_age=1,
+                 power=None, frequency=None, numa=None, interrupts=None, schedstat=None,
+                 process_tracker=None):
         self.cpu_count = psutil.cpu_count()
+        self.cpu_count_logical = psutil.cpu_count(logical=True)
+        # 频率范围是静态的，当前频率由 frequency 每次采样读取
         self.cpu_freq = psutil.cpu_freq()
-        self.history = []
-        self.max_history = 1000
+        self.history = RingHistory(self.HISTORY_COLUMNS, history_size)
+        self.collector = collector or get_default_collector()
+        self.snapshot_max_age = snapshot_max_age
+        self.sensors = sensors or get_default_sensors()
+        self.sensor_max_age = sensor_max_age
+        self.power = power or PowerCollector()
+        self.frequency = frequency or CPUFrequencyCollector()
+        self.numa = numa or get_default_topology()
+        self.interrupts = interrupts or InterruptCollector()
+        self.stat_rates = RateCalculator()
+        self.schedstat = schedstat or SchedStatCollector()
+        # 用于读取CPU占用最高进程的调度延迟，未提供时不采集进程级数据
+        self.processes = process_tracker
+        self.sampler = CPUUsageSampler()
+        # 最近一次采样结果，调度器运行时发布直接读取，不再重复计算使用率和写入历史
+        self.cache = TTLCache()
+        self.cache_ttl = {"cpu_info": 0.25}
+        # 建立采样基线，后续调用只计算增量
+        self.sampler.sample(self.collector.get_snapshot())
+        self.power.sample()
+
+    def _get_snapshot(self, snapshot=None):
+        """未指定快照时复用采集器中足够新的快照"""
+        return snapshot or self.collector.get_snapshot(self.snapshot_max_age)
         
-    def get_cpu_info(self):
+    def get_temperatures(self):
+        """返回 (封装温度, {核心: 温度})，没有hwmon/thermal传感器时退回跨平台方法"""
+        if not self.sensors.sensors:
+            return get_temperature(), {}
+        return self.sensors.cpu_temperatures(self.sensor_max_age)
+    
+    def get_cpu_info(self, snapshot=None):
         """获取CPU基本信息"""
         try:
+            snapshot = self._get_snapshot(snapshot)
+            cpu_usage, cpu_usage_per_core = self.sampler.sample(snapshot)
+            temperature, core_temperatures = self.get_temperatures()
+            power = self.power.sample()
+            frequency = self.frequency.sample(cpu_usage_per_core) or {}
+            freq_current = frequency.get("freq_mhz_avg")
+            if freq_current is None and self.cpu_freq:
+                freq_current = self.cpu_freq.current
             cpu_info = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": snapshot.isoformat(),
                 "cpu_count": self.cpu_count,
-                "cpu_count_logical": psutil.cpu_count(logical=True),
-                "cpu_freq_current": self.cpu_freq.current if self.cpu_freq else None,
+                "cpu_count_logical": self.cpu_count_logical,
+                "cpu_freq_current": freq_current,
                 "cpu_freq_min": self.cpu_freq.min if self.cpu_freq else None,
                 "cpu_freq_max": self.cpu_freq.max if self.cpu_freq else None,
-                "cpu_usage_percent": psutil.cpu_percent(interval=1),
-                "cpu_usage_per_core": psutil.cpu_percent(interval=1, percpu=True),
-                "cpu_temperature": get_temperature(),
-                "cpu_load_avg": psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None
+                "cpu_usage_percent": cpu_usage,
+                "cpu_usage_per_core": cpu_usage_per_core,
+                "cpu_freq_per_core": [cpu["freq_mhz"] for cpu in frequency.get("cpus", [])],
+                "core_types": frequency.get("core_types", {}),
+                "hybrid": frequency.get("hybrid", False),
+                "numa_nodes": self.numa.cpu_usage(cpu_usage_per_core),
+                "throttling": frequency.get("throttling", False),
+                "throttle_events": {
+                    "core": frequency.get("core_throttle_events", 0),
+                    "package": frequency.get("package_throttle_events", 0)
+                },
+                "cpu_temperature": temperature,
+                "cpu_temperature_per_core": core_temperatures,
+                "fan_speeds": self.sensors.fan_speeds(self.sensor_max_age),
+                "cpu_power_watts": power["package_watts"] if power else None,
+                "cpu_load_avg": snapshot.loadavg
             }
             
             # 添加到历史记录
-            self.history.append(cpu_info)
-            if len(self.history) > self.max_history:
-                self.history.pop(0)
+            self.history.append({
+                "cpu_usage_percent": cpu_usage,
+                "cpu_temperature": cpu_info["cpu_temperature"],
+                "cpu_freq_current": cpu_info["cpu_freq_current"],
+                "load_avg_1": snapshot.loadavg[0] if snapshot.loadavg else None,
+                "cpu_power_watts": cpu_info["cpu_power_watts"]
+            }, int(snapshot.timestamp * 1e9), snapshot.monotonic_ns)
                 
-            return cpu_info
+            return self.cache.put("cpu_info", cpu_info)
             
         except Exception as e:
             logger.error(f"获取CPU信息失败: {e}")
             return None
     
-    def get_cpu_stats(self):
+    def get_cpu_stats(self, snapshot=None):
         """获取CPU统计信息"""
         try:
-            cpu_stats = psutil.cpu_stats()
+            snapshot = self._get_snapshot(snapshot)
+            stat = snapshot.stat
+            ctx_rate, forks_rate, interrupts_rate, soft_interrupts_rate = self.stat_rates.update(
+                "stat",
+                (stat.get("ctxt", 0), stat.get("processes", 0), stat.get("intr", 0), stat.get("softirq", 0)),
+                snapshot.monotonic_ns
+            )
             return {
-                "ctx_switches": cpu_stats.ctx_switches,
-                "interrupts": cpu_stats.interrupts,
-                "soft_interrupts": cpu_stats.soft_interrupts,
-                "syscalls": cpu_stats.syscalls
+                "ctx_switches": stat.get("ctxt", 0),
+                "interrupts": stat.get("intr", 0),
+                "soft_interrupts": stat.get("softirq", 0),
+                "syscalls": stat.get("syscalls", 0),
+                "interrupts_per_sec": round(interrupts_rate, 1),
+                "soft_interrupts_per_sec": round(soft_interrupts_rate, 1),
+                "ctx_switches_per_sec": round(ctx_rate, 1),
+                "forks_per_sec": round(forks_rate, 1),
+                "procs_running": stat.get("procs_running"),
+                "procs_blocked": stat.get("procs_blocked")
             }
         except Exception as e:
             logger.error(f"获取CPU统计信息失败: {e}")
             return None
     
-    def get_cpu_times(self):
+    def get_cpu_times(self, snapshot=None):
         """获取CPU时间信息"""
         try:
-            cpu_times = psutil.cpu_times()
-            return {
-                "user": cpu_times.user,
-                "system": cpu_times.system,
-                "idle": cpu_times.idle,
-                "nice": cpu_times.nice if hasattr(cpu_times, 'nice') else 0,
-                "iowait": cpu_times.iowait if hasattr(cpu_times, 'iowait') else 0,
-                "irq": cpu_times.irq if hasattr(cpu_times, 'irq') else 0,
-                "softirq": cpu_times.softirq if hasattr(cpu_times, 'softirq') else 0,
-                "steal": cpu_times.steal if hasattr(cpu_times, 'steal') else 0
-            }
+            cpu_times = self._get_snapshot(snapshot).cpu_total
+            return {field: round(value, 2) for field, value in zip(CPU_TIME_FIELDS, cpu_times)}
         except Exception as e:
             logger.error(f"获取CPU时间信息失败: {e}")
             return None
     
-    def get_detailed_info(self):
+    def get_schedstat(self, limit=10):
+        """获取每CPU运行队列等待时间，以及CPU占用最高进程的调度等待"""
+        schedstat = self.schedstat.sample()
+        if schedstat is not None and self.processes is not None:
+            try:
+                schedstat["top_tasks"] = self.schedstat.task_delays(self.processes.top(limit, "cpu"))
+            except Exception as e:
+                logger.error(f"获取进程调度延迟失败: {e}")
+                schedstat["top_tasks"] = []
+        return schedstat
+
+    def get_detailed_info(self, snapshot=None):
         """获取详细CPU信息"""
-        cpu_info = self.get_cpu_info()
-        cpu_stats = self.get_cpu_stats()
-        cpu_times = self.get_cpu_times()
+        snapshot = self._get_snapshot(snapshot)
+        cpu_info = self.cache.get("cpu_info", lambda: self.get_cpu_info(snapshot), self.cache_ttl["cpu_info"])
+        cpu_stats = self.get_cpu_stats(snapshot)
+        cpu_times = self.get_cpu_times(snapshot)
         
         return {
             "basic_info": cpu_info,
             "stats": cpu_stats,
             "times": cpu_times,
-            "history": self.history[-50:] if self.history else []  # 最近50条记录
+            "interrupts": self.interrupts.collect(),
+            "schedstat": self.get_schedstat(),
+            "sensors": self.sensors.sample(self.sensor_max_age),
+            "power": self.power.sample(self.snapshot_max_age),
+            "history": self.history.to_records(50)  # 最近50条记录
         }
     
-    def check_alerts(self, threshold=90):
-        """检查CPU告警"""
-        cpu_info = self.get_cpu_info()
-        if cpu_info and cpu_info.get('cpu_usage_percent', 0) > threshold:
-            logger.warning(f"CPU使用率过高: {cpu_info['cpu_usage_percent']}%")
+    def check_alerts(self, threshold=90, snapshot=None):
+        """检查CPU告警，默认读取最近一次采样而不重新采样"""
+        if snapshot is not None or not self.history:
+            self.get_cpu_info(snapshot)
+        last = self.history.last()
+        usage = last.get('cpu_usage_percent') if last else None
+        if usage is not None and usage > threshold:
+            logger.warning(f"CPU使用率过高: {usage}%")
             return True
         return False 
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+from core.rate import RateCalculator
+from utils.logger import logger
+
+class DiskLatencyCollector:
+    """基于/proc/diskstats增量计算 iostat -x 风格的块设备指标
+
+    r_await/w_await: 每次读/写的平均耗时(ms)
+    aqu_sz:          平均队列深度（weighted io_ticks 增量 / 经过时间）
+    util_percent:    设备忙碌时间占比（io_ticks 增量 / 经过时间）
+    """
+
+    def __init__(self, sys_root="/sys"):
+        self.sys_root = sys_root
+        self.rates = RateCalculator()
+        self._device_types = {}
+
+    def device_type(self, name):
+        """判断设备类型: disk / partition / virtual，结果缓存"""
+        device_type = self._device_types.get(name)
+        if device_type is None:
+            sys_name = name.replace('/', '!')
+            class_path = os.path.join(self.sys_root, "class", "block", sys_name)
+            if os.path.exists(os.path.join(class_path, "partition")):
+                device_type = "partition"
+            elif "/devices/virtual/" in os.path.realpath(class_path):
+                # loop、ram、zram、dm-* 等虚拟设备
+                device_type = "virtual"
+            else:
+                device_type = "disk"
+            self._device_types[name] = device_type
+        return device_type
+
+    def collect(self, snapshot, include_partitions=False, include_virtual=False):
+        """根据快照计算每个块设备的延迟、队列深度和利用率
+
+        计数器对快照中的所有设备更新（同一快照重复调用返回相同速率），
+        include_partitions/include_virtual 只过滤输出，不同过滤条件的调用
+        不会清理彼此的计数器。
+        """
+        devices = {}
+        try:
+            for name, stat in snapshot.diskstats.items():
+                (r_s, w_s, rbytes_s, wbytes_s, rtime_s, wtime_s,
+                 busy_s, weighted_s) = self.rates.update(
+                    name,
+                    (stat.read_count, stat.write_count, stat.read_bytes, stat.write_bytes,
+                     stat.read_time, stat.write_time, stat.busy_time, stat.weighted_time),
+                    snapshot.monotonic_ns
+                )
+                device_type = self.device_type(name)
+                if device_type == "partition" and not include_partitions:
+                    continue
+                if device_type == "virtual" and not include_virtual:
+                    continue
+                devices[name] = {
+                    "type": device_type,
+                    "r_s": round(r_s, 2),
+                    "w_s": round(w_s, 2),
+                    "rkb_s": round(rbytes_s / 1024, 2),
+                    "wkb_s": round(wbytes_s / 1024, 2),
+                    # 时间计数器单位为ms，速率之比即增量之比
+                    "r_await": round(rtime_s / r_s, 3) if r_s else 0.0,
+                    "w_await": round(wtime_s / w_s, 3) if w_s else 0.0,
+                    "aqu_sz": round(weighted_s / 1000, 3),
+                    "util_percent": round(min(busy_s / 10, 100.0), 2),
+                    "in_flight": stat.in_flight
+                }
+            self.rates.prune(snapshot.diskstats)
+        except Exception as e:
+            logger.error(f"计算块设备延迟指标失败: {e}")
+        return devices
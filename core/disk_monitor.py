@@ -1,16 +1,63 @@
+import os
 import psutil
+import threading
 import time
 from datetime import datetime
+from core.disk_latency import DiskLatencyCollector
+from core.disk_usage import DiskUsageTree
+from core.file_scanner import LargeFileScanner
+from core.history import RingHistory
+from core.proc_snapshot import get_default_collector
+from core.rate import RateCalculator
+from core.sensors import get_default_sensors
+from utils.cache import TTLCache
 from utils.helpers import bytes_to_gb, format_speed
 from utils.logger import logger
 
 class DiskMonitor:
-    def __init__(self):
-        self.history = []
-        self.max_history = 1000
-        self.last_io = None
-        
-    def get_disk_info(self):
+    HISTORY_COLUMNS = ("read_bytes_per_sec", "write_bytes_per_sec", "read_count_per_sec",
+                       "write_count_per_sec", "max_usage_percent", "max_util_percent")
+
+    def __init__(self, collector=None, snapshot_max_age=0.5, history_size=1000, sensors=None):
+        self.history = RingHistory(self.HISTORY_COLUMNS, history_size)
+        self.io_rates = RateCalculator()
+        self.latency = DiskLatencyCollector()
+        self.file_scanner = LargeFileScanner()
+        # 挂载点 -> (本次占用树, 上一棵完整的占用树)
+        self.usage_trees = {}
+        self._usage_refresh_thread = None
+        # 按需查询时同步扫描的默认时间预算（秒），超时先返回不完整的树，剩余部分在后台扫描
+        self.usage_time_budget = 2
+        # 增量扫描发现不了原地增长的文件（如日志），定期完整重扫
+        self.usage_full_rescan_interval = 6 * 3600
+        self._usage_full_scan_at = {}
+        self.collector = collector or get_default_collector()
+        self.snapshot_max_age = snapshot_max_age
+        self.sensors = sensors or get_default_sensors()
+        # 分区使用率等慢速数据按各自周期缓存；io为最近一次IO采样，发布时直接读取
+        self.cache = TTLCache()
+        self.cache_ttl = {"partitions": 30, "io": 1}
+        self._cache_loaders = {"partitions": self.get_disk_info}
+
+    def _get_snapshot(self, snapshot=None):
+        """未指定快照时复用采集器中足够新的快照"""
+        return snapshot or self.collector.get_snapshot(self.snapshot_max_age)
+
+    def refresh_cache(self, key):
+        """立即重新采集某项慢速数据并写入缓存（供调度器调用）"""
+        return self.cache.put(key, self._cache_loaders[key]())
+
+    def _cached(self, key):
+        """读取慢速数据缓存，超过有效期时重新采集"""
+        return self.cache.get(key, self._cache_loaders[key], self.cache_ttl[key])
+
+    def _device_type(self, name):
+        """设备类型 disk / partition / virtual；没有/sys时（psutil回退）视为整盘"""
+        if self.collector.use_proc:
+            return self.latency.device_type(name)
+        return "disk"
+
+    def get_disk_info(self, snapshot=None):
         """获取磁盘基本信息"""
         try:
             disks = []
@@ -31,7 +78,7 @@ class DiskMonitor:
                     continue
             
             return {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": (snapshot.isoformat() if snapshot else datetime.now().isoformat()),
                 "disks": disks
             }
             
@@ -39,60 +86,66 @@ class DiskMonitor:
             logger.error(f"获取磁盘信息失败: {e}")
             return None
     
-    def get_disk_io(self):
-        """获取磁盘IO信息"""
+    def get_disk_io(self, snapshot=None, perdisk=True):
+        """获取磁盘IO信息（按真实经过时间计算速率，可附带每块磁盘的速率）"""
         try:
-            current_io = psutil.disk_io_counters()
-            
-            if current_io is None:
-                return {
-                    "read_bytes_per_sec": 0,
-                    "write_bytes_per_sec": 0,
-                    "read_count_per_sec": 0,
-                    "write_count_per_sec": 0,
-                    "read_speed": "0 B/s",
-                    "write_speed": "0 B/s"
-                }
-            
-            if self.last_io is None:
-                self.last_io = current_io
-                return {
-                    "read_bytes_per_sec": 0,
-                    "write_bytes_per_sec": 0,
-                    "read_count_per_sec": 0,
-                    "write_count_per_sec": 0,
-                    "read_speed": "0 B/s",
-                    "write_speed": "0 B/s"
-                }
+            snapshot = self._get_snapshot(snapshot)
+            totals = [0.0, 0.0, 0.0, 0.0]
+            per_disk = {}
             
-            # 计算每秒IO
-            time_diff = 1  # 假设1秒间隔
-            read_bytes_per_sec = (current_io.read_bytes - self.last_io.read_bytes) / time_diff
-            write_bytes_per_sec = (current_io.write_bytes - self.last_io.write_bytes) / time_diff
-            read_count_per_sec = (current_io.read_count - self.last_io.read_count) / time_diff
-            write_count_per_sec = (current_io.write_count - self.last_io.write_count) / time_diff
-            
-            self.last_io = current_io
+            for name, stat in snapshot.diskstats.items():
+                rates = self.io_rates.update(
+                    name,
+                    (stat.read_bytes, stat.write_bytes, stat.read_count, stat.write_count),
+                    snapshot.monotonic_ns
+                )
+                device_type = self._device_type(name)
+                if device_type == "disk":
+                    # 总量只累加物理整盘：分区和dm/md的IO已计入底层磁盘，loop/zram等虚拟设备不计入
+                    for i, rate in enumerate(rates):
+                        totals[i] += rate
+                if perdisk:
+                    per_disk[name] = {
+                        "read_bytes_per_sec": rates[0],
+                        "write_bytes_per_sec": rates[1],
+                        "read_count_per_sec": rates[2],
+                        "write_count_per_sec": rates[3],
+                        "read_speed": format_speed(rates[0]),
+                        "write_speed": format_speed(rates[1]),
+                        "type": device_type,
+                        "is_partition": device_type == "partition"
+                    }
+            self.io_rates.prune(snapshot.diskstats)
             
-            return {
-                "read_bytes_per_sec": read_bytes_per_sec,
-                "write_bytes_per_sec": write_bytes_per_sec,
-                "read_count_per_sec": read_count_per_sec,
-                "write_count_per_sec": write_count_per_sec,
-                "read_speed": format_speed(read_bytes_per_sec),
-                "write_speed": format_speed(write_bytes_per_sec)
+            io_info = {
+                "read_bytes_per_sec": totals[0],
+                "write_bytes_per_sec": totals[1],
+                "read_count_per_sec": totals[2],
+                "write_count_per_sec": totals[3],
+                "read_speed": format_speed(totals[0]),
+                "write_speed": format_speed(totals[1])
             }
+            if perdisk:
+                io_info["per_disk"] = per_disk
+            return io_info
             
         except Exception as e:
             logger.error(f"获取磁盘IO信息失败: {e}")
             return None
     
-    def get_disk_temperature(self):
-        """获取磁盘温度（需要特定工具支持）"""
+    def get_device_stats(self, snapshot=None, include_partitions=False, include_virtual=False):
+        """获取块设备的await、队列深度和%util（iostat -x口径）"""
         try:
-            # 这里可以集成smartctl等工具来获取磁盘温度
-            # 目前返回None，需要根据具体平台实现
-            return None
+            snapshot = self._get_snapshot(snapshot)
+            return self.latency.collect(snapshot, include_partitions, include_virtual)
+        except Exception as e:
+            logger.error(f"获取块设备统计失败: {e}")
+            return {}
+    
+    def get_disk_temperature(self, max_age=1):
+        """获取磁盘温度 {设备: 温度}（nvme hwmon和drivetemp驱动）"""
+        try:
+            return self.sensors.device_temperatures(("nvme", "disk"), max_age)
         except Exception as e:
             logger.error(f"获取磁盘温度失败: {e}")
             return None
@@ -110,33 +163,39 @@ class DiskMonitor:
             logger.error(f"获取磁盘健康状态失败: {e}")
             return None
     
-    def get_detailed_info(self):
+    def sample_io(self, snapshot=None):
+        """采集IO速率和设备指标并写入历史记录"""
+        snapshot = self._get_snapshot(snapshot)
+        disk_io = self.get_disk_io(snapshot)
+        device_stats = self.get_device_stats(snapshot)
+        disk_info = self._cached("partitions")
+        
+        record = dict(disk_io or {})
+        disks = disk_info.get("disks", []) if disk_info else []
+        record["max_usage_percent"] = max((disk["percent"] for disk in disks), default=None)
+        record["max_util_percent"] = max((dev["util_percent"] for dev in device_stats.values()), default=None)
+        self.history.append(record, int(snapshot.timestamp * 1e9), snapshot.monotonic_ns)
+        return self.cache.put("io", (disk_io, device_stats))
+    
+    def get_detailed_info(self, snapshot=None):
         """获取详细磁盘信息"""
-        disk_info = self.get_disk_info()
-        disk_io = self.get_disk_io()
+        disk_io, device_stats = self.cache.get("io", lambda: self.sample_io(snapshot), self.cache_ttl["io"])
+        disk_info = self._cached("partitions")
         disk_temp = self.get_disk_temperature()
         disk_health = self.get_disk_health()
         
-        detailed_info = {
+        return {
             "basic_info": disk_info,
             "io_info": disk_io,
+            "device_stats": device_stats,
             "temperature": disk_temp,
-            "health": disk_health
-        }
-        
-        # 添加到历史记录
-        self.history.append(detailed_info)
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
-        
-        return {
-            **detailed_info,
-            "history": self.history[-50:] if self.history else []  # 最近50条记录
+            "health": disk_health,
+            "history": self.history.to_records(50)  # 最近50条记录
         }
     
     def check_alerts(self, threshold=90):
         """检查磁盘告警"""
-        disk_info = self.get_disk_info()
+        disk_info = self._cached("partitions")
         if disk_info:
             for disk in disk_info.get('disks', []):
                 if disk.get('percent', 0) > threshold:
@@ -144,28 +203,91 @@ class DiskMonitor:
                     return True
         return False
     
-    def get_largest_files(self, path="/", limit=10):
-        """获取指定路径下最大的文件"""
+    def get_largest_files(self, path="/", limit=10, time_budget=None):
+        """获取指定路径所在文件系统中最大的文件（并行扫描，复用持久化索引）"""
         try:
-            import os
-            files = []
-            for root, dirs, filenames in os.walk(path):
-                for filename in filenames:
-                    try:
-                        filepath = os.path.join(root, filename)
-                        size = os.path.getsize(filepath)
-                        files.append({
-                            "path": filepath,
-                            "size": bytes_to_gb(size),
-                            "size_bytes": size
-                        })
-                    except (OSError, PermissionError):
-                        continue
-            
-            # 按文件大小排序
-            files.sort(key=lambda x: x['size_bytes'], reverse=True)
-            return files[:limit]
-            
+            return self.file_scanner.scan(path, limit, time_budget)["files"]
         except Exception as e:
             logger.error(f"获取大文件列表失败: {e}")
-            return [] 
\ No newline at end of file
+            return []
+    
+    @staticmethod
+    def _mountpoint_of(path):
+        """返回path所在的挂载点"""
+        path = os.path.abspath(path)
+        while not os.path.ismount(path):
+            path = os.path.dirname(path)
+        return path
+    
+    def refresh_disk_usage(self, mountpoint, time_budget=None, full=False):
+        """重新扫描挂载点并构建占用树
+
+        默认目录mtime未变的部分复用索引，full为True时完整重扫。只有完整的树
+        才会成为下一次增长对比的基线，超出时间预算的部分结果不会被当作基线。
+        """
+        started = time.time()
+        result = self.file_scanner.scan(mountpoint, limit=0, time_budget=time_budget, full=full)
+        tree = DiskUsageTree(mountpoint, self.file_scanner.get_directories(mountpoint),
+                             started, result["complete"])
+        # 首次完整扫描没有可复用的旧索引，同样视为完整重扫
+        if tree.complete and (full or mountpoint not in self._usage_full_scan_at):
+            self._usage_full_scan_at[mountpoint] = time.monotonic()
+        baseline = None
+        previous = self.usage_trees.get(mountpoint)
+        if previous is not None:
+            baseline = previous[0] if previous[0].complete else previous[1]
+        self.usage_trees[mountpoint] = (tree, baseline)
+        return tree
+    
+    def _needs_full_rescan(self, mountpoint):
+        scanned_at = self._usage_full_scan_at.get(mountpoint)
+        return scanned_at is not None and time.monotonic() - scanned_at >= self.usage_full_rescan_interval
+    
+    def _refresh_usage_in_background(self, mountpoints):
+        """在后台线程中重新扫描挂载点，已有刷新线程在运行时跳过"""
+        if self._usage_refresh_thread and self._usage_refresh_thread.is_alive():
+            return
+        
+        def refresh():
+            for mountpoint in mountpoints:
+                try:
+                    self.refresh_disk_usage(mountpoint, full=self._needs_full_rescan(mountpoint))
+                except Exception as e:
+                    logger.error(f"刷新目录占用索引失败: {mountpoint} - {e}")
+        
+        self._usage_refresh_thread = threading.Thread(target=refresh, daemon=True)
+        self._usage_refresh_thread.start()
+    
+    def refresh_usage_trees(self):
+        """在后台线程中刷新所有已建立的占用树（供调度器调用，不阻塞采样）"""
+        if self.usage_trees:
+            self._refresh_usage_in_background(list(self.usage_trees))
+    
+    def get_disk_usage(self, path="/", depth=2, limit=20, refresh=False, time_budget=None):
+        """获取目录占用树（du风格）及与上次扫描相比增长最多的子树
+
+        需要扫描时最多在调用线程上扫描 time_budget 秒（默认 usage_time_budget），
+        未扫完时返回 complete=False 的部分结果，并在后台完成扫描。
+        """
+        try:
+            mountpoint = self._mountpoint_of(path)
+            trees = self.usage_trees.get(mountpoint)
+            if trees is None or refresh:
+                tree = self.refresh_disk_usage(mountpoint, time_budget or self.usage_time_budget)
+                if not tree.complete:
+                    self._refresh_usage_in_background([mountpoint])
+                trees = self.usage_trees[mountpoint]
+            tree, previous = trees
+            return {
+                "mountpoint": mountpoint,
+                "scanned_at": tree.scanned_at_iso(),
+                "complete": tree.complete,
+                "refreshing": bool(self._usage_refresh_thread and self._usage_refresh_thread.is_alive()),
+                "directories": len(tree),
+                "usage": tree.query(path, depth, limit),
+                "growth": tree.growth(previous, limit),
+                "previous_scan": previous.scanned_at_iso() if previous else None
+            }
+        except Exception as e:
+            logger.error(f"获取目录占用失败: {e}")
+            return None
@@ -0,0 +1,155 @@
+import bisect
+import heapq
+import os
+import sys
+import time
+from array import array
+from datetime import datetime
+from utils.helpers import bytes_to_gb
+
+class DiskUsageTree:
+    """du风格的目录占用树
+
+    由 LargeFileScanner 的目录记录构建。节点按广度优先编号，同一父节点的
+    子节点编号连续且按名称排序，因此只需父节点数组、子节点起始/数量数组和
+    驻留（intern）后的名称列表，不保存完整路径；按路径查找时在子节点区间内
+    二分。每个节点记录自身与整个子树的占用字节和inode数。
+    """
+
+    def __init__(self, root, directories, scanned_at=None, complete=True):
+        self.root = os.path.abspath(root)
+        self.scanned_at = scanned_at or time.time()
+        self.complete = complete
+        self.names = [self.root]
+        self.parents = array('i', [-1])
+        self.child_start = array('i')
+        self.child_count = array('i')
+        self.own_bytes = array('q')
+        self.own_inodes = array('q')
+
+        paths = [self.root]
+        i = 0
+        while i < len(paths):
+            path = paths[i]
+            record = directories.get(path)
+            children = sorted(
+                name for name in (record[1] if record else ())
+                if os.path.join(path, name) in directories
+            )
+            self.child_start.append(len(paths))
+            self.child_count.append(len(children))
+            for name in children:
+                self.names.append(sys.intern(name))
+                self.parents.append(i)
+                paths.append(os.path.join(path, name))
+            self.own_bytes.append(record[2] if record else 0)
+            self.own_inodes.append(record[3] if record else 0)
+            i += 1
+
+        # 子节点编号总是大于父节点，倒序累加即得子树合计
+        self.total_bytes = array('q', self.own_bytes)
+        self.total_inodes = array('q', self.own_inodes)
+        for i in range(len(self.names) - 1, 0, -1):
+            parent = self.parents[i]
+            self.total_bytes[parent] += self.total_bytes[i]
+            self.total_inodes[parent] += self.total_inodes[i]
+
+    def __len__(self):
+        return len(self.names)
+
+    def _child(self, index, name):
+        """在子节点区间内二分查找名称，找不到返回-1"""
+        start = self.child_start[index]
+        end = start + self.child_count[index]
+        pos = bisect.bisect_left(self.names, name, start, end)
+        return pos if pos < end and self.names[pos] == name else -1
+
+    def find(self, path):
+        """返回路径对应的节点编号，不在树中时返回None"""
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        if relative == ".":
+            return 0
+        if relative.startswith(".."):
+            return None
+        index = 0
+        for name in relative.split(os.sep):
+            index = self._child(index, name)
+            if index < 0:
+                return None
+        return index
+
+    def path_of(self, index):
+        parts = []
+        while index > 0:
+            parts.append(self.names[index])
+            index = self.parents[index]
+        return os.path.join(self.root, *reversed(parts))
+
+    def _node(self, index, path, depth, limit):
+        node = {
+            "name": self.names[index] if index else self.root,
+            "path": path,
+            "bytes": self.total_bytes[index],
+            "size": bytes_to_gb(self.total_bytes[index]),
+            "inodes": self.total_inodes[index],
+            "own_bytes": self.own_bytes[index]
+        }
+        if depth > 0:
+            start = self.child_start[index]
+            children = heapq.nlargest(
+                limit, range(start, start + self.child_count[index]), key=self.total_bytes.__getitem__
+            )
+            node["children"] = [
+                self._node(child, os.path.join(path, self.names[child]), depth - 1, limit)
+                for child in children
+            ]
+        return node
+
+    def query(self, path=None, depth=2, limit=20):
+        """返回path下depth层的占用树，每层最多limit个最大的子目录"""
+        index = self.find(path or self.root)
+        if index is None:
+            return None
+        return self._node(index, self.path_of(index), depth, limit)
+
+    def growth(self, previous, limit=10):
+        """与上一次扫描对比，返回增长最多的子树
+
+        若某个子目录贡献了父目录90%以上的增长，只报告该子目录，
+        这样结果直接指向真正增长的位置，而不是整条祖先链。上一次扫描不完整
+        （超出时间预算）时没有可靠的基线，不报告增长。
+        """
+        if previous is None or previous.root != self.root or not previous.complete:
+            return []
+        count = len(self.names)
+        old_index = array('i', [-1]) * count
+        old_index[0] = 0
+        for i in range(1, count):
+            old_parent = old_index[self.parents[i]]
+            if old_parent >= 0:
+                old_index[i] = previous._child(old_parent, self.names[i])
+
+        delta = array('q', bytes(8 * count))
+        for i in range(count):
+            old = old_index[i]
+            delta[i] = self.total_bytes[i] - (previous.total_bytes[old] if old >= 0 else 0)
+        max_child = array('q', bytes(8 * count))
+        for i in range(1, count):
+            parent = self.parents[i]
+            if delta[i] > max_child[parent]:
+                max_child[parent] = delta[i]
+
+        candidates = (i for i in range(count) if delta[i] > 0 and max_child[i] < delta[i] * 0.9)
+        return [
+            {
+                "path": self.path_of(i),
+                "growth_bytes": delta[i],
+                "growth": bytes_to_gb(delta[i]),
+                "bytes": self.total_bytes[i],
+                "new": old_index[i] < 0
+            }
+            for i in heapq.nlargest(limit, candidates, key=delta.__getitem__)
+        ]
+
+    def scanned_at_iso(self):
+        return datetime.fromtimestamp(self.scanned_at).isoformat()
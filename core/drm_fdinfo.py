@@ -0,0 +1,188 @@
+import os
+import time
+from utils.logger import logger
+
+_MEMORY_UNITS = {"B": 1, "KiB": 1024, "MiB": 1024 * 1024, "GiB": 1024 * 1024 * 1024}
+
+def parse_fdinfo(data):
+    """解析 /proc/<pid>/fdinfo/<fd> 中的 drm-* 字段
+
+    返回 (键值字典, 引擎纳秒计数, 引擎容量, 引擎周期计数, 引擎总周期, 内存字节)，
+    非DRM文件返回None。
+    """
+    fields = {}
+    engines = {}
+    capacity = {}
+    cycles = {}
+    total_cycles = {}
+    memory = {}
+    for line in data.splitlines():
+        if not line.startswith("drm-"):
+            continue
+        key, _, value = line.partition(":")
+        parts = value.split()
+        if not parts:
+            continue
+        if key.startswith("drm-engine-capacity-"):
+            capacity[key[20:]] = int(parts[0])
+        elif key.startswith("drm-engine-"):
+            engines[key[11:]] = int(parts[0])
+        elif key.startswith("drm-total-cycles-"):
+            total_cycles[key[17:]] = int(parts[0])
+        elif key.startswith("drm-cycles-"):
+            cycles[key[11:]] = int(parts[0])
+        elif key.startswith(("drm-resident-", "drm-memory-")):
+            # drm-memory-<region> 是旧内核中 drm-resident-<region> 的名称
+            region = key.split("-", 2)[2]
+            scale = _MEMORY_UNITS.get(parts[1], 1) if len(parts) > 1 else 1
+            memory[region] = int(parts[0]) * scale
+        else:
+            fields[key] = parts[0]
+    if "drm-client-id" not in fields:
+        return None
+    return fields, engines, capacity, cycles, total_cycles, memory
+
+class DRMClientCollector:
+    """基于DRM fdinfo的每进程GPU使用率
+
+    amdgpu/i915/xe 等驱动在 /proc/<pid>/fdinfo/<fd> 中输出 drm-client-id、
+    drm-engine-*（纳秒）或 drm-cycles-*、drm-memory-*。同一客户端可能被多个
+    fd（dup、fork继承）引用，按 (drm-pdev, drm-client-id) 去重后由计数器增量
+    计算引擎忙碌百分比。
+
+    扫描是增量的：缓存每个pid持有的DRM fd，只对新出现的pid列出全部fd；
+    已知pid的fd失效时下一次重新列出；每隔 rescan_interval 秒做一次完整扫描，
+    以发现已有进程新打开的DRM设备。proc_root 可指向伪造的目录树、clock 可替换为
+    测试时钟。
+    """
+
+    def __init__(self, proc_root="/proc", rescan_interval=60, clock=time.monotonic_ns):
+        self.proc_root = proc_root
+        self.rescan_interval = rescan_interval
+        self.clock = clock
+        self._drm_fds = {}
+        self._clients = {}
+        self._last_full_scan = None
+
+    def _scan_fds(self, pid):
+        """列出进程中指向 /dev/dri/ 的fd"""
+        fd_dir = os.path.join(self.proc_root, str(pid), "fd")
+        fds = []
+        try:
+            for fd in os.listdir(fd_dir):
+                try:
+                    if os.readlink(os.path.join(fd_dir, fd)).startswith("/dev/dri/"):
+                        fds.append(fd)
+                except OSError:
+                    continue
+        except OSError:
+            pass
+        return fds
+
+    def _read_fdinfo(self, pid, fd):
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "fdinfo", fd), "r") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _read_comm(self, pid):
+        try:
+            with open(os.path.join(self.proc_root, str(pid), "comm"), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _client_usage(self, key, parsed, now_ns, clients):
+        """根据上次计数计算客户端各引擎忙碌百分比"""
+        _, engines, capacity, cycles, total_cycles, _ = parsed
+        previous = self._clients.get(key)
+        clients[key] = (now_ns, engines, cycles, total_cycles)
+        busy = {}
+        if previous is None:
+            return busy
+        elapsed = now_ns - previous[0]
+        if elapsed <= 0:
+            return busy
+        for engine, value in engines.items():
+            delta = value - previous[1].get(engine, value)
+            if delta >= 0:
+                busy[engine] = delta / elapsed / capacity.get(engine, 1) * 100
+        # xe驱动使用周期计数：忙碌周期增量 / 总周期增量
+        for engine, value in cycles.items():
+            total_delta = total_cycles.get(engine, 0) - previous[3].get(engine, 0)
+            delta = value - previous[2].get(engine, value)
+            if total_delta > 0 and delta >= 0:
+                busy[engine] = delta / total_delta / capacity.get(engine, 1) * 100
+        return busy
+
+    def sample(self):
+        """扫描DRM客户端，返回按GPU忙碌度排序的进程列表"""
+        try:
+            now_ns = self.clock()
+            full_scan = (self._last_full_scan is None or
+                         now_ns - self._last_full_scan >= self.rescan_interval * 1e9)
+            if full_scan:
+                self._last_full_scan = now_ns
+
+            drm_fds = {}
+            for name in os.listdir(self.proc_root):
+                if not name.isdigit():
+                    continue
+                pid = int(name)
+                fds = None if full_scan else self._drm_fds.get(pid)
+                drm_fds[pid] = self._scan_fds(pid) if fds is None else fds
+
+            clients = {}
+            processes = {}
+            for pid, fds in drm_fds.items():
+                for fd in fds:
+                    data = self._read_fdinfo(pid, fd)
+                    if data is None:
+                        # fd已关闭，下次重新列出该进程的fd
+                        drm_fds[pid] = None
+                        continue
+                    parsed = parse_fdinfo(data)
+                    if parsed is None:
+                        continue
+                    key = (parsed[0].get("drm-pdev"), parsed[0]["drm-client-id"])
+                    if key in clients:
+                        continue
+                    busy = self._client_usage(key, parsed, now_ns, clients)
+
+                    process = processes.get(pid)
+                    if process is None:
+                        process = processes[pid] = {
+                            "pid": pid,
+                            "name": self._read_comm(pid),
+                            "driver": parsed[0].get("drm-driver"),
+                            "pdev": key[0],
+                            "clients": 0,
+                            "engines": {},
+                            "memory": {}
+                        }
+                    process["clients"] += 1
+                    for engine, percent in busy.items():
+                        process["engines"][engine] = process["engines"].get(engine, 0) + percent
+                    for region, size in parsed[5].items():
+                        process["memory"][region] = process["memory"].get(region, 0) + size
+
+            self._drm_fds = drm_fds
+            self._clients = clients
+
+            result = []
+            for process in processes.values():
+                engines = {engine: round(min(percent, 100.0), 2) for engine, percent in process["engines"].items()}
+                memory = process.pop("memory")
+                process["engines"] = engines
+                process["busy_percent"] = max(engines.values(), default=0.0)
+                process["vram_mb"] = round(memory.get("vram", 0) / (1024 * 1024), 2)
+                process["gtt_mb"] = round(memory.get("gtt", 0) / (1024 * 1024), 2)
+                process["system_mb"] = round(memory.get("system", 0) / (1024 * 1024), 2)
+                result.append(process)
+            result.sort(key=lambda p: (p["busy_percent"], p["vram_mb"]), reverse=True)
+            return result
+
+        except Exception as e:
+            logger.error(f"读取DRM fdinfo失败: {e}")
+            return []
@@ -0,0 +1,194 @@
+import hashlib
+import heapq
+import json
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.helpers import bytes_to_gb
+from utils.logger import logger
+
+def _disk_bytes(st):
+    """文件实际占用的磁盘空间，平台不支持st_blocks时退回文件大小"""
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+class LargeFileScanner:
+    """并行大文件扫描器，带按目录mtime失效的持久化索引
+
+    每个目录由线程池中的一个任务用 os.scandir 扫描，主线程把各目录的大文件
+    合并进一个全局的有界小顶堆（最多 top_k 个），因此内存占用与文件总数无关。
+    不跨越挂载点，不跟随符号链接；可指定时间预算，超时后返回已扫描部分并
+    标记为不完整。
+
+    索引以目录为单位只保存聚合值 (mtime_ns, 子目录, 占用字节, inode数)，另存
+    全局top_k文件列表。再次扫描时目录mtime未变则直接复用，不再对其中的文件
+    逐个stat，其中的大文件从上次的全局列表取回。注意原地增长的文件不会改变
+    目录mtime；删除大文件后，未变化目录中原本排在top_k之外的文件也不会补入，
+    这两种情况需要 full=True 完整重扫。占用字节按 st_blocks 计算（与du一致），
+    硬链接会被重复计算。
+    """
+
+    INDEX_VERSION = 3
+
+    def __init__(self, index_dir="./data/file_index", top_k=100, min_size=1024 * 1024, workers=8):
+        self.index_dir = index_dir
+        self.top_k = top_k
+        self.min_size = min_size
+        self.workers = workers
+        # 根目录 -> (目录记录, 全局top_k文件)
+        self._indexes = {}
+        # 只保护 _indexes，扫描和写索引文件都在锁外进行
+        self._lock = threading.Lock()
+
+    def _index_path(self, root):
+        digest = hashlib.md5(root.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.index_dir, f"files_{digest}.json")
+
+    def _load_index(self, root):
+        """加载磁盘上的索引，不存在或版本不符时返回空索引"""
+        try:
+            with open(self._index_path(root), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.INDEX_VERSION and data.get("root") == root:
+                return data["dirs"], [tuple(item) for item in data["files"]]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"加载文件索引失败: {e}")
+        return {}, []
+
+    def _get_index(self, root):
+        with self._lock:
+            index = self._indexes.get(root)
+        if index is None:
+            index = self._load_index(root)
+            with self._lock:
+                index = self._indexes.setdefault(root, index)
+        return index
+
+    def _save_index(self, root, dirs, files):
+        try:
+            os.makedirs(self.index_dir, exist_ok=True)
+            path = self._index_path(root)
+            # 并发扫描同一根目录时各自写临时文件，os.replace保证索引文件完整
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.INDEX_VERSION, "root": root, "dirs": dirs, "files": files}, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"保存文件索引失败: {e}")
+
+    def _scan_dir(self, path, root_dev, previous):
+        """扫描单个目录，返回 (记录, 大文件列表, 是否复用索引)；跨挂载点或无权限时返回None"""
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+        if st.st_dev != root_dev:
+            return None
+        cached = previous.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns:
+            return cached, None, True
+
+        subdirs = []
+        files = []
+        # 目录自身也计入占用空间和inode
+        disk_bytes = _disk_bytes(st)
+        inodes = 1
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            continue
+                        entry_st = entry.stat(follow_symlinks=False)
+                        disk_bytes += _disk_bytes(entry_st)
+                        inodes += 1
+                        if stat.S_ISREG(entry_st.st_mode) and entry_st.st_size >= self.min_size:
+                            files.append((entry_st.st_size, entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return (st.st_mtime_ns, subdirs, disk_bytes, inodes), files, False
+
+    def _push(self, heap, files):
+        """把文件合并进全局有界小顶堆"""
+        for item in files:
+            if len(heap) < self.top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def get_directories(self, root):
+        """返回root最近一次扫描的目录记录 {路径: (mtime_ns, 子目录, 占用字节, inode数)}"""
+        return self._get_index(os.path.abspath(root))[0]
+
+    def scan(self, root="/", limit=10, time_budget=None, full=False):
+        """扫描root所在文件系统，返回最大的limit个文件（不超过top_k）及扫描统计"""
+        root = os.path.abspath(root)
+        started = time.monotonic()
+        deadline = started + time_budget if time_budget else None
+        previous, previous_files = ({}, []) if full else self._get_index(root)
+        # 上次的全局大文件按所在目录分组，目录复用时取回
+        reusable_files = {}
+        for size, path in previous_files:
+            reusable_files.setdefault(os.path.dirname(path), []).append((size, path))
+        root_dev = os.stat(root).st_dev
+        dirs = {}
+        heap = []
+        reused = 0
+        complete = True
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            pending = {pool.submit(self._scan_dir, root, root_dev, previous): root}
+            while pending:
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    complete = False
+                    break
+                for future in done:
+                    path = pending.pop(future)
+                    result = future.result()
+                    if result is None:
+                        continue
+                    record, files, from_index = result
+                    reused += from_index
+                    dirs[path] = record
+                    self._push(heap, reusable_files.get(path, ()) if from_index else files)
+                    for name in record[1]:
+                        child = os.path.join(path, name)
+                        pending[pool.submit(self._scan_dir, child, root_dev, previous)] = child
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        if not complete:
+            # 未扫描到的目录沿用上次的索引和大文件，下次扫描继续
+            for path, record in previous.items():
+                if path not in dirs:
+                    dirs[path] = record
+                    self._push(heap, reusable_files.get(path, ()))
+        with self._lock:
+            self._indexes[root] = (dirs, heap)
+        self._save_index(root, dirs, heap)
+
+        return {
+            "root": root,
+            "complete": complete,
+            "elapsed": round(time.monotonic() - started, 3),
+            "directories": len(dirs),
+            "reused_directories": reused,
+            "files": [
+                {
+                    "path": path,
+                    "size": bytes_to_gb(size),
+                    "size_bytes": size
+                }
+                for size, path in heapq.nlargest(limit, heap)
+            ]
+        }
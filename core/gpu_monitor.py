@@ -2,17 +2,47 @@ import psutil
 import time
 import platform
 from datetime import datetime
+from core.amdgpu import AMDGPUSampler
+from core.drm_fdinfo import DRMClientCollector
+from core.history import RingHistory
+from core.nvml import NVMLSampler
+from utils.cache import TTLCache
 from utils.logger import logger
 
 class GPUMonitor:
-    def __init__(self):
-        self.history = []
-        self.max_history = 1000
+    HISTORY_COLUMNS = ("load_percent", "memory_percent", "temperature")
+    # 实时采样器提供的附加字段，存在时原样输出
+    EXTRA_FIELDS = ("card", "pci_slot", "uuid", "driver", "temperature_junction", "temperature_memory",
+                    "memory_busy_percent", "gtt_used_mb", "gtt_total_mb", "power_watts",
+                    "power_limit_watts", "fan_rpm", "fan_percent", "sclk_mhz", "mclk_mhz")
+
+    def __init__(self, history_size=1000, sysfs_root="/sys", nvml=None):
+        self.history = RingHistory(self.HISTORY_COLUMNS, history_size)
+        self.sysfs_root = sysfs_root
+        # 可传入伪造的NVML模块用于测试，默认导入pynvml
+        self.nvml = nvml
         self.gpus = []
+        # 能够逐次刷新数据的采样器，每次 get_gpu_info 时重新读取
+        self.samplers = []
+        # Linux下通过DRM fdinfo统计每个进程的GPU使用
+        self.drm_clients = DRMClientCollector() if platform.system() == "Linux" else None
+        # 最近一次采样结果，调度器运行时发布直接读取，不再重复采样和写入历史
+        self.cache = TTLCache()
+        self.cache_ttl = {"gpu_info": 1}
         self._init_gpus()
+        # 初始化时一次性检测到的GPU（无法实时刷新）
+        self._static_gpus = list(self.gpus)
+        self._refresh()
         
     def _init_gpus(self):
         """初始化GPU检测"""
+        if platform.system() == "Linux":
+            self._init_amdgpu_sampler()
+        if self._init_nvml_sampler():
+            # NVIDIA GPU已由NVML实时采样，不再通过GPUtil一次性读取
+            if platform.system() == "Windows":
+                self._detect_amd_gpu_windows()
+            return
         try:
             # 尝试使用GPUtil库
             import GPUtil
@@ -92,8 +122,46 @@ class GPUMonitor:
         except Exception as e:
             logger.warning(f"Windows AMD GPU检测失败: {e}")
     
+    def _init_amdgpu_sampler(self):
+        """Linux下通过amdgpu sysfs实时采样AMD GPU"""
+        try:
+            sampler = AMDGPUSampler(self.sysfs_root)
+            if sampler.cards:
+                self.samplers.append(sampler)
+        except Exception as e:
+            logger.warning(f"amdgpu sysfs检测失败: {e}")
+    
+    def _init_nvml_sampler(self):
+        """初始化常驻的NVML会话，成功检测到NVIDIA GPU时返回True"""
+        try:
+            sampler = NVMLSampler(self.nvml)
+        except ImportError:
+            return False
+        except Exception as e:
+            logger.warning(f"NVML初始化失败: {e}")
+            return False
+        if not sampler.devices:
+            sampler.close()
+            return False
+        self.samplers.append(sampler)
+        return True
+    
+    def _refresh(self):
+        """从实时采样器读取最新数据，与静态检测结果合并"""
+        gpus = list(self._static_gpus)
+        for sampler in self.samplers:
+            try:
+                gpus.extend(sampler.sample())
+            except Exception as e:
+                logger.error(f"GPU采样失败: {e}")
+        for index, gpu in enumerate(gpus):
+            gpu.setdefault("id", index)
+        self.gpus = gpus
+    
     def _detect_amd_gpu_linux(self):
-        """Linux下检测AMD GPU"""
+        """Linux下检测AMD GPU（已通过sysfs检测到时跳过lspci）"""
+        if self.samplers:
+            return
         try:
             import subprocess
             # 检查是否有AMD GPU
@@ -119,6 +187,7 @@ class GPUMonitor:
     def get_gpu_info(self):
         """获取GPU基本信息"""
         try:
+            self._refresh()
             gpu_info = {
                 "timestamp": datetime.now().isoformat(),
                 "gpu_count": len(self.gpus),
@@ -136,14 +205,18 @@ class GPUMonitor:
                     "memory_percent": (gpu["memory_used"] / gpu["memory_total"] * 100) if gpu["memory_total"] > 0 else 0,
                     "temperature": gpu["temperature"]
                 }
+                gpu_data.update((key, gpu[key]) for key in self.EXTRA_FIELDS if key in gpu)
                 gpu_info["gpus"].append(gpu_data)
             
             # 添加到历史记录
-            self.history.append(gpu_info)
-            if len(self.history) > self.max_history:
-                self.history.pop(0)
+            # 多GPU时记录各项指标的最大值
+            gpus = gpu_info["gpus"]
+            self.history.append({
+                name: max((gpu[name] or 0 for gpu in gpus), default=None)
+                for name in self.HISTORY_COLUMNS
+            })
                 
-            return gpu_info
+            return self.cache.put("gpu_info", gpu_info)
             
         except Exception as e:
             logger.error(f"获取GPU信息失败: {e}")
@@ -181,9 +254,16 @@ class GPUMonitor:
     def _get_gpu_processes(self):
         """获取GPU进程信息"""
         try:
-            # 这里可以添加获取GPU进程的代码
-            # 需要特定工具支持
-            return []
+            processes = self.drm_clients.sample() if self.drm_clients else []
+            # NVML在每次采样时已批量读取了各GPU上的进程
+            for gpu in self.gpus:
+                for proc in gpu.get("processes", ()):
+                    try:
+                        name = psutil.Process(proc["pid"]).name()
+                    except psutil.Error:
+                        name = None
+                    processes.append({**proc, "name": name, "driver": "nvidia"})
+            return processes
         except Exception as e:
             logger.error(f"获取GPU进程信息失败: {e}")
             return []
@@ -221,27 +301,30 @@ class GPUMonitor:
             return []
     
     def check_alerts(self, threshold=95):
-        """检查GPU告警"""
-        gpu_info = self.get_gpu_info()
-        if gpu_info:
-            for gpu in gpu_info.get('gpus', []):
-                if gpu.get('load_percent', 0) > threshold:
-                    logger.warning(f"GPU使用率过高: {gpu['name']} - {gpu['load_percent']}%")
-                    return True
-                if gpu.get('temperature', 0) > 85:
-                    logger.warning(f"GPU温度过高: {gpu['name']} - {gpu['temperature']}°C")
-                    return True
+        """检查GPU告警，默认读取最近一次采样（各GPU最大值）而不重新采样"""
+        if not self.history:
+            self.get_gpu_info()
+        last = self.history.last()
+        if last:
+            if last.get('load_percent') is not None and last['load_percent'] > threshold:
+                logger.warning(f"GPU使用率过高: {last['load_percent']}%")
+                return True
+            if last.get('temperature') is not None and last['temperature'] > 85:
+                logger.warning(f"GPU温度过高: {last['temperature']}°C")
+                return True
         return False
     
     def get_detailed_info(self):
         """获取详细GPU信息"""
-        gpu_info = self.get_gpu_info()
+        gpu_info = self.cache.get("gpu_info", self.get_gpu_info, self.cache_ttl["gpu_info"])
         gpu_temp = self.get_gpu_temperature()
         gpu_memory = self.get_gpu_memory_usage()
+        gpu_processes = self._get_gpu_processes()
         
         return {
             "basic_info": gpu_info,
             "temperature": gpu_temp,
             "memory_usage": gpu_memory,
-            "history": self.history[-50:] if self.history else []  # 最近50条记录
+            "processes": gpu_processes,
+            "history": self.history.to_records(50)  # 最近50条记录
         } 
\ No newline at end of file
@@ -0,0 +1,117 @@
+import bisect
+import math
+import threading
+import time
+from array import array
+from datetime import datetime
+
+class RingHistory:
+    """列式定长环形缓冲区，每个数值指标一列，另有int64纳秒时间戳列
+
+    每个值同时写入位置 i 和 i + capacity（镜像写入），因此任意最近N条
+    记录在底层数组中都是连续的，窗口切片可以直接返回memoryview而无需拷贝。
+    每条记录保存两个时间戳：墙上时间只用于显示，单调时钟用于排序和去重。
+    单调时间戳严格递增（since() 依赖二分查找），不晚于最新记录的样本被丢弃；
+    NTP向后调整墙上时间不会导致样本被丢弃。
+    """
+
+    def __init__(self, columns, capacity=1000):
+        self.columns = tuple(columns)
+        self.capacity = max(int(capacity), 1)
+        size = self.capacity * 2
+        self._timestamps = array('q', bytes(8 * size))
+        self._monotonic = array('q', bytes(8 * size))
+        self._data = {name: array('d', bytes(8 * size)) for name in self.columns}
+        self._head = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def append(self, values, timestamp_ns=None, monotonic_ns=None):
+        """追加一条记录，缺失或无法转换的指标记为NaN，O(1)
+
+        timestamp_ns 为显示用的墙上时间，monotonic_ns 为单调时钟（如快照的
+        monotonic_ns）。单调时间戳不晚于最新记录时（重复发布同一快照、并发写入
+        乱序）丢弃该样本，返回False。
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        if monotonic_ns is None:
+            monotonic_ns = time.monotonic_ns()
+        with self._lock:
+            if self._size and monotonic_ns <= self._monotonic[self._head - 1 + self.capacity]:
+                return False
+            i = self._head
+            j = i + self.capacity
+            self._timestamps[i] = self._timestamps[j] = timestamp_ns
+            self._monotonic[i] = self._monotonic[j] = monotonic_ns
+            for name, column in self._data.items():
+                value = values.get(name)
+                try:
+                    value = float(value) if value is not None else math.nan
+                except (TypeError, ValueError):
+                    value = math.nan
+                column[i] = column[j] = value
+            self._head = (i + 1) % self.capacity
+            if self._size < self.capacity:
+                self._size += 1
+        return True
+
+    def _bounds(self, n):
+        n = self._size if n is None else max(min(int(n), self._size), 0)
+        end = self._head + self.capacity
+        return end - n, end
+
+    def window(self, n=None):
+        """返回最近n条记录的零拷贝视图: (时间戳视图, {列名: 视图})"""
+        with self._lock:
+            start, end = self._bounds(n)
+            timestamps = memoryview(self._timestamps)[start:end]
+            columns = {name: memoryview(column)[start:end] for name, column in self._data.items()}
+        return timestamps, columns
+
+    def since(self, monotonic_ns):
+        """返回单调时间戳大于monotonic_ns的记录视图，用于增量处理新样本
+
+        返回 (单调时间戳视图, 墙上时间戳视图, {列名: 视图})。
+        """
+        with self._lock:
+            start, end = self._bounds(None)
+            monotonic = memoryview(self._monotonic)[start:end]
+            timestamps = memoryview(self._timestamps)[start:end]
+            columns = {name: memoryview(column)[start:end] for name, column in self._data.items()}
+        k = bisect.bisect_right(monotonic, monotonic_ns)
+        return monotonic[k:], timestamps[k:], {name: column[k:] for name, column in columns.items()}
+
+    def column(self, name, n=None):
+        """返回单列最近n条记录的零拷贝视图"""
+        with self._lock:
+            start, end = self._bounds(n)
+            return memoryview(self._data[name])[start:end]
+
+    def last(self):
+        """返回最新一条记录，无数据时返回None"""
+        records = self.to_records(1)
+        return records[0] if records else None
+
+    def to_records(self, n=None):
+        """将最近n条记录转换为可JSON序列化的字典列表（NaN转为None）"""
+        timestamps, columns = self.window(n)
+        records = []
+        for k, timestamp_ns in enumerate(timestamps):
+            record = {"timestamp": datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()}
+            for name, column in columns.items():
+                value = column[k]
+                record[name] = None if math.isnan(value) else value
+            records.append(record)
+        return records
+
+    def clear(self):
+        with self._lock:
+            self._head = 0
+            self._size = 0
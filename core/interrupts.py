@@ -0,0 +1,232 @@
+import os
+import re
+import time
+from array import array
+from datetime import datetime
+from utils.procfs import CachedFile
+from utils.logger import logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 检查分布是否均衡的软中断类型
+SOFTIRQ_BALANCE_TYPES = ("NET_RX", "NET_TX", "BLOCK")
+
+def _queue_group(description):
+    """多队列设备的分组名称：eth0-TxRx-3 -> eth0-TxRx，nvme0q3 -> nvme0q"""
+    device = description.split()[-1] if description else ""
+    device = device.split("@")[0]
+    return re.sub(r"[-_.]?\d+$", "", device)
+
+class _CounterMatrix:
+    """/proc/interrupts 或 /proc/softirqs 的 行 x CPU 计数矩阵
+
+    行布局（行标签、描述、多队列分组）缓存下来，只有表头或行标签变化
+    （设备热插拔、CPU上下线）时才重建；每次解析只按CPU数做有界split，
+    不再拆分描述文本。增量计算在安装了NumPy时向量化执行。
+    """
+
+    def __init__(self, path, clock=time.monotonic_ns):
+        self.file = CachedFile(path, bufsize=65536)
+        self.clock = clock
+        self.layout = None
+        self.cpus = []
+        self.labels = ()
+        self.descriptions = []
+        self._last = None
+
+    def _parse(self):
+        lines = self.file.read().split(b'\n')
+        header = lines[0]
+        ncpu = len(header.split())
+        labels = []
+        tokens = []
+        rows = []
+        for line in lines[1:]:
+            parts = line.split(None, ncpu + 1)
+            # ERR/MIS等只有一个总数的行不属于每CPU矩阵
+            if len(parts) < ncpu + 1:
+                continue
+            labels.append(parts[0])
+            tokens.extend(parts[1:ncpu + 1])
+            rows.append(parts)
+        labels = tuple(labels)
+        if (header, labels) != self.layout:
+            self.layout = (header, labels)
+            self.cpus = [int(name[3:]) for name in header.split()]
+            self.labels = tuple(label.rstrip(b':').decode() for label in labels)
+            self.descriptions = [
+                parts[ncpu + 1].decode(errors="replace").strip() if len(parts) > ncpu + 1 else ""
+                for parts in rows
+            ]
+            self._last = None
+        if np is not None:
+            counts = np.array(tokens).astype(np.int64)
+        else:
+            counts = array('q', map(int, tokens))
+        return counts
+
+    def sample(self):
+        """返回 (每行每秒速率, 每CPU每秒速率, 每行各CPU速率)，首次采样或布局变化时返回None"""
+        counts = self._parse()
+        now_ns = self.clock()
+        previous = self._last
+        self._last = (now_ns, counts)
+        if previous is None or now_ns <= previous[0]:
+            return None
+        elapsed = (now_ns - previous[0]) / 1e9
+        ncpu = len(self.cpus)
+        rows = len(self.labels)
+        if np is not None:
+            # 计数器回绕（32位计数）或重置时增量记为0
+            matrix = np.maximum(counts - previous[1], 0).reshape(rows, ncpu) / elapsed
+            return matrix.sum(axis=1).tolist(), matrix.sum(axis=0).tolist(), matrix
+        last = previous[1]
+        per_row = []
+        per_cpu = [0.0] * ncpu
+        matrix = []
+        for r in range(rows):
+            base = r * ncpu
+            row = [max(counts[base + c] - last[base + c], 0) / elapsed for c in range(ncpu)]
+            for c, value in enumerate(row):
+                per_cpu[c] += value
+            per_row.append(sum(row))
+            matrix.append(row)
+        return per_row, per_cpu, matrix
+
+    @staticmethod
+    def row(matrix, index):
+        row = matrix[index]
+        return row.tolist() if np is not None else row
+
+    def sum_rows(self, matrix, indexes):
+        """若干行按CPU求和"""
+        if np is not None:
+            return matrix[indexes].sum(axis=0).tolist()
+        per_cpu = [0.0] * len(self.cpus)
+        for i in indexes:
+            for c, value in enumerate(matrix[i]):
+                per_cpu[c] += value
+        return per_cpu
+
+    def close(self):
+        self.file.close()
+
+class InterruptCollector:
+    """硬中断与软中断的每CPU分布采集
+
+    解析 /proc/interrupts 与 /proc/softirqs 为 行 x CPU 矩阵，按两次采样的
+    增量计算每个IRQ、每种软中断以及每个CPU的每秒次数，并检测分布不均：
+    设备中断（编号IRQ）、同一多队列设备（如网卡 eth0-TxRx-*）的所有队列，
+    或 NET_RX/NET_TX/BLOCK 软中断超过 imbalance_share 比例集中在一个CPU上
+    时给出提示。速率低于 min_rate（次/秒）的不检查。proc_root 可指向伪造的目录树、
+    clock 可替换为测试时钟。
+    """
+
+    def __init__(self, proc_root="/proc", imbalance_share=0.5, min_rate=100, clock=time.monotonic_ns):
+        self.imbalance_share = imbalance_share
+        self.min_rate = min_rate
+        self.interrupts = _CounterMatrix(os.path.join(proc_root, "interrupts"), clock)
+        self.softirqs = _CounterMatrix(os.path.join(proc_root, "softirqs"), clock)
+        self._groups = (None, None, None)
+
+    def _concentration(self, cpus, per_cpu):
+        """返回 (最忙CPU, 占比%, 总速率)，不需要检查时返回None"""
+        total = sum(per_cpu)
+        if len(cpus) < 2 or total < self.min_rate:
+            return None
+        busiest = max(range(len(per_cpu)), key=per_cpu.__getitem__)
+        share = per_cpu[busiest] / total
+        if share <= self.imbalance_share:
+            return None
+        return cpus[busiest], round(share * 100, 1), round(total, 1)
+
+    def _device_groups(self):
+        """设备IRQ行与多队列分组，随行布局缓存"""
+        source = self.interrupts
+        if self._groups[0] is not source.layout:
+            device_rows = [i for i, label in enumerate(source.labels) if label.isdigit()]
+            groups = {}
+            for i in device_rows:
+                group = _queue_group(source.descriptions[i])
+                if group:
+                    groups.setdefault(group, []).append(i)
+            self._groups = (source.layout, device_rows, groups)
+        return self._groups[1], self._groups[2]
+
+    def _check_interrupts(self, matrix, imbalances):
+        source = self.interrupts
+        device_rows, groups = self._device_groups()
+
+        result = self._concentration(source.cpus, source.sum_rows(matrix, device_rows))
+        if result:
+            cpu, share, rate = result
+            imbalances.append({"source": "interrupts", "name": "device", "cpu": cpu,
+                               "share_percent": share, "per_sec": rate})
+
+        for group, rows in groups.items():
+            # 只检查多队列设备
+            if len(rows) < 2:
+                continue
+            result = self._concentration(source.cpus, source.sum_rows(matrix, rows))
+            if result:
+                cpu, share, rate = result
+                imbalances.append({"source": "interrupts", "name": group, "queues": len(rows), "cpu": cpu,
+                                   "share_percent": share, "per_sec": rate})
+
+    def collect(self, top=10):
+        """采集中断分布，返回每CPU速率、最活跃的IRQ和分布不均提示"""
+        try:
+            result = {"timestamp": datetime.now().isoformat(), "imbalances": []}
+            imbalances = result["imbalances"]
+
+            sample = self.interrupts.sample()
+            source = self.interrupts
+            if sample is not None:
+                per_row, per_cpu, matrix = sample
+                order = sorted(range(len(per_row)), key=per_row.__getitem__, reverse=True)[:top]
+                result["interrupts"] = {
+                    "cpus": source.cpus,
+                    "total_per_sec": round(sum(per_row), 1),
+                    "per_cpu_per_sec": [round(value, 1) for value in per_cpu],
+                    "top": [
+                        {
+                            "irq": source.labels[i],
+                            "description": source.descriptions[i],
+                            "per_sec": round(per_row[i], 1),
+                            "per_cpu_per_sec": [round(value, 1) for value in source.row(matrix, i)]
+                        }
+                        for i in order if per_row[i] > 0
+                    ]
+                }
+                self._check_interrupts(matrix, imbalances)
+
+            sample = self.softirqs.sample()
+            source = self.softirqs
+            if sample is not None:
+                per_row, per_cpu, matrix = sample
+                result["softirqs"] = {
+                    "cpus": source.cpus,
+                    "total_per_sec": round(sum(per_row), 1),
+                    "per_cpu_per_sec": [round(value, 1) for value in per_cpu],
+                    "types": {label: round(per_row[i], 1) for i, label in enumerate(source.labels)}
+                }
+                for i, label in enumerate(source.labels):
+                    if label not in SOFTIRQ_BALANCE_TYPES:
+                        continue
+                    concentration = self._concentration(source.cpus, source.row(matrix, i))
+                    if concentration:
+                        cpu, share, rate = concentration
+                        imbalances.append({"source": "softirqs", "name": label, "cpu": cpu,
+                                           "share_percent": share, "per_sec": rate})
+            return result
+
+        except Exception as e:
+            logger.error(f"采集中断分布失败: {e}")
+            return None
+
+    def close(self):
+        self.interrupts.close()
+        self.softirqs.close()
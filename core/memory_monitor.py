@@ -1,110 +1,154 @@
-import psutil
-import time
-from datetime import datetime
+from core.history import RingHistory
+from core.numa import get_default_topology
+from core.proc_snapshot import get_default_collector
+from core.process_tracker import ProcessTracker
+from core.vmstat import VMStatCollector
+from utils.cache import TTLCache
 from utils.helpers import bytes_to_gb
 from utils.logger import logger
 
 class MemoryMonitor:
-    def __init__(self):
-        self.history = []
-        self.max_history = 1000
+    HISTORY_COLUMNS = ("percent", "used", "available", "swap_percent",
+                       "pgmajfault_per_sec", "pgscan_direct_per_sec", "pswpout_per_sec")
+
+    def __init__(self, collector=None, snapshot_max_age=0.5, history_size=1000, process_tracker=None,
+                 numa=None):
+        self.history = RingHistory(self.HISTORY_COLUMNS, history_size)
+        self.collector = collector or get_default_collector()
+        self.snapshot_max_age = snapshot_max_age
+        # 进程表由跟踪器增量维护，超过max_age才重新扫描
+        self.processes = process_tracker or ProcessTracker()
+        self.vmstat = VMStatCollector()
+        self.numa = numa or get_default_topology()
+        # 最近一次采样结果，调度器运行时发布直接读取，不再重复计算分页速率和写入历史
+        self.cache = TTLCache()
+        self.cache_ttl = {"memory_info": 0.25, "vmstat": 0.25}
+
+    def _get_snapshot(self, snapshot=None):
+        """未指定快照时复用采集器中足够新的快照"""
+        return snapshot or self.collector.get_snapshot(self.snapshot_max_age)
+
+    @staticmethod
+    def _available(meminfo):
+        """与psutil一致：优先使用MemAvailable，缺失时按free+buffers+cached估算"""
+        total = meminfo.get("MemTotal", 0)
+        available = meminfo.get("MemAvailable", 0)
+        if not available:
+            available = (meminfo.get("MemFree", 0) + meminfo.get("Buffers", 0)
+                         + meminfo.get("Cached", 0) + meminfo.get("SReclaimable", 0))
+        return min(available, total)
         
-    def get_memory_info(self):
+    def get_memory_info(self, snapshot=None):
         """获取内存基本信息"""
         try:
-            memory = psutil.virtual_memory()
-            swap = psutil.swap_memory()
+            snapshot = self._get_snapshot(snapshot)
+            meminfo = snapshot.meminfo
+            total = meminfo.get("MemTotal", 0)
+            available = self._available(meminfo)
+            swap_total = meminfo.get("SwapTotal", 0)
+            swap_free = meminfo.get("SwapFree", 0)
+            swap_used = swap_total - swap_free
             
             memory_info = {
-                "timestamp": datetime.now().isoformat(),
-                "total": bytes_to_gb(memory.total),
-                "available": bytes_to_gb(memory.available),
-                "used": bytes_to_gb(memory.used),
-                "free": bytes_to_gb(memory.free),
-                "percent": memory.percent,
-                "swap_total": bytes_to_gb(swap.total),
-                "swap_used": bytes_to_gb(swap.used),
-                "swap_free": bytes_to_gb(swap.free),
-                "swap_percent": swap.percent
+                "timestamp": snapshot.isoformat(),
+                "total": bytes_to_gb(total),
+                "available": bytes_to_gb(available),
+                "used": bytes_to_gb(total - available),
+                "free": bytes_to_gb(meminfo.get("MemFree", 0)),
+                "percent": round((total - available) / total * 100, 1) if total else 0,
+                "swap_total": bytes_to_gb(swap_total),
+                "swap_used": bytes_to_gb(swap_used),
+                "swap_free": bytes_to_gb(swap_free),
+                "swap_percent": round(swap_used / swap_total * 100, 1) if swap_total else 0
             }
             
-            # 添加到历史记录
-            self.history.append(memory_info)
-            if len(self.history) > self.max_history:
-                self.history.pop(0)
+            # 添加到历史记录（含主缺页、直接回收和换出速率）
+            rates = self.cache.put("vmstat", self.vmstat.collect(snapshot) or {}).get("rates", {})
+            record = dict(memory_info)
+            for name in ("pgmajfault", "pgscan_direct", "pswpout"):
+                record[f"{name}_per_sec"] = rates.get(name)
+            self.history.append(record, int(snapshot.timestamp * 1e9), snapshot.monotonic_ns)
                 
-            return memory_info
+            return self.cache.put("memory_info", memory_info)
             
         except Exception as e:
             logger.error(f"获取内存信息失败: {e}")
             return None
     
-    def get_memory_details(self):
+    def get_memory_details(self, snapshot=None):
         """获取内存详细信息"""
         try:
-            memory = psutil.virtual_memory()
+            meminfo = self._get_snapshot(snapshot).meminfo
             details = {}
             
-            # 安全地获取内存详细信息，不同平台属性可能不同
-            if hasattr(memory, 'active'):
-                details["active"] = bytes_to_gb(memory.active)
-            if hasattr(memory, 'inactive'):
-                details["inactive"] = bytes_to_gb(memory.inactive)
-            if hasattr(memory, 'buffers'):
-                details["buffers"] = bytes_to_gb(memory.buffers)
-            if hasattr(memory, 'cached'):
-                details["cached"] = bytes_to_gb(memory.cached)
-            if hasattr(memory, 'shared'):
-                details["shared"] = bytes_to_gb(memory.shared)
-            if hasattr(memory, 'slab'):
-                details["slab"] = bytes_to_gb(memory.slab)
+            # 安全地获取内存详细信息，不同平台字段可能不同
+            if "Active" in meminfo:
+                details["active"] = bytes_to_gb(meminfo["Active"])
+            if "Inactive" in meminfo:
+                details["inactive"] = bytes_to_gb(meminfo["Inactive"])
+            if "Buffers" in meminfo:
+                details["buffers"] = bytes_to_gb(meminfo["Buffers"])
+            if "Cached" in meminfo:
+                # 与free命令一致，cached包含可回收的slab
+                details["cached"] = bytes_to_gb(meminfo["Cached"] + meminfo.get("SReclaimable", 0))
+            if "Shmem" in meminfo:
+                details["shared"] = bytes_to_gb(meminfo["Shmem"])
+            if "Slab" in meminfo:
+                details["slab"] = bytes_to_gb(meminfo["Slab"])
             
             return details
         except Exception as e:
             logger.error(f"获取内存详细信息失败: {e}")
             return None
     
+    def get_vm_stats(self, snapshot=None):
+        """获取完整的 /proc/meminfo（字节，不取整）和 /proc/vmstat 分页/回收速率"""
+        try:
+            snapshot = self._get_snapshot(snapshot)
+            vm_stats = self.cache.get("vmstat", lambda: self.vmstat.collect(snapshot) or {}, self.cache_ttl["vmstat"])
+            return {
+                "timestamp": snapshot.isoformat(),
+                "meminfo": dict(snapshot.meminfo),
+                **vm_stats
+            }
+        except Exception as e:
+            logger.error(f"获取分页统计失败: {e}")
+            return None
+    
     def get_memory_processes(self, limit=10):
-        """获取占用内存最多的进程"""
+        """获取占用内存最多的进程（读取进程跟踪器的缓存进程表）"""
         try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'memory_info']):
-                try:
-                    proc_info = proc.info
-                    memory_mb = proc_info['memory_info'].rss / (1024 * 1024)
-                    processes.append({
-                        "pid": proc_info['pid'],
-                        "name": proc_info['name'],
-                        "memory_mb": round(memory_mb, 2)
-                    })
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            # 按内存使用量排序
-            processes.sort(key=lambda x: x['memory_mb'], reverse=True)
-            return processes[:limit]
-            
+            return self.processes.top(limit, "memory")
         except Exception as e:
             logger.error(f"获取进程内存信息失败: {e}")
             return []
     
-    def get_detailed_info(self):
+    def get_detailed_info(self, snapshot=None):
         """获取详细内存信息"""
-        memory_info = self.get_memory_info()
-        memory_details = self.get_memory_details()
+        snapshot = self._get_snapshot(snapshot)
+        memory_info = self.cache.get("memory_info", lambda: self.get_memory_info(snapshot),
+                                     self.cache_ttl["memory_info"])
+        memory_details = self.get_memory_details(snapshot)
         top_processes = self.get_memory_processes()
+        vm_stats = self.get_vm_stats(snapshot)
+        numa_nodes = self.numa.memory()
         
         return {
             "basic_info": memory_info,
             "details": memory_details,
             "top_processes": top_processes,
-            "history": self.history[-50:] if self.history else []  # 最近50条记录
+            "vmstat": vm_stats,
+            "numa_nodes": numa_nodes,
+            "history": self.history.to_records(50)  # 最近50条记录
         }
     
-    def check_alerts(self, threshold=85):
-        """检查内存告警"""
-        memory_info = self.get_memory_info()
-        if memory_info and memory_info.get('percent', 0) > threshold:
-            logger.warning(f"内存使用率过高: {memory_info['percent']}%")
+    def check_alerts(self, threshold=85, snapshot=None):
+        """检查内存告警，默认读取最近一次采样而不重新采样"""
+        if snapshot is not None or not self.history:
+            self.get_memory_info(snapshot)
+        last = self.history.last()
+        percent = last.get('percent') if last else None
+        if percent is not None and percent > threshold:
+            logger.warning(f"内存使用率过高: {percent}%")
             return True
         return False 
\ No newline at end of file
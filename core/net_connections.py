@@ -0,0 +1,179 @@
+import os
+import socket
+import psutil
+from collections import Counter
+from datetime import datetime
+from utils.logger import logger
+
+# /proc/net/tcp 中的十六进制状态码
+TCP_STATES = {
+    "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1",
+    "05": "FIN_WAIT2", "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT",
+    "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING", "0C": "NEW_SYN_RECV"
+}
+
+# (协议, 文件名, 地址族)
+PROC_NET_FILES = (
+    ("tcp", "tcp", socket.AF_INET),
+    ("tcp", "tcp6", socket.AF_INET6),
+    ("udp", "udp", socket.AF_INET),
+    ("udp", "udp6", socket.AF_INET6)
+)
+
+_UNSPECIFIED = ("0.0.0.0", "::")
+
+class ConnectionTable:
+    """直接解析 /proc/net/{tcp,tcp6,udp,udp6} 的连接统计
+
+    单次流式遍历，只保留按状态计数、按远端IP和本地端口的聚合，不构造逐条
+    连接列表。只有显式要求时才扫描 /proc/<pid>/fd 把socket inode对应到进程。
+    非Linux平台退回 psutil.net_connections() 并做相同的聚合。
+    """
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+        self.use_proc = os.path.exists(os.path.join(proc_root, "net", "tcp"))
+        # 十六进制地址 -> 文本地址，远端地址重复度高，缓存解码结果
+        self._addr_cache = {}
+
+    def _decode_address(self, hex_addr, family):
+        address = self._addr_cache.get(hex_addr)
+        if address is None:
+            raw = bytes.fromhex(hex_addr)
+            # 内核按32位字的主机字节序输出
+            if family == socket.AF_INET:
+                raw = raw[::-1]
+            else:
+                raw = b"".join(raw[i:i + 4][::-1] for i in range(0, 16, 4))
+            address = socket.inet_ntop(family, raw)
+            if address.startswith("::ffff:") and "." in address:
+                # IPv4映射地址按IPv4统计
+                address = address[7:]
+            if len(self._addr_cache) > 65536:
+                self._addr_cache.clear()
+            self._addr_cache[hex_addr] = address
+        return address
+
+    def _iter_proc(self, want_inodes):
+        """流式产出 (协议, 状态, 本地端口, 远端IP, inode)"""
+        for proto, filename, family in PROC_NET_FILES:
+            path = os.path.join(self.proc_root, "net", filename)
+            try:
+                f = open(path, "r")
+            except OSError:
+                # 未启用IPv6等情况
+                continue
+            with f:
+                next(f, None)
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 10:
+                        continue
+                    local_port = int(fields[1][-4:], 16)
+                    remote_hex, remote_port = fields[2].rsplit(":", 1)
+                    state = fields[3]
+                    if proto == "tcp":
+                        state = TCP_STATES.get(state, state)
+                    else:
+                        # UDP只有已connect()的socket才有远端
+                        state = "ESTABLISHED" if state == "01" else "UNCONNECTED"
+                    remote = None
+                    if remote_port != "0000":
+                        remote = self._decode_address(remote_hex, family)
+                    yield proto, state, local_port, remote, int(fields[9]) if want_inodes else None
+
+    def _iter_psutil(self):
+        for conn in psutil.net_connections(kind="inet"):
+            proto = "tcp" if conn.type == socket.SOCK_STREAM else "udp"
+            if proto == "udp":
+                state = "ESTABLISHED" if conn.raddr else "UNCONNECTED"
+            else:
+                state = conn.status
+            remote = conn.raddr.ip if conn.raddr else None
+            yield proto, state, conn.laddr.port if conn.laddr else 0, remote, conn.pid
+
+    def _socket_owners(self, inodes):
+        """扫描 /proc/<pid>/fd，返回 {pid: socket数量}（只统计给定inode）"""
+        owners = Counter()
+        for entry in os.scandir(self.proc_root):
+            if not entry.name.isdigit():
+                continue
+            fd_dir = os.path.join(entry.path, "fd")
+            try:
+                fds = os.listdir(fd_dir)
+            except OSError:
+                continue
+            for fd in fds:
+                try:
+                    target = os.readlink(os.path.join(fd_dir, fd))
+                except OSError:
+                    continue
+                if target.startswith("socket:[") and int(target[8:-1]) in inodes:
+                    owners[int(entry.name)] += 1
+        return owners
+
+    def collect(self, top=10, resolve_pids=False):
+        """返回连接统计摘要：按状态计数、远端IP和本地端口的top-N"""
+        try:
+            states = {"tcp": Counter(), "udp": Counter()}
+            remotes = Counter()
+            local_ports = Counter()
+            listen_ports = set()
+            inodes = set()
+            owners = Counter()
+            total = 0
+
+            rows = self._iter_proc(resolve_pids) if self.use_proc else self._iter_psutil()
+            for proto, state, local_port, remote, owner in rows:
+                total += 1
+                states[proto][state] += 1
+                if state in ("LISTEN", "UNCONNECTED"):
+                    listen_ports.add((proto, local_port))
+                    continue
+                if remote and remote not in _UNSPECIFIED:
+                    remotes[remote] += 1
+                    local_ports[(proto, local_port)] += 1
+                if resolve_pids and owner is not None:
+                    # /proc下owner为inode，psutil下直接是pid
+                    if self.use_proc:
+                        inodes.add(owner)
+                    else:
+                        owners[owner] += 1
+
+            summary = {
+                "timestamp": datetime.now().isoformat(),
+                "total": total,
+                "established": states["tcp"]["ESTABLISHED"],
+                "tcp_states": dict(states["tcp"]),
+                "udp_states": dict(states["udp"]),
+                "top_remote": [
+                    {"address": address, "connections": count}
+                    for address, count in remotes.most_common(top)
+                ],
+                "top_local_ports": [
+                    {"protocol": proto, "port": port, "connections": count}
+                    for (proto, port), count in local_ports.most_common(top)
+                ],
+                "listen_ports": [
+                    {"protocol": proto, "port": port} for proto, port in sorted(listen_ports)
+                ]
+            }
+            if resolve_pids:
+                if self.use_proc:
+                    owners = self._socket_owners(inodes)
+                summary["top_processes"] = [
+                    {"pid": pid, "name": self._process_name(pid), "connections": count}
+                    for pid, count in owners.most_common(top)
+                ]
+            return summary
+
+        except Exception as e:
+            logger.error(f"获取网络连接统计失败: {e}")
+            return None
+
+    @staticmethod
+    def _process_name(pid):
+        try:
+            return psutil.Process(pid).name()
+        except psutil.Error:
+            return None
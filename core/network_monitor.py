@@ -3,19 +3,57 @@ import time
 import subprocess
 import platform
 from datetime import datetime
+from core.history import RingHistory
+from core.net_connections import ConnectionTable
+from core.proc_snapshot import get_default_collector
+from core.rate import RateCalculator
+from utils.cache import TTLCache
 from utils.helpers import format_speed
 from utils.logger import logger
 
 class NetworkMonitor:
-    def __init__(self):
-        self.history = []
-        self.max_history = 1000
-        self.last_net_io = None
+    HISTORY_COLUMNS = ("upload_speed", "download_speed", "total_bytes_sent", "total_bytes_recv")
+
+    def __init__(self, collector=None, snapshot_max_age=0.5, history_size=1000):
+        self.history = RingHistory(self.HISTORY_COLUMNS, history_size)
+        self.io_rates = RateCalculator()
+        self.connection_table = ConnectionTable()
+        self.collector = collector or get_default_collector()
+        self.snapshot_max_age = snapshot_max_age
+        # 网卡地址、连接列表等慢速数据按各自周期缓存；io为最近一次速率采样，发布时直接读取
+        self.cache = TTLCache()
+        self.cache_ttl = {"interfaces": 30, "connections": 5, "io": 1}
+        self._cache_loaders = {
+            "interfaces": self.get_interfaces,
+            "connections": self.get_network_connections
+        }
+
+    def _get_snapshot(self, snapshot=None):
+        """未指定快照时复用采集器中足够新的快照"""
+        return snapshot or self.collector.get_snapshot(self.snapshot_max_age)
+
+    def refresh_cache(self, key):
+        """立即重新采集某项慢速数据并写入缓存（供调度器调用）"""
+        return self.cache.put(key, self._cache_loaders[key]())
+
+    def _cached(self, key):
+        """读取慢速数据缓存，超过有效期时重新采集"""
+        return self.cache.get(key, self._cache_loaders[key], self.cache_ttl[key])
+
+    @staticmethod
+    def _total_io(snapshot):
+        """汇总所有网卡的计数器: (bytes_sent, bytes_recv, packets_sent, packets_recv)"""
+        totals = [0, 0, 0, 0]
+        for stat in snapshot.net_dev.values():
+            totals[0] += stat.bytes_sent
+            totals[1] += stat.bytes_recv
+            totals[2] += stat.packets_sent
+            totals[3] += stat.packets_recv
+        return tuple(totals)
         
-    def get_network_info(self):
-        """获取网络基本信息"""
+    def get_interfaces(self):
+        """获取网卡地址与状态"""
         try:
-            net_io = psutil.net_io_counters()
             net_if_addrs = psutil.net_if_addrs()
             net_if_stats = psutil.net_if_stats()
             
@@ -41,59 +79,87 @@ class NetworkMonitor:
                     
                     interfaces.append(interface_info)
             
+            return interfaces
+            
+        except Exception as e:
+            logger.error(f"获取网卡信息失败: {e}")
+            return []
+    
+    def get_network_info(self, snapshot=None):
+        """获取网络基本信息"""
+        try:
+            snapshot = self._get_snapshot(snapshot)
+            net_io = self._total_io(snapshot)
+            
             return {
-                "timestamp": datetime.now().isoformat(),
-                "interfaces": interfaces,
-                "total_bytes_sent": net_io.bytes_sent,
-                "total_bytes_recv": net_io.bytes_recv,
-                "total_packets_sent": net_io.packets_sent,
-                "total_packets_recv": net_io.packets_recv
+                "timestamp": snapshot.isoformat(),
+                "interfaces": self._cached("interfaces"),
+                "total_bytes_sent": net_io[0],
+                "total_bytes_recv": net_io[1],
+                "total_packets_sent": net_io[2],
+                "total_packets_recv": net_io[3]
             }
             
         except Exception as e:
             logger.error(f"获取网络信息失败: {e}")
             return None
     
-    def get_network_speed(self):
-        """获取网络速度"""
+    def get_network_speed(self, snapshot=None, pernic=True):
+        """获取网络速度（按真实经过时间计算速率，可附带每块网卡的速率）"""
         try:
-            current_net_io = psutil.net_io_counters()
-            
-            if current_net_io is None:
-                return {
-                    "upload_speed": 0,
-                    "download_speed": 0,
-                    "upload_speed_formatted": "0 B/s",
-                    "download_speed_formatted": "0 B/s"
-                }
-            
-            if self.last_net_io is None:
-                self.last_net_io = current_net_io
-                return {
-                    "upload_speed": 0,
-                    "download_speed": 0,
-                    "upload_speed_formatted": "0 B/s",
-                    "download_speed_formatted": "0 B/s"
-                }
-            
-            # 计算每秒速度
-            time_diff = 1  # 假设1秒间隔
-            upload_speed = (current_net_io.bytes_sent - self.last_net_io.bytes_sent) / time_diff
-            download_speed = (current_net_io.bytes_recv - self.last_net_io.bytes_recv) / time_diff
+            snapshot = self._get_snapshot(snapshot)
+            upload_speed = 0.0
+            download_speed = 0.0
+            per_interface = {}
             
-            self.last_net_io = current_net_io
+            for name, stat in snapshot.net_dev.items():
+                rates = self.io_rates.update(
+                    name,
+                    (stat.bytes_sent, stat.bytes_recv, stat.packets_sent, stat.packets_recv,
+                     stat.errout + stat.errin, stat.dropout + stat.dropin),
+                    snapshot.monotonic_ns
+                )
+                upload_speed += rates[0]
+                download_speed += rates[1]
+                if pernic:
+                    per_interface[name] = {
+                        "upload_speed": rates[0],
+                        "download_speed": rates[1],
+                        "packets_sent_per_sec": rates[2],
+                        "packets_recv_per_sec": rates[3],
+                        "errors_per_sec": rates[4],
+                        "drops_per_sec": rates[5],
+                        "upload_speed_formatted": format_speed(rates[0]),
+                        "download_speed_formatted": format_speed(rates[1])
+                    }
+            self.io_rates.prune(snapshot.net_dev)
             
-            return {
+            speed_info = {
                 "upload_speed": upload_speed,
                 "download_speed": download_speed,
                 "upload_speed_formatted": format_speed(upload_speed),
                 "download_speed_formatted": format_speed(download_speed)
             }
+            if pernic:
+                speed_info["per_interface"] = per_interface
+            return speed_info
             
         except Exception as e:
             logger.error(f"获取网络速度失败: {e}")
             return None
     
+    def sample_io(self, snapshot=None):
+        """采集网络速率并写入历史记录"""
+        snapshot = self._get_snapshot(snapshot)
+        network_speed = self.get_network_speed(snapshot)
+        net_io = self._total_io(snapshot)
+        
+        record = dict(network_speed or {})
+        record["total_bytes_sent"] = net_io[0]
+        record["total_bytes_recv"] = net_io[1]
+        self.history.append(record, int(snapshot.timestamp * 1e9), snapshot.monotonic_ns)
+        return self.cache.put("io", network_speed)
+    
     def ping_host(self, host="8.8.8.8"):
         """Ping指定主机"""
         try:
@@ -124,31 +190,9 @@ class NetworkMonitor:
             logger.error(f"Ping {host} 失败: {e}")
             return None
     
-    def get_network_connections(self):
-        """获取网络连接信息"""
-        try:
-            connections = []
-            for conn in psutil.net_connections():
-                if conn.status == 'ESTABLISHED':
-                    try:
-                        local_addr = f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A"
-                        remote_addr = f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A"
-                        
-                        connections.append({
-                            "local_address": local_addr,
-                            "remote_address": remote_addr,
-                            "status": conn.status,
-                            "pid": conn.pid
-                        })
-                    except (AttributeError, TypeError):
-                        # 跳过无效的连接
-                        continue
-            
-            return connections[:20]  # 只返回前20个连接
-            
-        except Exception as e:
-            logger.error(f"获取网络连接信息失败: {e}")
-            return []
+    def get_network_connections(self, top=10, resolve_pids=False):
+        """获取网络连接统计（按状态计数及远端IP、本地端口的top-N）"""
+        return self.connection_table.collect(top, resolve_pids)
     
     def speed_test(self):
         """执行网速测试"""
@@ -263,26 +307,18 @@ class NetworkMonitor:
                 "note": f"测试失败: {str(e)}"
             }
     
-    def get_detailed_info(self):
+    def get_detailed_info(self, snapshot=None):
         """获取详细网络信息"""
-        network_info = self.get_network_info()
-        network_speed = self.get_network_speed()
-        connections = self.get_network_connections()
+        snapshot = self._get_snapshot(snapshot)
+        network_info = self.get_network_info(snapshot)
+        network_speed = self.cache.get("io", lambda: self.sample_io(snapshot), self.cache_ttl["io"])
+        connections = self._cached("connections")
         
-        detailed_info = {
+        return {
             "basic_info": network_info,
             "speed": network_speed,
-            "connections": connections
-        }
-        
-        # 添加到历史记录
-        self.history.append(detailed_info)
-        if len(self.history) > self.max_history:
-            self.history.pop(0)
-        
-        return {
-            **detailed_info,
-            "history": self.history[-50:] if self.history else []  # 最近50条记录
+            "connections": connections,
+            "history": self.history.to_records(50)  # 最近50条记录
         }
     
     def check_network_health(self):
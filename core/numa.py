@@ -0,0 +1,134 @@
+import glob
+import os
+import re
+import threading
+import time
+from core.rate import RateCalculator
+from utils.procfs import CachedFile, parse_cpu_list, parse_key_value
+from utils.logger import logger
+
+NUMASTAT_FIELDS = ("numa_hit", "numa_miss", "numa_foreign", "interleave_hit", "local_node", "other_node")
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def parse_node_meminfo(data):
+    """解析 "Node 0 MemTotal:  16318304 kB" 格式的节点meminfo，kB字段转换为字节"""
+    result = {}
+    for line in data.split(b'\n'):
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        try:
+            value = int(fields[3])
+        except ValueError:
+            continue
+        if len(fields) > 4 and fields[4] == b'kB':
+            value *= 1024
+        result[fields[2].rstrip(b':').decode()] = value
+    return result
+
+class NUMATopology:
+    """NUMA节点拓扑与每节点内存统计
+
+    初始化时读取 /sys/devices/system/node/node*/cpulist 和在线CPU列表，并保持
+    各节点 meminfo、numastat 打开。memory() 返回每节点的总量/空闲/已用/文件页
+    （字节，不取整）以及 numa_miss、numa_foreign、other_node 的每秒速率；
+    cpu_usage() 把按在线CPU顺序排列的每核使用率按节点汇总。sysfs_root 可指向
+    伪造的目录树、clock 可替换为测试时钟。
+    """
+
+    def __init__(self, sysfs_root="/sys", clock=time.monotonic_ns):
+        self.sysfs_root = sysfs_root
+        self.clock = clock
+        self.rates = RateCalculator()
+        cpu_root = os.path.join(sysfs_root, "devices", "system", "cpu")
+        self.online_cpus = parse_cpu_list(_read_text(os.path.join(cpu_root, "online")))
+        self.nodes = self._discover()
+
+    def _discover(self):
+        positions = {cpu: index for index, cpu in enumerate(self.online_cpus)}
+        nodes = []
+        pattern = os.path.join(self.sysfs_root, "devices", "system", "node", "node*")
+        for path in glob.glob(pattern):
+            match = re.fullmatch(r"node(\d+)", os.path.basename(path))
+            if not match:
+                continue
+            cpus = parse_cpu_list(_read_text(os.path.join(path, "cpulist")))
+            nodes.append({
+                "node": int(match.group(1)),
+                "cpus": cpus,
+                # 每核使用率列表中属于该节点的下标
+                "cpu_indexes": [positions[cpu] for cpu in cpus if cpu in positions],
+                "meminfo": CachedFile(os.path.join(path, "meminfo")),
+                "numastat": CachedFile(os.path.join(path, "numastat"))
+            })
+        nodes.sort(key=lambda node: node["node"])
+        return nodes
+
+    def memory(self):
+        """返回每个节点的内存使用和NUMA命中/未命中速率"""
+        try:
+            result = []
+            now_ns = self.clock()
+            for node in self.nodes:
+                meminfo = parse_node_meminfo(node["meminfo"].read())
+                numastat = parse_key_value(node["numastat"].read())
+                counters = tuple(numastat.get(field, 0) for field in NUMASTAT_FIELDS)
+                rates = dict(zip(NUMASTAT_FIELDS, self.rates.update(node["node"], counters, now_ns)))
+                total = meminfo.get("MemTotal", 0)
+                free = meminfo.get("MemFree", 0)
+                used = meminfo.get("MemUsed", total - free)
+                local = rates["local_node"] + rates["other_node"]
+                result.append({
+                    "node": node["node"],
+                    "cpus": node["cpus"],
+                    "total": total,
+                    "free": free,
+                    "used": used,
+                    "percent": round(used / total * 100, 1) if total else 0,
+                    "file_pages": meminfo.get("FilePages", 0),
+                    "anon_pages": meminfo.get("AnonPages", 0),
+                    "numastat": dict(zip(NUMASTAT_FIELDS, counters)),
+                    "numa_miss_per_sec": round(rates["numa_miss"], 2),
+                    "numa_foreign_per_sec": round(rates["numa_foreign"], 2),
+                    "other_node_per_sec": round(rates["other_node"], 2),
+                    # 该节点上的内存分配中由其他节点CPU上的进程发起的比例
+                    "remote_percent": round(rates["other_node"] / local * 100, 2) if local else 0.0
+                })
+            return result
+        except Exception as e:
+            logger.error(f"获取NUMA节点内存信息失败: {e}")
+            return []
+
+    def cpu_usage(self, usage_per_core):
+        """把按在线CPU顺序排列的每核使用率按节点汇总"""
+        result = []
+        for node in self.nodes:
+            usages = [usage_per_core[i] for i in node["cpu_indexes"] if i < len(usage_per_core)]
+            result.append({
+                "node": node["node"],
+                "cpus": node["cpus"],
+                "usage_percent": round(sum(usages) / len(usages), 1) if usages else None
+            })
+        return result
+
+    def close(self):
+        for node in self.nodes:
+            node["meminfo"].close()
+            node["numastat"].close()
+
+_default_topology = None
+_default_lock = threading.Lock()
+
+def get_default_topology():
+    """获取进程内共享的NUMA拓扑，首次调用时读取（导入模块时不打开文件）"""
+    global _default_topology
+    with _default_lock:
+        if _default_topology is None:
+            _default_topology = NUMATopology()
+        return _default_topology
@@ -0,0 +1,109 @@
+import time
+from utils.logger import logger
+
+class NVMLSampler:
+    """基于NVML的NVIDIA GPU实时采样
+
+    只在初始化时调用一次 nvmlInit 并缓存设备句柄，每次采样按设备批量读取
+    使用率、显存、温度、功耗、频率和进程占用，不会像 GPUtil 那样每次启动
+    nvidia-smi 子进程。nvml 参数可传入伪造的模块用于测试，默认导入 pynvml。
+    """
+
+    def __init__(self, nvml=None):
+        if nvml is None:
+            import pynvml as nvml
+        self.nvml = nvml
+        self.nvml.nvmlInit()
+        self.devices = []
+        for index in range(self.nvml.nvmlDeviceGetCount()):
+            handle = self.nvml.nvmlDeviceGetHandleByIndex(index)
+            self.devices.append({
+                "index": index,
+                "handle": handle,
+                "name": self._text(self.nvml.nvmlDeviceGetName(handle)),
+                "uuid": self._text(self._call(self.nvml.nvmlDeviceGetUUID, handle))
+            })
+        # 每个设备上次读取进程使用率的时间戳（微秒）
+        self._last_seen = {}
+        if self.devices:
+            logger.info(f"通过NVML检测到 {len(self.devices)} 个NVIDIA GPU")
+
+    @staticmethod
+    def _text(value):
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _call(self, func, *args):
+        """调用NVML函数，设备不支持该查询时返回None"""
+        try:
+            return func(*args)
+        except Exception:
+            return None
+
+    def _processes(self, device):
+        """合并计算/图形进程的显存占用与SM使用率"""
+        nvml = self.nvml
+        handle = device["handle"]
+        processes = {}
+        for getter in ("nvmlDeviceGetComputeRunningProcesses", "nvmlDeviceGetGraphicsRunningProcesses"):
+            func = getattr(nvml, getter, None)
+            for proc in (self._call(func, handle) if func else None) or ():
+                used = getattr(proc, "usedGpuMemory", None)
+                entry = processes.setdefault(proc.pid, {"pid": proc.pid, "gpu_id": device["index"],
+                                                        "vram_mb": 0.0, "sm_percent": None,
+                                                        "memory_percent": None})
+                if used:
+                    entry["vram_mb"] = round(entry["vram_mb"] + used / (1024 * 1024), 2)
+
+        # 自上次采样以来的进程使用率样本
+        last_seen = self._last_seen.get(device["index"], 0)
+        samples = self._call(nvml.nvmlDeviceGetProcessUtilization, handle, last_seen) or ()
+        self._last_seen[device["index"]] = int(time.time() * 1e6)
+        for sample in samples:
+            entry = processes.get(sample.pid)
+            if entry is not None:
+                entry["sm_percent"] = max(entry["sm_percent"] or 0, sample.smUtil)
+                entry["memory_percent"] = max(entry["memory_percent"] or 0, sample.memUtil)
+        return list(processes.values())
+
+    def sample(self):
+        """读取所有NVIDIA GPU的当前数据，格式与 GPUMonitor.gpus 一致"""
+        nvml = self.nvml
+        gpus = []
+        for device in self.devices:
+            handle = device["handle"]
+            utilization = self._call(nvml.nvmlDeviceGetUtilizationRates, handle)
+            memory = self._call(nvml.nvmlDeviceGetMemoryInfo, handle)
+            temperature = self._call(nvml.nvmlDeviceGetTemperature, handle, nvml.NVML_TEMPERATURE_GPU)
+            power = self._call(nvml.nvmlDeviceGetPowerUsage, handle)
+            power_limit = self._call(nvml.nvmlDeviceGetEnforcedPowerLimit, handle)
+            sclk = self._call(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_GRAPHICS)
+            mclk = self._call(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_MEM)
+            fan = self._call(nvml.nvmlDeviceGetFanSpeed, handle)
+
+            memory_total = memory.total / (1024 * 1024) if memory else 0
+            memory_used = memory.used / (1024 * 1024) if memory else 0
+            gpus.append({
+                "name": device["name"],
+                "uuid": device["uuid"],
+                "driver": "nvidia",
+                "load": utilization.gpu / 100 if utilization else 0,
+                "memory_total": round(memory_total, 2),
+                "memory_used": round(memory_used, 2),
+                "memory_free": round(memory_total - memory_used, 2),
+                "temperature": temperature or 0,
+                "memory_busy_percent": utilization.memory if utilization else None,
+                # NVML功耗单位为毫瓦
+                "power_watts": round(power / 1000, 2) if power is not None else None,
+                "power_limit_watts": round(power_limit / 1000, 2) if power_limit is not None else None,
+                "fan_percent": fan,
+                "sclk_mhz": sclk,
+                "mclk_mhz": mclk,
+                "processes": self._processes(device)
+            })
+        return gpus
+
+    def close(self):
+        try:
+            self.nvml.nvmlShutdown()
+        except Exception:
+            pass
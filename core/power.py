@@ -0,0 +1,163 @@
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+from core.sensors import CHIP_TYPES
+from utils.procfs import CachedFile
+from utils.logger import logger
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _domain_type(name):
+    """RAPL域名称对应的类型：package-0 -> package，dram -> dram"""
+    return "package" if name.startswith("package") else name
+
+class PowerCollector:
+    """基于RAPL能量计数器和hwmon功率传感器的功耗采集
+
+    初始化时发现 /sys/class/powercap/intel-rapl:* 下的 package、core、uncore、
+    dram 等域并保持 energy_uj 打开，按两次读数的能量差除以经过时间得到瓦数；
+    计数器在 max_energy_range_uj 处回绕。没有RAPL（或无权限读取）时，CPU
+    功耗退回hwmon的 power*_average/power*_input（k10temp/zenpower等），GPU
+    功耗总是读取hwmon（amdgpu PPT）。sysfs_root 可指向伪造的目录树、clock 可替换为
+    测试时钟。
+    """
+
+    def __init__(self, sysfs_root="/sys", min_interval=0.1, clock=time.monotonic_ns):
+        self.sysfs_root = sysfs_root
+        self.min_interval = min_interval
+        self.clock = clock
+        self.rapl = self._discover_rapl()
+        self.hwmon = self._discover_hwmon(skip_cpu=bool(self.rapl))
+        self._lock = threading.Lock()
+        self._last = {}
+        self._latest = None
+        self._latest_at = 0
+        if self.rapl or self.hwmon:
+            logger.info(f"检测到 {len(self.rapl)} 个RAPL功耗域和 {len(self.hwmon)} 个hwmon功率传感器")
+
+    def _discover_rapl(self):
+        zones = []
+        pattern = os.path.join(self.sysfs_root, "class", "powercap", "intel-rapl:*")
+        for zone in sorted(glob.glob(pattern)):
+            name = _read_text(os.path.join(zone, "name"))
+            energy = CachedFile(os.path.join(zone, "energy_uj"))
+            try:
+                energy.read_int()
+            except (OSError, ValueError) as e:
+                # 新内核中energy_uj默认仅root可读
+                logger.warning(f"无法读取RAPL能量计数器 {zone}: {e}")
+                energy.close()
+                continue
+            parts = os.path.basename(zone).split(":")
+            # 子域（intel-rapl:0:0）名称加上所属package前缀
+            if len(parts) > 2:
+                parent = _read_text(os.path.join(os.path.dirname(zone), ":".join(parts[:2]), "name"))
+                label = f"{parent}/{name}" if parent else name
+            else:
+                label = name
+            max_range = _read_text(os.path.join(zone, "max_energy_range_uj"))
+            zones.append({
+                "name": label,
+                "type": _domain_type(name or ""),
+                "source": "rapl",
+                "max_energy_range_uj": int(max_range) if max_range else None,
+                "file": energy
+            })
+        return zones
+
+    def _discover_hwmon(self, skip_cpu):
+        sensors = []
+        pattern = os.path.join(self.sysfs_root, "class", "hwmon", "hwmon*")
+        for hwmon in sorted(glob.glob(pattern)):
+            chip = _read_text(os.path.join(hwmon, "name")) or os.path.basename(hwmon)
+            sensor_type = CHIP_TYPES.get(chip, "other")
+            if skip_cpu and sensor_type == "cpu":
+                continue
+            device = os.path.join(hwmon, "device")
+            device_name = os.path.basename(os.path.realpath(device)) if os.path.exists(device) else chip
+            for prefix in sorted({path[:path.rindex("_")] for path in
+                                  glob.glob(os.path.join(hwmon, "power*_average")) +
+                                  glob.glob(os.path.join(hwmon, "power*_input"))}):
+                # 同一通道同时提供average和input时优先使用average
+                path = f"{prefix}_average" if os.path.exists(f"{prefix}_average") else f"{prefix}_input"
+                label = _read_text(f"{prefix}_label") or os.path.basename(prefix)
+                sensors.append({
+                    "name": f"{chip} {device_name} {label}" if device_name != chip else f"{chip} {label}",
+                    "type": "package" if sensor_type == "cpu" else sensor_type,
+                    "source": "hwmon",
+                    "file": CachedFile(path)
+                })
+        return sensors
+
+    def _energy_delta(self, zone, previous, current):
+        """能量计数器增量（微焦），在 max_energy_range_uj 处回绕"""
+        if current >= previous:
+            return current - previous
+        max_range = zone["max_energy_range_uj"]
+        if max_range:
+            return max_range - previous + current
+        return None
+
+    def sample(self, max_age=None):
+        """读取所有功耗域，返回各域瓦数与按类型汇总的功耗"""
+        with self._lock:
+            now_ns = self.clock()
+            if self._latest is not None:
+                age = (now_ns - self._latest_at) / 1e9
+                if age < self.min_interval or (max_age is not None and age <= max_age):
+                    return self._latest
+            try:
+                domains = []
+                for zone in self.rapl:
+                    try:
+                        energy = zone["file"].read_int()
+                    except (OSError, ValueError):
+                        continue
+                    watts = None
+                    previous = self._last.get(zone["name"])
+                    if previous is not None and now_ns > previous[0]:
+                        delta = self._energy_delta(zone, previous[1], energy)
+                        if delta is not None:
+                            watts = round(delta / ((now_ns - previous[0]) / 1e3), 2)
+                    self._last[zone["name"]] = (now_ns, energy)
+                    domains.append({"name": zone["name"], "type": zone["type"], "source": "rapl",
+                                    "watts": watts, "energy_j": round(energy / 1e6, 3)})
+
+                for sensor in self.hwmon:
+                    try:
+                        # hwmon功率单位为微瓦
+                        watts = round(sensor["file"].read_int() / 1e6, 2)
+                    except (OSError, ValueError):
+                        continue
+                    domains.append({"name": sensor["name"], "type": sensor["type"], "source": "hwmon",
+                                    "watts": watts})
+
+                totals = {}
+                for domain in domains:
+                    if domain["watts"] is not None:
+                        totals[domain["type"]] = round(totals.get(domain["type"], 0) + domain["watts"], 2)
+                self._latest = {
+                    "timestamp": datetime.now().isoformat(),
+                    "domains": domains,
+                    "package_watts": totals.get("package"),
+                    "dram_watts": totals.get("dram"),
+                    "gpu_watts": totals.get("gpu"),
+                    "totals": totals
+                }
+                self._latest_at = now_ns
+                return self._latest
+
+            except Exception as e:
+                logger.error(f"读取功耗数据失败: {e}")
+                return None
+
+    def close(self):
+        for sensor in self.rapl + self.hwmon:
+            sensor["file"].close()
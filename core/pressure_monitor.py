@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from datetime import datetime
+from core.history import RingHistory
+from utils.cache import TTLCache
+from utils.procfs import CachedFile
+from utils.logger import logger
+
+RESOURCES = ("cpu", "memory", "io")
+
+def parse_pressure(data):
+    """解析PSI文件内容
+
+    "some avg10=0.00 avg60=0.00 avg300=0.00 total=0" 每行一种类型，
+    返回 {"some": {"avg10":..., "avg60":..., "avg300":..., "total": 微秒}, "full": {...}}
+    """
+    result = {}
+    for line in data.split(b'\n'):
+        fields = line.split()
+        if not fields:
+            continue
+        values = {}
+        for field in fields[1:]:
+            key, _, value = field.partition(b'=')
+            values[key.decode()] = int(value) if key == b'total' else float(value)
+        result[fields[0].decode()] = values
+    return result
+
+def _default_cgroup_root():
+    """cgroup v2挂载点：纯v2系统为/sys/fs/cgroup，混合模式为其下的unified"""
+    for root in ("/sys/fs/cgroup", "/sys/fs/cgroup/unified"):
+        if os.path.exists(os.path.join(root, "cgroup.controllers")):
+            return root
+    return "/sys/fs/cgroup"
+
+class PressureMonitor:
+    """Pressure Stall Information（PSI）监控
+
+    读取 /proc/pressure/{cpu,memory,io} 以及cgroup v2目录下的
+    {cpu,memory,io}.pressure，输出内核计算的 avg10/avg60/avg300，并根据
+    total（累计停顿微秒数）的增量计算两次采样之间的停顿时间占比
+    stall_percent。全系统的停顿占比写入环形历史，供告警引擎按持续时间判断。
+    全系统PSI只由 sample_system()（调度任务）计算，get_pressure_info() 读取其
+    缓存结果并只计算cgroup部分，两者不会互相缩短对方的增量窗口。
+    cgroups 为相对cgroup根目录的路径列表，默认监控根目录下的第一级cgroup。
+    clock 返回单调纳秒时间，可替换为测试时钟。
+    """
+    HISTORY_COLUMNS = ("cpu_some", "memory_some", "memory_full", "io_some", "io_full")
+
+    def __init__(self, proc_root="/proc", cgroup_root=None, cgroups=None, history_size=1000,
+                 clock=time.monotonic_ns):
+        self.proc_root = proc_root
+        self.cgroup_root = cgroup_root or _default_cgroup_root()
+        self.cgroups = cgroups
+        self.clock = clock
+        self.history = RingHistory(self.HISTORY_COLUMNS, history_size)
+        self._files = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        self._system_paths = [(r, os.path.join(proc_root, "pressure", r)) for r in RESOURCES]
+        # 全系统PSI按调度周期缓存
+        self.cache = TTLCache()
+        self.cache_ttl = {"system": 1}
+        self._cache_loaders = {"system": self.sample_system}
+        self.available = os.path.exists(os.path.join(proc_root, "pressure"))
+        if not self.available:
+            logger.warning("内核未启用PSI（/proc/pressure不存在），压力监控不可用")
+
+    def refresh_cache(self, key):
+        """立即重新采集某项数据并写入缓存（供调度器调用）"""
+        return self.cache.put(key, self._cache_loaders[key]())
+
+    def _cached(self, key):
+        """读取缓存，超过有效期时重新采集"""
+        return self.cache.get(key, self._cache_loaders[key], self.cache_ttl[key])
+
+    def _read(self, path):
+        """读取PSI文件（保持打开），文件不存在时返回None"""
+        cached = self._files.get(path)
+        if cached is None:
+            if not os.path.exists(path):
+                return None
+            cached = self._files[path] = CachedFile(path)
+        try:
+            return parse_pressure(cached.read())
+        except (OSError, ValueError):
+            cached.close()
+            del self._files[path]
+            return None
+
+    def _stall_percent(self, key, total, now_ns):
+        """根据total增量计算停顿时间占比（%）"""
+        previous = self._last.get(key)
+        self._last[key] = (now_ns, total)
+        if previous is None or now_ns <= previous[0] or total < previous[1]:
+            return None
+        return round(min((total - previous[1]) / ((now_ns - previous[0]) / 1e3) * 100, 100.0), 2)
+
+    def _collect(self, name, paths, now_ns, seen):
+        result = {}
+        for resource, path in paths:
+            seen.add(path)
+            pressure = self._read(path)
+            if pressure is None:
+                continue
+            for kind, values in pressure.items():
+                key = (name, resource, kind)
+                seen.add(key)
+                values["stall_percent"] = self._stall_percent(key, values["total"], now_ns)
+            result[resource] = pressure
+        return result
+
+    def _cgroup_paths(self):
+        if self.cgroups is not None:
+            return self.cgroups
+        try:
+            return sorted(
+                entry.name for entry in os.scandir(self.cgroup_root)
+                if entry.is_dir(follow_symlinks=False) and
+                os.path.exists(os.path.join(entry.path, "cgroup.procs"))
+            )
+        except OSError:
+            return []
+
+    def sample_system(self):
+        """采集全系统PSI并把停顿占比写入历史"""
+        try:
+            with self._lock:
+                now_ns = self.clock()
+                system = self._collect(None, self._system_paths, now_ns, set())
+            if system:
+                record = {}
+                for column in self.HISTORY_COLUMNS:
+                    resource, kind = column.split("_")
+                    record[column] = system.get(resource, {}).get(kind, {}).get("stall_percent")
+                self.history.append(record, monotonic_ns=now_ns)
+            return system
+        except Exception as e:
+            logger.error(f"采集全系统PSI失败: {e}")
+            return {}
+
+    def get_pressure_info(self, include_cgroups=True):
+        """获取全系统（读取最近一次采样）及各cgroup的PSI数据"""
+        try:
+            system = self._cached("system")
+            cgroups = {}
+            if include_cgroups:
+                with self._lock:
+                    now_ns = self.clock()
+                    seen = set()
+                    for cgroup in self._cgroup_paths():
+                        directory = os.path.join(self.cgroup_root, cgroup)
+                        pressure = self._collect(
+                            cgroup, [(r, os.path.join(directory, f"{r}.pressure")) for r in RESOURCES], now_ns, seen
+                        )
+                        if pressure:
+                            cgroups[cgroup] = pressure
+                    # 已删除的cgroup不再保留计数器和文件描述符，全系统的计数器不受影响
+                    seen.update(path for _, path in self._system_paths)
+                    for key in [k for k in self._last if k[0] is not None and k not in seen]:
+                        del self._last[key]
+                    for path in [p for p in self._files if p not in seen]:
+                        self._files.pop(path).close()
+
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "available": bool(system),
+                "system": system,
+                "cgroups": cgroups
+            }
+
+        except Exception as e:
+            logger.error(f"获取PSI压力信息失败: {e}")
+            return None
+
+    def get_detailed_info(self, snapshot=None):
+        """获取详细PSI信息"""
+        return {
+            "basic_info": self.get_pressure_info(),
+            "history": self.history.to_records(50)  # 最近50条记录
+        }
@@ -0,0 +1,209 @@
+import os
+import time
+import threading
+import psutil
+from collections import namedtuple
+from datetime import datetime
+from types import MappingProxyType
+from utils.procfs import CachedFile, parse_key_value
+from utils.logger import logger
+
+# /proc/stat 中 cpu 行的前8列: user nice system idle iowait irq softirq steal
+CPU_TIME_FIELDS = ('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq', 'steal')
+
+DiskStat = namedtuple('DiskStat', [
+    'read_count', 'read_merged', 'read_bytes', 'read_time',
+    'write_count', 'write_merged', 'write_bytes', 'write_time',
+    'in_flight', 'busy_time', 'weighted_time'
+])
+
+NetDevStat = namedtuple('NetDevStat', [
+    'bytes_recv', 'packets_recv', 'errin', 'dropin',
+    'bytes_sent', 'packets_sent', 'errout', 'dropout'
+])
+
+_EMPTY = MappingProxyType({})
+_SECTOR_SIZE = 512
+
+class ProcSnapshot(namedtuple('ProcSnapshot', [
+    'timestamp', 'monotonic_ns', 'cpu_total', 'cpu_percpu', 'stat',
+    'meminfo', 'diskstats', 'net_dev', 'loadavg', 'vmstat'
+])):
+    """一次采样得到的不可变系统快照，所有监控器基于同一快照派生数据"""
+    __slots__ = ()
+
+    def isoformat(self):
+        return datetime.fromtimestamp(self.timestamp).isoformat()
+
+    def age(self):
+        """快照距今的秒数"""
+        return (time.monotonic_ns() - self.monotonic_ns) / 1e9
+
+class ProcSnapshotCollector:
+    """每个采样周期只读取一次/proc文件，生成共享快照"""
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+        self.use_proc = os.path.exists(os.path.join(proc_root, "stat"))
+        self.clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._files = {}
+        self._lock = threading.Lock()
+        self.latest = None
+
+    def _read(self, name):
+        """读取/proc下的文件，句柄在多次采样之间复用"""
+        cached = self._files.get(name)
+        if cached is None:
+            cached = self._files[name] = CachedFile(os.path.join(self.proc_root, name), bufsize=16384)
+        return cached.read()
+
+    def _read_optional(self, name):
+        try:
+            return self._read(name)
+        except OSError:
+            return b''
+
+    def _parse_stat(self, data):
+        cpu_total = None
+        cpu_percpu = []
+        stat = {}
+        ticks = self.clock_ticks
+        for line in data.split(b'\n'):
+            fields = line.split()
+            if not fields:
+                continue
+            key = fields[0]
+            if key.startswith(b'cpu'):
+                values = tuple(int(v) / ticks for v in fields[1:9])
+                if key == b'cpu':
+                    cpu_total = values
+                else:
+                    cpu_percpu.append(values)
+            elif key == b'intr' or key == b'softirq':
+                # 只保留总数，逐项明细由专门的采集器解析
+                stat[key.decode()] = int(fields[1])
+            elif len(fields) == 2:
+                stat[key.decode()] = int(fields[1])
+        return cpu_total, tuple(cpu_percpu), MappingProxyType(stat)
+
+    @staticmethod
+    def _parse_diskstats(data):
+        disks = {}
+        for line in data.split(b'\n'):
+            fields = line.split()
+            if len(fields) < 14:
+                continue
+            values = [int(v) for v in fields[3:14]]
+            values[2] *= _SECTOR_SIZE
+            values[6] *= _SECTOR_SIZE
+            disks[fields[2].decode()] = DiskStat(*values)
+        return MappingProxyType(disks)
+
+    @staticmethod
+    def _parse_net_dev(data):
+        nics = {}
+        # 前两行为表头
+        for line in data.split(b'\n')[2:]:
+            name, sep, rest = line.partition(b':')
+            if not sep:
+                continue
+            fields = rest.split()
+            if len(fields) < 16:
+                continue
+            nics[name.strip().decode()] = NetDevStat(
+                int(fields[0]), int(fields[1]), int(fields[2]), int(fields[3]),
+                int(fields[8]), int(fields[9]), int(fields[10]), int(fields[11])
+            )
+        return MappingProxyType(nics)
+
+    def _collect_proc(self):
+        cpu_total, cpu_percpu, stat = self._parse_stat(self._read("stat"))
+        meminfo = MappingProxyType(parse_key_value(self._read("meminfo"), scale=1024))
+        diskstats = self._parse_diskstats(self._read_optional("diskstats"))
+        net_dev = self._parse_net_dev(self._read_optional("net/dev"))
+        loadavg = tuple(float(v) for v in self._read("loadavg").split()[:3])
+        vmstat = MappingProxyType(parse_key_value(self._read_optional("vmstat")))
+        return cpu_total, cpu_percpu, stat, meminfo, diskstats, net_dev, loadavg, vmstat
+
+    @staticmethod
+    def _collect_psutil():
+        """非Linux平台通过psutil构造同样结构的快照"""
+        def cpu_tuple(times):
+            return tuple(getattr(times, field, 0.0) for field in CPU_TIME_FIELDS)
+
+        cpu_total = cpu_tuple(psutil.cpu_times())
+        cpu_percpu = tuple(cpu_tuple(t) for t in psutil.cpu_times(percpu=True))
+        cpu_stats = psutil.cpu_stats()
+        stat = MappingProxyType({
+            "ctxt": cpu_stats.ctx_switches,
+            "intr": cpu_stats.interrupts,
+            "softirq": cpu_stats.soft_interrupts,
+            "syscalls": cpu_stats.syscalls
+        })
+
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        meminfo = MappingProxyType({
+            "MemTotal": memory.total,
+            "MemFree": getattr(memory, 'free', 0),
+            "MemAvailable": memory.available,
+            "Buffers": getattr(memory, 'buffers', 0),
+            "Cached": getattr(memory, 'cached', 0),
+            "Active": getattr(memory, 'active', 0),
+            "Inactive": getattr(memory, 'inactive', 0),
+            "Shmem": getattr(memory, 'shared', 0),
+            "Slab": getattr(memory, 'slab', 0),
+            "SwapTotal": swap.total,
+            "SwapFree": swap.free
+        })
+
+        disks = {}
+        for name, io in (psutil.disk_io_counters(perdisk=True) or {}).items():
+            disks[name] = DiskStat(
+                io.read_count, getattr(io, 'read_merged_count', 0), io.read_bytes, io.read_time,
+                io.write_count, getattr(io, 'write_merged_count', 0), io.write_bytes, io.write_time,
+                0, getattr(io, 'busy_time', 0), 0
+            )
+
+        nics = {}
+        for name, io in (psutil.net_io_counters(pernic=True) or {}).items():
+            nics[name] = NetDevStat(
+                io.bytes_recv, io.packets_recv, io.errin, io.dropin,
+                io.bytes_sent, io.packets_sent, io.errout, io.dropout
+            )
+
+        loadavg = psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None
+        return (cpu_total, cpu_percpu, stat, meminfo, MappingProxyType(disks),
+                MappingProxyType(nics), loadavg, _EMPTY)
+
+    def collect(self):
+        """立即采集一份新快照"""
+        with self._lock:
+            parts = self._collect_proc() if self.use_proc else self._collect_psutil()
+            snapshot = ProcSnapshot(time.time(), time.monotonic_ns(), *parts)
+            self.latest = snapshot
+            return snapshot
+
+    def get_snapshot(self, max_age=None):
+        """返回不超过max_age秒的快照，过旧或不存在时重新采集"""
+        snapshot = self.latest
+        if snapshot is not None and max_age is not None and snapshot.age() <= max_age:
+            return snapshot
+        try:
+            return self.collect()
+        except Exception as e:
+            logger.error(f"采集系统快照失败: {e}")
+            if snapshot is None:
+                raise
+            return snapshot
+
+_default_collector = None
+_default_lock = threading.Lock()
+
+def get_default_collector():
+    """获取进程内共享的默认采集器，首次调用时创建（导入模块时不打开文件）"""
+    global _default_collector
+    with _default_lock:
+        if _default_collector is None:
+            _default_collector = ProcSnapshotCollector()
+        return _default_collector
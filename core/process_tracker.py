@@ -0,0 +1,248 @@
+import heapq
+import os
+import threading
+import time
+import psutil
+from collections import namedtuple
+from operator import attrgetter
+from utils.logger import logger
+
+ProcessStat = namedtuple("ProcessStat", [
+    "pid", "name", "state", "ppid", "num_threads",
+    "cpu_percent", "cpu_time", "rss", "memory_percent", "start_time",
+    "io_read_per_sec", "io_write_per_sec"
+])
+
+# 排序方式 -> ProcessStat 字段
+SORT_KEYS = {
+    "cpu": "cpu_percent",
+    "memory": "rss",
+    "rss": "rss",
+    "threads": "num_threads",
+    "io_read": "io_read_per_sec",
+    "io_write": "io_write_per_sec"
+}
+
+# 处于运行或不可中断睡眠（通常在等待磁盘IO）状态的进程，即使CPU时间没有变化也读取IO计数
+_ACTIVE_STATES = ("R", "D", psutil.STATUS_RUNNING, psutil.STATUS_DISK_SLEEP)
+
+class ProcessTracker:
+    """增量进程表
+
+    在两次扫描之间保留每个进程上次的CPU时间和启动时间，CPU%由真实经过时间内的
+    增量计算（首次见到的进程按其生命周期平均值计算，与ps一致）。启动时间变化
+    说明pid被复用，按新进程处理。Linux下每个进程只读一次 /proc/<pid>/stat，
+    其他平台使用 psutil 的 oneshot() 批量读取。top-N 使用 heapq.nlargest，
+    并按 (排序方式, N) 缓存到下一次扫描。
+
+    每进程磁盘IO速率来自 /proc/<pid>/io 的 read_bytes 与 write_bytes（减去
+    cancelled_write_bytes，即写入后被截断而未落盘的部分）。只有自上次扫描以来
+    活跃的进程（新进程、CPU时间有增量或处于R/D状态）才读取IO计数，空闲进程
+    的IO速率记为0并保留上次的计数，下次活跃时按真实经过时间计算平均速率；
+    无权限读取的进程（其他用户的进程）不再重复尝试。
+
+    按需读取时两次扫描至少间隔 min_interval 秒：窗口过短时CPU%只是时钟滴答的
+    量化噪声，而且会覆盖所有使用者共享的上次计数。proc_root 可指向伪造的
+    目录树、clock 可替换为测试时钟。
+    """
+
+    def __init__(self, proc_root="/proc", max_age=5, min_interval=1, clock=time.monotonic_ns):
+        self.proc_root = proc_root
+        self.max_age = max_age
+        self.min_interval = min_interval
+        self.clock = clock
+        self.use_proc = os.path.exists(os.path.join(proc_root, "stat"))
+        self.clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self.mem_total = psutil.virtual_memory().total
+        self._previous = {}
+        self._psutil_procs = {}
+        self._io = {}
+        self._table = []
+        self._top_cache = {}
+        self._updated_ns = None
+        self._lock = threading.Lock()
+
+    def _read_uptime(self):
+        with open(os.path.join(self.proc_root, "uptime"), "rb") as f:
+            return float(f.read().split()[0])
+
+    def _scan_proc(self):
+        """读取 /proc/<pid>/stat，产出 (pid, name, state, ppid, threads, cpu_time, rss, start_time, age)"""
+        uptime = self._read_uptime()
+        for entry in os.scandir(self.proc_root):
+            if not entry.name.isdigit():
+                continue
+            try:
+                fd = os.open(os.path.join(entry.path, "stat"), os.O_RDONLY)
+                try:
+                    data = os.read(fd, 4096)
+                finally:
+                    os.close(fd)
+            except OSError:
+                # 进程在扫描过程中退出
+                continue
+            # 进程名可能包含空格和括号，以最后一个')'为界
+            rparen = data.rfind(b")")
+            name = data[data.find(b"(") + 1:rparen].decode("utf-8", "replace")
+            fields = data[rparen + 2:].split()
+            start_ticks = int(fields[19])
+            start_time = start_ticks / self.clock_ticks
+            yield (
+                int(entry.name), name, fields[0].decode(), int(fields[1]), int(fields[17]),
+                (int(fields[11]) + int(fields[12])) / self.clock_ticks,
+                int(fields[21]) * self.page_size, start_ticks, uptime - start_time
+            )
+
+    def _scan_psutil(self):
+        """非Linux平台：保留Process对象，用oneshot()一次读取所需字段"""
+        now = time.time()
+        previous = self._psutil_procs
+        # 扫描过程中即更新，_read_io 可以复用本次的Process对象
+        procs = self._psutil_procs = {}
+        for pid in psutil.pids():
+            proc = previous.get(pid)
+            if proc is None:
+                try:
+                    proc = psutil.Process(pid)
+                except psutil.Error:
+                    continue
+            procs[pid] = proc
+            try:
+                with proc.oneshot():
+                    cpu_times = proc.cpu_times()
+                    create_time = proc.create_time()
+                    yield (
+                        pid, proc.name(), proc.status(), proc.ppid(), proc.num_threads(),
+                        cpu_times.user + cpu_times.system, proc.memory_info().rss,
+                        create_time, now - create_time
+                    )
+            except psutil.Error:
+                continue
+
+    def _read_io(self, pid):
+        """返回进程累计的 (读取字节, 写入字节)，无权限或不支持时返回None"""
+        if self.use_proc:
+            try:
+                with open(os.path.join(self.proc_root, str(pid), "io"), "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            counters = {}
+            for line in data.split(b"\n"):
+                key, _, value = line.partition(b":")
+                if value:
+                    counters[key] = int(value)
+            write_bytes = counters.get(b"write_bytes", 0) - counters.get(b"cancelled_write_bytes", 0)
+            return counters.get(b"read_bytes", 0), max(write_bytes, 0)
+        proc = self._psutil_procs.get(pid)
+        try:
+            io = proc.io_counters()
+        except (AttributeError, psutil.Error):
+            return None
+        return io.read_bytes, io.write_bytes
+
+    def _io_rates(self, pid, previous_io, active, start_time, age, now_ns):
+        """计算进程IO速率，返回 (读取速率, 写入速率, 本次保存的IO状态)"""
+        if previous_io is not None and previous_io[0] != start_time:
+            # pid被复用
+            previous_io = None
+        if previous_io is not None and (previous_io[1] is None or not active):
+            return 0.0, 0.0, previous_io
+        counters = self._read_io(pid)
+        if counters is None:
+            return 0.0, 0.0, (start_time, None)
+        if previous_io is not None:
+            elapsed = (now_ns - previous_io[2]) / 1e9
+            rates = [max(c - p, 0) / elapsed if elapsed > 0 else 0.0
+                     for c, p in zip(counters, previous_io[1])]
+        else:
+            # 首次读取：按生命周期平均
+            rates = [c / age if age > 0 else 0.0 for c in counters]
+        return rates[0], rates[1], (start_time, counters, now_ns)
+
+    def update(self):
+        """扫描一次进程表并计算每个进程的CPU%和IO速率"""
+        try:
+            now_ns = self.clock()
+            elapsed = (now_ns - self._updated_ns) / 1e9 if self._updated_ns is not None else None
+            scan = self._scan_proc() if self.use_proc else self._scan_psutil()
+            previous = self._previous
+            previous_io = self._io
+            current = {}
+            current_io = {}
+            table = []
+            for pid, name, state, ppid, threads, cpu_time, rss, start_time, age in scan:
+                prev = previous.get(pid)
+                if prev is not None and prev[1] == start_time and elapsed:
+                    cpu_percent = (cpu_time - prev[0]) / elapsed * 100
+                else:
+                    # 新进程或pid被复用：按生命周期平均
+                    cpu_percent = cpu_time / age * 100 if age > 0 else 0.0
+                current[pid] = (cpu_time, start_time)
+                # 只有活跃进程才打开 /proc/<pid>/io
+                active = state in _ACTIVE_STATES or prev is None or prev != current[pid]
+                io_read, io_write, current_io[pid] = self._io_rates(
+                    pid, previous_io.get(pid), active, start_time, age, now_ns
+                )
+                table.append(ProcessStat(
+                    pid, name, state, ppid, threads,
+                    round(max(cpu_percent, 0.0), 2), cpu_time, rss,
+                    round(rss / self.mem_total * 100, 2), start_time,
+                    round(io_read, 1), round(io_write, 1)
+                ))
+            with self._lock:
+                self._previous = current
+                self._io = current_io
+                self._table = table
+                self._top_cache = {}
+                self._updated_ns = now_ns
+            return table
+        except Exception as e:
+            logger.error(f"扫描进程表失败: {e}")
+            return []
+
+    def age(self):
+        """距上次扫描的秒数，未扫描过时返回None"""
+        return (self.clock() - self._updated_ns) / 1e9 if self._updated_ns is not None else None
+
+    def get_table(self, max_age=None):
+        """返回不超过max_age秒的进程表，过旧时重新扫描；max_age不小于min_interval"""
+        if max_age is None:
+            max_age = self.max_age
+        max_age = max(max_age, self.min_interval)
+        age = self.age()
+        if age is None or age > max_age:
+            self.update()
+        return self._table
+
+    def top(self, n=20, sort="cpu", max_age=None):
+        """返回按sort排序的前n个进程（字典列表）"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        table = self.get_table(max_age)
+        key = (sort, n)
+        with self._lock:
+            cached = self._top_cache.get(key)
+            if cached is not None and table is self._table:
+                return cached
+        result = [self._to_dict(proc) for proc in heapq.nlargest(n, table, key=attrgetter(SORT_KEYS[sort]))]
+        with self._lock:
+            if table is self._table:
+                self._top_cache[key] = result
+        return result
+
+    @staticmethod
+    def _to_dict(proc):
+        return {
+            "pid": proc.pid,
+            "name": proc.name,
+            "state": proc.state,
+            "ppid": proc.ppid,
+            "num_threads": proc.num_threads,
+            "cpu_percent": proc.cpu_percent,
+            "memory_percent": proc.memory_percent,
+            "memory_mb": round(proc.rss / (1024 * 1024), 2),
+            "io_read_bytes_per_sec": proc.io_read_per_sec,
+            "io_write_bytes_per_sec": proc.io_write_per_sec
+        }
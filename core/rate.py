@@ -0,0 +1,64 @@
+import threading
+import time
+
+_WRAP_32 = 1 << 32
+_WRAP_64 = 1 << 64
+
+def counter_delta(previous, current):
+    """计算单调计数器增量，处理32/64位回绕和计数器重置"""
+    if current >= previous:
+        return current - previous
+    # 32位计数器回绕（如32位内核上的/proc/diskstats字段）
+    if previous < _WRAP_32:
+        wrapped = current + _WRAP_32 - previous
+        if wrapped < _WRAP_32 // 2:
+            return wrapped
+    else:
+        wrapped = current + _WRAP_64 - previous
+        if wrapped < _WRAP_64 // 2:
+            return wrapped
+    # 计数器被重置（驱动重载、网卡重建等），从0开始计
+    return current
+
+class RateCalculator:
+    """基于单调时钟的按key计数器速率计算器
+
+    每个key（磁盘、网卡等）保存上次的计数器与 time.monotonic_ns() 时间戳，
+    速率按真实经过的时间计算；同一时间戳的重复调用直接返回上次结果。
+    """
+
+    def __init__(self):
+        self._last = {}
+        self._rates = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, counters, now_ns=None):
+        """更新key的计数器并返回每秒速率元组，首次出现时速率为0"""
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        with self._lock:
+            previous = self._last.get(key)
+            if previous is not None:
+                elapsed_ns = now_ns - previous[0]
+                if elapsed_ns <= 0:
+                    return self._rates[key]
+                elapsed = elapsed_ns / 1e9
+                rates = tuple(counter_delta(p, c) / elapsed for p, c in zip(previous[1], counters))
+            else:
+                rates = (0.0,) * len(counters)
+            self._last[key] = (now_ns, tuple(counters))
+            self._rates[key] = rates
+            return rates
+
+    def prune(self, active_keys):
+        """清理已经消失的设备，避免状态无限增长"""
+        with self._lock:
+            for key in list(self._last):
+                if key not in active_keys:
+                    del self._last[key]
+                    self._rates.pop(key, None)
+
+    def reset(self):
+        with self._lock:
+            self._last.clear()
+            self._rates.clear()
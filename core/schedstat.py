@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from datetime import datetime
+from core.rate import RateCalculator
+from utils.procfs import CachedFile
+from utils.logger import logger
+
+def parse_schedstat(data):
+    """解析 /proc/schedstat 的每CPU行
+
+    "cpu0 yld_count 0 sched_count sched_goidle ttwu_count ttwu_local rq_cpu_time run_delay pcount"，
+    返回 {cpu: (运行时间ns, 可运行但等待的时间ns, 时间片数)}，忽略version/timestamp和domain行。
+    """
+    result = {}
+    for line in data.split(b'\n'):
+        fields = line.split()
+        if len(fields) < 10 or not fields[0].startswith(b'cpu'):
+            continue
+        result[int(fields[0][3:])] = (int(fields[7]), int(fields[8]), int(fields[9]))
+    return result
+
+class SchedStatCollector:
+    """调度器运行队列延迟统计
+
+    根据 /proc/schedstat 中每个CPU的 rq_cpu_time、run_delay 和 pcount 的增量，
+    计算每秒运行时间、每秒等待时间（任务已可运行但还在运行队列中排队）、时间片数
+    以及平均每个时间片的等待时间。等待时间是cpu_percent看不到的CPU争用信号：
+    使用率不到100%时任务也可能在排队。task_delays() 读取指定进程的
+    /proc/<pid>/schedstat 计算同样的指标。内核未开启CONFIG_SCHEDSTATS时
+    每CPU数据不可用，进程级数据仍可读取。proc_root 可指向伪造的目录树、clock 可
+    替换为测试时钟。
+    """
+
+    def __init__(self, proc_root="/proc", clock=time.monotonic_ns):
+        self.proc_root = proc_root
+        self.clock = clock
+        self.rates = RateCalculator()
+        self.task_rates = RateCalculator()
+        self._lock = threading.Lock()
+        path = os.path.join(proc_root, "schedstat")
+        self.file = CachedFile(path) if os.path.exists(path) else None
+        if self.file is None:
+            logger.warning("/proc/schedstat不存在（内核未开启CONFIG_SCHEDSTATS），每CPU调度延迟不可用")
+
+    @staticmethod
+    def _summarize(run_rate, delay_rate, slice_rate):
+        """速率（ns/s、次/s）转换为输出字段"""
+        return {
+            "run_ms_per_sec": round(run_rate / 1e6, 2),
+            "wait_ms_per_sec": round(delay_rate / 1e6, 2),
+            "timeslices_per_sec": round(slice_rate, 1),
+            # 平均每次获得CPU之前在运行队列中等待的时间
+            "avg_wait_us": round(delay_rate / slice_rate / 1e3, 2) if slice_rate else 0.0
+        }
+
+    def sample(self):
+        """返回每个CPU及全系统的运行队列等待时间，首次采样速率为0"""
+        try:
+            if self.file is None:
+                return {"timestamp": datetime.now().isoformat(), "available": False, "cpus": []}
+            with self._lock:
+                counters = parse_schedstat(self.file.read())
+                now_ns = self.clock()
+                cpus = []
+                totals = [0.0, 0.0, 0.0]
+                for cpu, values in sorted(counters.items()):
+                    rates = self.rates.update(cpu, values, now_ns)
+                    for i, rate in enumerate(rates):
+                        totals[i] += rate
+                    cpus.append({"cpu": cpu, **self._summarize(*rates)})
+                self.rates.prune(counters)
+            return {
+                "timestamp": datetime.now().isoformat(),
+                "available": True,
+                "cpus": cpus,
+                **self._summarize(*totals)
+            }
+        except Exception as e:
+            logger.error(f"读取调度器统计失败: {e}")
+            return None
+
+    def task_delays(self, processes):
+        """读取进程的 /proc/<pid>/schedstat
+
+        processes 为包含 pid、name 的进程字典列表（如进程跟踪器的top结果），
+        返回按每秒等待时间降序排列的列表；已退出的进程被跳过。
+        """
+        try:
+            result = []
+            with self._lock:
+                now_ns = self.clock()
+                for proc in processes:
+                    pid = proc["pid"]
+                    try:
+                        with open(os.path.join(self.proc_root, str(pid), "schedstat"), "rb") as f:
+                            values = tuple(int(v) for v in f.read().split()[:3])
+                    except (OSError, ValueError):
+                        continue
+                    if len(values) < 3:
+                        continue
+                    result.append({"pid": pid, "name": proc.get("name"),
+                                   **self._summarize(*self.task_rates.update(pid, values, now_ns))})
+                self.task_rates.prune({item["pid"] for item in result})
+            result.sort(key=lambda item: item["wait_ms_per_sec"], reverse=True)
+            return result
+        except Exception as e:
+            logger.error(f"读取进程调度统计失败: {e}")
+            return []
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
@@ -0,0 +1,207 @@
+import math
+import threading
+import time
+from utils.logger import logger
+
+# 各指标族默认采集周期（秒），可通过配置 monitoring.collector_intervals 覆盖
+DEFAULT_PERIODS = {
+    "cpu": 0.25,
+    "memory": 0.25,
+    "disk_io": 1,
+    "network_io": 1,
+    "gpu": 1,
+    "pressure": 1,
+    "processes": 5,
+    "connections": 5,
+    "partitions": 30,
+    "interfaces": 30,
+    "disk_usage": 3600
+}
+
+class CollectionScheduler:
+    """多频率采集调度器
+
+    每个采集任务按自己的周期在绝对截止时间上运行（deadline += period），
+    不会因采集耗时产生漂移；错过的周期直接跳过并计入missed统计。
+
+    任务按 worker 分组，start() 为每组启动一个线程：同组任务串行执行，
+    不同组互不阻塞，慢速任务（进程表、连接、分区扫描等）不会推迟高频的
+    CPU/内存采样。start() 之后才出现的新分组需要重新 start()。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def register(self, name, func, period, run_immediately=True, worker="default"):
+        """注册采集任务，period为秒，worker为执行该任务的线程分组"""
+        if period <= 0:
+            raise ValueError(f"采集周期必须大于0: {name}={period}")
+        now = self.clock()
+        with self._lock:
+            self._jobs[name] = {
+                "func": func,
+                "worker": worker,
+                "period": float(period),
+                "deadline": now if run_immediately else now + period,
+                "runs": 0,
+                "missed": 0,
+                "errors": 0,
+                "last_duration": 0.0,
+                "last_error": None
+            }
+
+    def unregister(self, name):
+        with self._lock:
+            self._jobs.pop(name, None)
+
+    def run_pending(self, worker=None):
+        """执行已到期的任务（worker为None时不区分分组），返回距该组下一个截止时间的秒数"""
+        with self._lock:
+            jobs = [(name, job) for name, job in self._jobs.items() if worker is None or job["worker"] == worker]
+            due = [(name, job) for name, job in jobs if job["deadline"] <= self.clock()]
+
+        for name, job in due:
+            started = self.clock()
+            try:
+                job["func"]()
+            except Exception as e:
+                job["errors"] += 1
+                job["last_error"] = str(e)
+                logger.error(f"采集任务 {name} 执行失败: {e}")
+            finished = self.clock()
+            job["runs"] += 1
+            job["last_duration"] = finished - started
+
+            # 基于绝对截止时间推进，落后时跳过错过的周期；恰好在下一个截止时间完成不算错过
+            deadline = job["deadline"] + job["period"]
+            if deadline < finished:
+                missed = math.ceil((finished - deadline) / job["period"])
+                job["missed"] += missed
+                deadline += missed * job["period"]
+                logger.debug(f"采集任务 {name} 错过 {missed} 个周期")
+            job["deadline"] = deadline
+
+        with self._lock:
+            deadlines = [job["deadline"] for job in self._jobs.values()
+                         if worker is None or job["worker"] == worker]
+            if not deadlines:
+                return None
+            next_deadline = min(deadlines)
+        return max(next_deadline - self.clock(), 0.0)
+
+    def _loop(self, worker):
+        while not self._stop_event.is_set():
+            wait = self.run_pending(worker)
+            self._stop_event.wait(1.0 if wait is None else wait)
+
+    def run(self):
+        """在当前线程中运行所有任务的调度循环，直到stop()被调用"""
+        self._stop_event.clear()
+        self._loop(None)
+
+    def start(self):
+        """为每个任务分组启动一个后台守护线程"""
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        with self._lock:
+            workers = sorted({job["worker"] for job in self._jobs.values()})
+        self._threads = [
+            threading.Thread(target=self._loop, args=(worker,), name=f"collector-{worker}", daemon=True)
+            for worker in workers
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        self._threads = []
+
+    def is_running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def get_stats(self):
+        """返回各任务的运行次数、错过周期数和最近耗时"""
+        with self._lock:
+            return {
+                name: {
+                    "worker": job["worker"],
+                    "period": job["period"],
+                    "runs": job["runs"],
+                    "missed": job["missed"],
+                    "errors": job["errors"],
+                    "last_duration_ms": round(job["last_duration"] * 1000, 3),
+                    "last_error": job["last_error"]
+                }
+                for name, job in self._jobs.items()
+            }
+
+# 计算速率并写入环形历史的任务，需要与发布互斥
+SAMPLING_JOBS = ("cpu", "memory", "disk_io", "network_io", "gpu", "pressure")
+
+# 耗时较长的任务在单独的线程中执行，不推迟高频采样
+SLOW_JOBS = ("processes", "connections", "interfaces", "partitions", "disk_usage")
+
+def register_monitor_jobs(scheduler, monitors, collector, periods=None, lock=None):
+    """把各监控器的采集任务按各自周期注册到调度器
+
+    CPU/内存等高频任务直接写入环形历史并缓存最近一次结果；分区、连接、进程等
+    慢速数据写入监控器的缓存。get_detailed_info 读取这些缓存，发布时不会再次
+    计算速率或写入历史。传入lock时采样任务在锁内执行，与发布互斥。采样任务
+    在 "sampling" 线程中执行，SLOW_JOBS 在 "slow" 线程中执行。
+    """
+    periods = {**DEFAULT_PERIODS, **(periods or {})}
+    # 同一时刻到期的任务共享一份快照
+    max_age = min(periods["cpu"], periods["memory"]) / 2
+
+    def snapshot():
+        return collector.get_snapshot(max_age)
+
+    def locked(func):
+        def run():
+            with lock:
+                return func()
+        return run
+
+    jobs = {
+        "cpu": lambda: monitors['cpu'].get_cpu_info(snapshot()),
+        "memory": lambda: monitors['memory'].get_memory_info(snapshot()),
+        "disk_io": lambda: monitors['disk'].sample_io(snapshot()),
+        "network_io": lambda: monitors['network'].sample_io(snapshot()),
+        "gpu": lambda: monitors['gpu'].get_gpu_info(),
+        "pressure": lambda: monitors['pressure'].refresh_cache("system"),
+        "processes": lambda: monitors['memory'].processes.update(),
+        "connections": lambda: monitors['network'].refresh_cache("connections"),
+        "interfaces": lambda: monitors['network'].refresh_cache("interfaces"),
+        "partitions": lambda: monitors['disk'].refresh_cache("partitions"),
+        "disk_usage": lambda: monitors['disk'].refresh_usage_trees()
+    }
+    for name, func in jobs.items():
+        if lock is not None and name in SAMPLING_JOBS:
+            func = locked(func)
+        scheduler.register(name, func, periods[name], worker="slow" if name in SLOW_JOBS else "sampling")
+
+    # 调度器负责刷新数据，按需读取时的缓存有效期放宽到两个周期
+    monitors['memory'].processes.max_age = periods["processes"] * 2
+    cache_keys = (
+        ('cpu', "cpu_info", "cpu"),
+        ('memory', "memory_info", "memory"),
+        ('memory', "vmstat", "memory"),
+        ('gpu', "gpu_info", "gpu"),
+        ('pressure', "system", "pressure"),
+        ('disk', "io", "disk_io"),
+        ('disk', "partitions", "partitions"),
+        ('network', "io", "network_io"),
+        ('network', "connections", "connections"),
+        ('network', "interfaces", "interfaces")
+    )
+    for monitor_name, key, period in cache_keys:
+        monitors[monitor_name].cache_ttl[key] = periods[period] * 2
+    return periods
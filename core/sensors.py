@@ -0,0 +1,214 @@
+import glob
+import os
+import re
+import threading
+import time
+from utils.procfs import CachedFile
+from utils.logger import logger
+
+# hwmon 芯片名称对应的设备类型
+CHIP_TYPES = {
+    "coretemp": "cpu",
+    "k10temp": "cpu",
+    "zenpower": "cpu",
+    "cpu_thermal": "cpu",
+    "x86_pkg_temp": "cpu",
+    "nvme": "nvme",
+    "drivetemp": "disk",
+    "amdgpu": "gpu",
+    "radeon": "gpu",
+    "nouveau": "gpu",
+    "i915": "gpu",
+    "xe": "gpu"
+}
+
+# 代表整颗CPU温度的标签，按优先级排列（k10temp的Tctl带有偏移，优先使用Tdie）
+PACKAGE_LABELS = ("Package id", "Tdie", "Tctl", "x86_pkg_temp", "cpu_thermal")
+
+def _read_text(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _number(path):
+    """路径末尾名称中的编号，用于按 hwmon2 < hwmon10 排序"""
+    match = re.search(r"\d+", os.path.basename(path))
+    return int(match.group()) if match else 0
+
+def _read_millidegrees(path):
+    value = _read_text(path)
+    try:
+        return int(value) / 1000 if value is not None else None
+    except ValueError:
+        return None
+
+class SensorRegistry:
+    """hwmon/thermal 传感器注册表
+
+    初始化时一次性发现 /sys/class/hwmon 下所有温度和风扇输入，以及未注册为
+    hwmon的 thermal_zone（如 x86_pkg_temp），记录芯片名称、标签、设备类型和
+    crit/max 阈值，并保持各输入文件打开。每次采样按顺序pread所有传感器，
+    max_age 内的重复读取直接返回上次结果，CPU和磁盘监控共享同一次读取。
+    sysfs_root 可指向伪造的目录树用于测试。
+    """
+
+    def __init__(self, sysfs_root="/sys"):
+        self.sysfs_root = sysfs_root
+        self.sensors = self._discover()
+        self._lock = threading.Lock()
+        self._latest = None
+        self._latest_at = 0.0
+
+    def _device_name(self, hwmon, chip):
+        """传感器所属设备的名称：nvme0、sda、card0等"""
+        device = os.path.join(hwmon, "device")
+        if chip == "drivetemp":
+            blocks = glob.glob(os.path.join(device, "block", "*"))
+            if blocks:
+                return os.path.basename(blocks[0])
+        if chip == "nvme":
+            # 旧内核中hwmon挂在PCI设备下，控制器名称位于 device/nvme/
+            controllers = glob.glob(os.path.join(device, "nvme", "nvme*"))
+            if controllers:
+                return os.path.basename(sorted(controllers)[0])
+        if CHIP_TYPES.get(chip) == "gpu":
+            cards = [name for name in glob.glob(os.path.join(device, "drm", "card*"))
+                     if re.fullmatch(r"card\d+", os.path.basename(name))]
+            if cards:
+                return os.path.basename(sorted(cards)[0])
+        if os.path.exists(device):
+            return os.path.basename(os.path.realpath(device))
+        return chip
+
+    def _discover_hwmon(self, chips):
+        sensors = []
+        pattern = os.path.join(self.sysfs_root, "class", "hwmon", "hwmon*")
+        for hwmon in sorted(glob.glob(pattern), key=_number):
+            chip = _read_text(os.path.join(hwmon, "name")) or os.path.basename(hwmon)
+            chips.add(chip)
+            sensor_type = CHIP_TYPES.get(chip, "other")
+            device = self._device_name(hwmon, chip)
+            inputs = glob.glob(os.path.join(hwmon, "temp*_input")) + glob.glob(os.path.join(hwmon, "fan*_input"))
+            for path in sorted(inputs, key=lambda p: (os.path.basename(p)[0], _number(p))):
+                prefix = os.path.basename(path)[:-len("_input")]
+                kind = "temperature" if prefix.startswith("temp") else "fan"
+                base = os.path.join(hwmon, prefix)
+                sensors.append({
+                    "chip": chip,
+                    "type": sensor_type,
+                    "device": device,
+                    "kind": kind,
+                    "label": _read_text(f"{base}_label") or f"{chip} {prefix}",
+                    "max": _read_millidegrees(f"{base}_max") if kind == "temperature" else None,
+                    "crit": _read_millidegrees(f"{base}_crit") if kind == "temperature" else None,
+                    "file": CachedFile(path)
+                })
+        return sensors
+
+    def _discover_thermal(self, chips):
+        """thermal_zone中未以hwmon形式出现的区域"""
+        sensors = []
+        pattern = os.path.join(self.sysfs_root, "class", "thermal", "thermal_zone*")
+        for zone in sorted(glob.glob(pattern), key=_number):
+            zone_type = _read_text(os.path.join(zone, "type")) or os.path.basename(zone)
+            if zone_type in chips or not os.path.exists(os.path.join(zone, "temp")):
+                continue
+            crit = None
+            for trip_type in glob.glob(os.path.join(zone, "trip_point_*_type")):
+                if _read_text(trip_type) == "critical":
+                    crit = _read_millidegrees(trip_type.replace("_type", "_temp"))
+            sensors.append({
+                "chip": zone_type,
+                "type": CHIP_TYPES.get(zone_type, "other"),
+                "device": os.path.basename(zone),
+                "kind": "temperature",
+                "label": zone_type,
+                "max": None,
+                "crit": crit,
+                "file": CachedFile(os.path.join(zone, "temp"))
+            })
+        return sensors
+
+    def _discover(self):
+        try:
+            chips = set()
+            sensors = self._discover_hwmon(chips)
+            sensors.extend(self._discover_thermal(chips))
+            if sensors:
+                logger.info(f"检测到 {len(sensors)} 个温度/风扇传感器")
+            return sensors
+        except Exception as e:
+            logger.error(f"发现传感器失败: {e}")
+            return []
+
+    def sample(self, max_age=None):
+        """读取所有传感器，返回读数列表；max_age秒内重复调用返回上次结果"""
+        with self._lock:
+            now = time.monotonic()
+            if self._latest is not None and max_age is not None and now - self._latest_at <= max_age:
+                return self._latest
+            readings = []
+            for sensor in self.sensors:
+                try:
+                    raw = sensor["file"].read_int()
+                except (OSError, ValueError):
+                    # 设备休眠（如NVMe省电状态）时读取可能失败
+                    continue
+                reading = {key: value for key, value in sensor.items() if key != "file"}
+                reading["value"] = raw / 1000 if sensor["kind"] == "temperature" else raw
+                readings.append(reading)
+            self._latest = readings
+            self._latest_at = now
+            return readings
+
+    def cpu_temperatures(self, max_age=None):
+        """返回 (封装温度, {核心标签: 温度})，多路CPU时封装温度取最高值"""
+        package = {}
+        cores = {}
+        for reading in self.sample(max_age):
+            if reading["type"] != "cpu" or reading["kind"] != "temperature":
+                continue
+            label = reading["label"]
+            for priority, prefix in enumerate(PACKAGE_LABELS):
+                if label.startswith(prefix):
+                    package[priority] = max(package.get(priority, reading["value"]), reading["value"])
+                    break
+            else:
+                cores[label] = reading["value"]
+        if package:
+            return package[min(package)], cores
+        return max(cores.values(), default=None), cores
+
+    def device_temperatures(self, sensor_types, max_age=None):
+        """返回指定类型设备的温度 {设备: 温度}，同一设备有多个传感器时取最高值"""
+        temperatures = {}
+        for reading in self.sample(max_age):
+            if reading["type"] in sensor_types and reading["kind"] == "temperature":
+                device = reading["device"]
+                temperatures[device] = max(temperatures.get(device, reading["value"]), reading["value"])
+        return temperatures
+
+    def fan_speeds(self, max_age=None):
+        """返回 {标签: 转速RPM}"""
+        return {
+            reading["label"]: reading["value"]
+            for reading in self.sample(max_age)
+            if reading["kind"] == "fan"
+        }
+
+    def close(self):
+        for sensor in self.sensors:
+            sensor["file"].close()
+
+_default_sensors = None
+_default_lock = threading.Lock()
+
+def get_default_sensors():
+    """获取进程内共享的传感器注册表，首次调用时扫描（导入模块时不打开文件）"""
+    global _default_sensors
+    with _default_lock:
+        if _default_sensors is None:
+            _default_sensors = SensorRegistry()
+        return _default_sensors
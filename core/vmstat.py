@@ -0,0 +1,61 @@
+from core.rate import RateCalculator
+from utils.logger import logger
+
+# 需要计算速率的 /proc/vmstat 计数器。旧内核按zone拆分（pgscan_kswapd_normal、
+# allocstall_movable），workingset_refault 按anon/file拆分，这些字段求和
+VMSTAT_COUNTERS = (
+    "pgfault", "pgmajfault", "pgpgin", "pgpgout",
+    "pswpin", "pswpout", "pgscan_kswapd", "pgscan_direct",
+    "pgsteal_kswapd", "pgsteal_direct", "allocstall", "workingset_refault",
+    "compact_stall", "thp_fault_alloc", "thp_fault_fallback", "thp_collapse_alloc",
+    "thp_split_page", "oom_kill"
+)
+
+_SPLIT_SUFFIXES = ("dma", "dma32", "normal", "high", "movable", "device", "anon", "file")
+
+class VMStatCollector:
+    """基于 /proc/vmstat 计数器增量的分页与回收速率
+
+    读取共享快照中已解析的 vmstat（整份文件只读一次），计算缺页、主缺页、
+    换入换出、kswapd与直接回收的扫描/回收页数、THP分配和OOM kill的每秒速率，
+    同时保留原始计数器。pgscan/pgsteal 的回收效率（steal/scan）用于判断
+    回收压力。字段映射在首次采样时根据实际存在的字段建立一次。
+    """
+
+    def __init__(self):
+        self.rates = RateCalculator()
+        self._fields = None
+
+    def _build_fields(self, vmstat):
+        """建立 输出名称 -> vmstat字段列表 的映射"""
+        fields = {}
+        for name in VMSTAT_COUNTERS:
+            keys = [key for key in vmstat
+                    if key == name or (key.startswith(name + "_") and key[len(name) + 1:] in _SPLIT_SUFFIXES)]
+            if keys:
+                fields[name] = keys
+        return fields
+
+    def collect(self, snapshot):
+        """根据快照返回分页/回收计数器及每秒速率"""
+        try:
+            vmstat = snapshot.vmstat
+            if not vmstat:
+                return {"counters": {}, "rates": {}}
+            if self._fields is None:
+                self._fields = self._build_fields(vmstat)
+            counters = {name: sum(vmstat.get(key, 0) for key in keys) for name, keys in self._fields.items()}
+            values = self.rates.update("vmstat", tuple(counters.values()), snapshot.monotonic_ns)
+            rates = {name: round(value, 2) for name, value in zip(counters, values)}
+
+            scan_rate = rates.get("pgscan_kswapd", 0) + rates.get("pgscan_direct", 0)
+            steal_rate = rates.get("pgsteal_kswapd", 0) + rates.get("pgsteal_direct", 0)
+            return {
+                "counters": counters,
+                "rates": rates,
+                # 回收效率：低于30%说明扫描了大量页面却难以回收
+                "reclaim_efficiency": round(steal_rate / scan_rate * 100, 1) if scan_rate else None
+            }
+        except Exception as e:
+            logger.error(f"解析vmstat失败: {e}")
+            return None
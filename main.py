@@ -3,99 +3,58 @@
 
 import argparse
 import time
-import threading
 import json
 import os
 from datetime import datetime
 
 # 导入监控模块
-from core.cpu_monitor import CPUMonitor
-from core.memory_monitor import MemoryMonitor
-from core.gpu_monitor import GPUMonitor
-from core.disk_monitor import DiskMonitor
-from core.network_monitor import NetworkMonitor
+from core.collector import get_shared_collector
 from utils.helpers import load_config, save_data, get_system_info
 from utils.logger import logger
 
 class SystemMonitor:
     def __init__(self):
         self.config = load_config()
-        self.monitors = {
-            'cpu': CPUMonitor(),
-            'memory': MemoryMonitor(),
-            'gpu': GPUMonitor(),
-            'disk': DiskMonitor(),
-            'network': NetworkMonitor()
-        }
+        # 进程内共享的采集器，CLI、Web、API都从它读取已发布的数据
+        self.shared = get_shared_collector(self.config)
+        self.collector = self.shared.snapshots
+        self.monitors = self.shared.monitors
+        # 系统信息不会变化，只获取一次
+        self.system_info = get_system_info()
         self.running = False
-        self.monitoring_thread = None
         
     def start_monitoring(self, interval=2):
-        """开始监控"""
+        """开始监控：各指标族按各自周期采集，汇总、告警和保存按interval执行"""
         self.running = True
-        self.monitoring_thread = threading.Thread(target=self._monitoring_loop, args=(interval,))
-        self.monitoring_thread.daemon = True
-        self.monitoring_thread.start()
+        self.shared.scheduler.register('report', self._report, interval)
+        self.shared.start()
         logger.info(f"系统监控已启动，监控间隔: {interval}秒")
     
     def stop_monitoring(self):
         """停止监控"""
         self.running = False
-        if self.monitoring_thread:
-            self.monitoring_thread.join()
+        self.shared.scheduler.unregister('report')
+        self.shared.stop()
         logger.info("系统监控已停止")
     
-    def _monitoring_loop(self, interval):
-        """监控循环"""
-        while self.running:
-            try:
-                # 收集所有监控数据
-                system_data = self.get_system_data()
-                
-                # 检查告警
-                self.check_alerts()
-                
-                # 保存数据
-                self.save_monitoring_data(system_data)
-                
-                time.sleep(interval)
-                
-            except Exception as e:
-                logger.error(f"监控循环出错: {e}")
-                time.sleep(interval)
+    def _report(self):
+        """汇总数据并保存"""
+        system_data = self.get_system_data()
+        self.save_monitoring_data(system_data)
     
-    def get_system_data(self):
-        """获取系统数据"""
+    def get_system_data(self, max_age=None):
+        """获取系统数据（读取共享采集器发布的最新数据，max_age秒内不重新采样）"""
+        published = self.shared.get_system_data(max_age)
         data = {
-            "timestamp": datetime.now().isoformat(),
-            "system_info": get_system_info(),
-            "cpu": self.monitors['cpu'].get_detailed_info(),
-            "memory": self.monitors['memory'].get_detailed_info(),
-            "gpu": self.monitors['gpu'].get_detailed_info(),
-            "disk": self.monitors['disk'].get_detailed_info(),
-            "network": self.monitors['network'].get_detailed_info()
+            "timestamp": published["timestamp"],
+            "system_info": self.system_info
         }
+        data.update((name, published[name]) for name in ('cpu', 'memory', 'gpu', 'disk', 'network'))
         return data
     
     def check_alerts(self):
-        """检查告警"""
-        alerts = self.config.get('alerts', {})
-        
-        # CPU告警
-        if self.monitors['cpu'].check_alerts(alerts.get('cpu_usage_threshold', 90)):
-            logger.warning("CPU使用率告警触发")
-        
-        # 内存告警
-        if self.monitors['memory'].check_alerts(alerts.get('memory_usage_threshold', 85)):
-            logger.warning("内存使用率告警触发")
-        
-        # GPU告警
-        if self.monitors['gpu'].check_alerts(alerts.get('gpu_usage_threshold', 95)):
-            logger.warning("GPU使用率告警触发")
-        
-        # 磁盘告警
-        if self.monitors['disk'].check_alerts(alerts.get('disk_usage_threshold', 90)):
-            logger.warning("磁盘使用率告警触发")
+        """获取当前告警（告警引擎在每次发布数据时评估，状态变化时记录日志）"""
+        return self.shared.alerts.get_alerts()
     
     def save_monitoring_data(self, data):
         """保存监控数据"""
@@ -106,14 +65,15 @@ class SystemMonitor:
         except Exception as e:
             logger.error(f"保存监控数据失败: {e}")
     
-    def get_current_status(self):
+    def get_current_status(self, max_age=None):
         """获取当前状态"""
-        return self.get_system_data()
+        return self.get_system_data(max_age)
     
     def run_cli_mode(self):
         """运行命令行模式"""
         print("=== 系统监控工具 ===")
         print("按 Ctrl+C 停止监控")
+        self.shared.start()
         
         try:
             while True:
@@ -173,6 +133,7 @@ class SystemMonitor:
         """运行API模式"""
         from api.routes import create_api_app
         app = create_api_app(self)
+        self.shared.start()
         
         host = self.config.get('web', {}).get('host', '0.0.0.0')
         port = self.config.get('web', {}).get('port', 5000)
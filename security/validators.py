@@ -20,9 +20,13 @@ class ConfigValidator:
     
     def __init__(self):
         self.allowed_keys = {
-            'monitoring': ['interval', 'history_size', 'log_level'],
+            'monitoring': ['interval', 'history_size', 'log_level', 'collector_intervals', 'pressure_cgroups',
+                           'cgroup_max_depth'],
             'alerts': ['cpu_usage_threshold', 'memory_usage_threshold', 
-                      'gpu_usage_threshold', 'disk_usage_threshold', 'temperature_threshold'],
+                      'gpu_usage_threshold', 'disk_usage_threshold', 'temperature_threshold',
+                      'cpu_temp_threshold', 'gpu_temp_threshold', 'gpu_memory_threshold',
+                      'disk_temp_threshold', 'cpu_power_threshold', 'cpu_pressure_threshold',
+                      'memory_pressure_threshold', 'io_pressure_threshold', 'duration', 'hysteresis', 'rules'],
             'web': ['host', 'port', 'debug'],
             'data': ['save_path', 'export_format'],
             'network': ['speedtest_interval', 'ping_targets']
@@ -31,11 +35,22 @@ class ConfigValidator:
         self.value_ranges = {
             'monitoring.interval': (1, 60),
             'monitoring.history_size': (100, 10000),
+            'monitoring.cgroup_max_depth': (0, 32),
             'alerts.cpu_usage_threshold': (0, 100),
             'alerts.memory_usage_threshold': (0, 100),
             'alerts.gpu_usage_threshold': (0, 100),
             'alerts.disk_usage_threshold': (0, 100),
             'alerts.temperature_threshold': (0, 150),
+            'alerts.cpu_temp_threshold': (0, 150),
+            'alerts.gpu_temp_threshold': (0, 150),
+            'alerts.gpu_memory_threshold': (0, 100),
+            'alerts.disk_temp_threshold': (0, 150),
+            'alerts.cpu_power_threshold': (0, 1000),
+            'alerts.cpu_pressure_threshold': (0, 100),
+            'alerts.memory_pressure_threshold': (0, 100),
+            'alerts.io_pressure_threshold': (0, 100),
+            'alerts.duration': (0, 3600),
+            'alerts.hysteresis': (0, 50),
             'web.port': (1024, 65535),
             'network.speedtest_interval': (60, 3600)
         }
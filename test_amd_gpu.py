@@ -112,6 +112,133 @@ def test_our_monitor():
         print(f"GPU监控模块测试失败: {e}")
         return False
 
+def test_amdgpu_sysfs_fake_tree(tmp_path, write):
+    """用伪造的sysfs目录树测试amdgpu实时采样"""
+    from core.amdgpu import AMDGPUSampler
+    
+    root = str(tmp_path)
+    device = os.path.join(root, "class", "drm", "card1", "device")
+    hwmon = os.path.join(device, "hwmon", "hwmon3")
+    write(os.path.join(device, "vendor"), "0x1002\n")
+    write(os.path.join(device, "uevent"), "DRIVER=amdgpu\nPCI_ID=1002:7550\nPCI_SLOT_NAME=0000:03:00.0\n")
+    write(os.path.join(device, "gpu_busy_percent"), "37\n")
+    write(os.path.join(device, "mem_info_vram_used"), str(4 * 1024 ** 3) + "\n")
+    write(os.path.join(device, "mem_info_vram_total"), str(16 * 1024 ** 3) + "\n")
+    write(os.path.join(hwmon, "temp1_input"), "52000\n")
+    write(os.path.join(hwmon, "temp1_label"), "edge\n")
+    write(os.path.join(hwmon, "temp2_input"), "61000\n")
+    write(os.path.join(hwmon, "temp2_label"), "junction\n")
+    write(os.path.join(hwmon, "power1_input"), "215000000\n")
+    write(os.path.join(hwmon, "fan1_input"), "1450\n")
+    # 显示接口目录和非AMD设备应被跳过
+    write(os.path.join(root, "class", "drm", "card1-DP-1", "status"), "connected\n")
+    write(os.path.join(root, "class", "drm", "card0", "device", "vendor"), "0x8086\n")
+    
+    sampler = AMDGPUSampler(root)
+    assert len(sampler.cards) == 1
+    gpu = sampler.sample()[0]
+    assert gpu["load"] == 0.37
+    assert gpu["memory_used"] == 4096 and gpu["memory_total"] == 16384
+    assert gpu["temperature"] == 52.0 and gpu["temperature_junction"] == 61.0
+    assert gpu["power_watts"] == 215.0 and gpu["fan_rpm"] == 1450
+    assert gpu["gtt_used_mb"] is None
+    
+    # 文件描述符保持打开，内容变化后重新读取即可得到新值
+    write(os.path.join(device, "gpu_busy_percent"), "99\n")
+    assert sampler.sample()[0]["load"] == 0.99
+    sampler.close()
+
+def test_drm_fdinfo_fake_proc(tmp_path, write, clock):
+    """用伪造的/proc目录测试DRM fdinfo每进程GPU使用率"""
+    from core.drm_fdinfo import DRMClientCollector
+    
+    root = str(tmp_path)
+    fdinfo = (
+        "pos:\t0\nflags:\t02100002\n"
+        "drm-driver:\tamdgpu\ndrm-pdev:\t0000:03:00.0\ndrm-client-id:\t{client}\n"
+        "drm-engine-gfx:\t{gfx} ns\ndrm-memory-vram:\t{vram} KiB\n"
+    )
+    
+    def make_client(pid, fd, client, gfx, vram=2048):
+        os.makedirs(os.path.join(root, str(pid), "fd"), exist_ok=True)
+        link = os.path.join(root, str(pid), "fd", fd)
+        if not os.path.islink(link):
+            os.symlink("/dev/dri/renderD128", link)
+        write(os.path.join(root, str(pid), "fdinfo", fd), fdinfo.format(client=client, gfx=gfx, vram=vram))
+        write(os.path.join(root, str(pid), "comm"), f"app{pid}\n")
+    
+    make_client(100, "5", 7, 0)
+    # 同一客户端的dup fd只统计一次
+    make_client(100, "6", 7, 0)
+    make_client(200, "3", 9, 0)
+    os.makedirs(os.path.join(root, "300", "fd"))
+    os.symlink("/dev/null", os.path.join(root, "300", "fd", "0"))
+    
+    collector = DRMClientCollector(root, clock=clock)
+    first = collector.sample()
+    assert {p["pid"] for p in first} == {100, 200}
+    assert all(p["busy_percent"] == 0.0 for p in first)
+    
+    # 经过1秒，gfx引擎忙碌了0.5秒
+    clock.advance(1)
+    make_client(100, "5", 7, 500_000_000)
+    make_client(100, "6", 7, 500_000_000)
+    processes = collector.sample()
+    top = processes[0]
+    assert top["pid"] == 100 and top["clients"] == 1
+    assert top["engines"]["gfx"] == 50.0
+    assert top["vram_mb"] == 2.0
+
+def test_nvml_fake_module():
+    """用伪造的NVML模块测试常驻会话与每次采样"""
+    from types import SimpleNamespace
+    from core.gpu_monitor import GPUMonitor
+    
+    state = {"init": 0, "load": 30}
+    
+    def init():
+        state["init"] += 1
+    
+    def not_supported(*args):
+        raise RuntimeError("NVML_ERROR_NOT_SUPPORTED")
+    
+    fake = SimpleNamespace(
+        NVML_TEMPERATURE_GPU=0, NVML_CLOCK_GRAPHICS=0, NVML_CLOCK_MEM=2,
+        nvmlInit=init,
+        nvmlShutdown=lambda: None,
+        nvmlDeviceGetCount=lambda: 1,
+        nvmlDeviceGetHandleByIndex=lambda index: f"handle{index}",
+        nvmlDeviceGetName=lambda handle: b"NVIDIA GeForce RTX 4090",
+        nvmlDeviceGetUUID=lambda handle: "GPU-1234",
+        nvmlDeviceGetUtilizationRates=lambda handle: SimpleNamespace(gpu=state["load"], memory=10),
+        nvmlDeviceGetMemoryInfo=lambda handle: SimpleNamespace(total=8192 * 1024 * 1024, used=2048 * 1024 * 1024),
+        nvmlDeviceGetTemperature=lambda handle, sensor: 65,
+        nvmlDeviceGetPowerUsage=lambda handle: 215500,
+        nvmlDeviceGetEnforcedPowerLimit=lambda handle: 450000,
+        nvmlDeviceGetClockInfo=lambda handle, clock: 2520 if clock == 0 else 10501,
+        nvmlDeviceGetFanSpeed=not_supported,
+        nvmlDeviceGetComputeRunningProcesses=lambda handle: [SimpleNamespace(pid=os.getpid(), usedGpuMemory=512 * 1024 * 1024)],
+        nvmlDeviceGetGraphicsRunningProcesses=lambda handle: [],
+        nvmlDeviceGetProcessUtilization=lambda handle, last_seen: [SimpleNamespace(pid=os.getpid(), smUtil=42, memUtil=7)]
+    )
+    
+    monitor = GPUMonitor(sysfs_root="/nonexistent", nvml=fake)
+    monitor.drm_clients = None
+    gpu = monitor.get_gpu_info()["gpus"][0]
+    assert gpu["uuid"] == "GPU-1234" and gpu["load_percent"] == 30
+    assert gpu["memory_percent"] == 25 and gpu["temperature"] == 65
+    assert gpu["power_watts"] == 215.5 and gpu["power_limit_watts"] == 450.0
+    assert gpu["fan_percent"] is None and gpu["mclk_mhz"] == 10501
+    
+    # 数据随每次读取更新，且NVML只初始化一次
+    state["load"] = 80
+    assert monitor.get_gpu_info()["gpus"][0]["load_percent"] == 80
+    assert state["init"] == 1
+    
+    processes = monitor._get_gpu_processes()
+    assert processes[0]["pid"] == os.getpid() and processes[0]["vram_mb"] == 512.0
+    assert processes[0]["sm_percent"] == 42 and processes[0]["driver"] == "nvidia"
+
 def main():
     """主测试函数"""
     print("=== AMD GPU 检测测试 ===")
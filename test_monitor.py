@@ -117,6 +117,976 @@ def test_helpers():
     except Exception as e:
         print(f"✗ 工具函数测试失败: {e}")
 
+def test_sensors_fake_sysfs(tmp_path, write):
+    """用伪造的sysfs目录树测试hwmon/thermal传感器注册表"""
+    from core.sensors import SensorRegistry
+    from core.cpu_monitor import CPUMonitor
+    from core.disk_monitor import DiskMonitor
+    
+    root = str(tmp_path)
+    coretemp = os.path.join(root, "class", "hwmon", "hwmon2")
+    write(os.path.join(coretemp, "name"), "coretemp\n")
+    write(os.path.join(coretemp, "temp1_input"), "58000\n")
+    write(os.path.join(coretemp, "temp1_label"), "Package id 0\n")
+    write(os.path.join(coretemp, "temp1_crit"), "100000\n")
+    write(os.path.join(coretemp, "temp2_input"), "55000\n")
+    write(os.path.join(coretemp, "temp2_label"), "Core 0\n")
+    write(os.path.join(coretemp, "temp3_input"), "57000\n")
+    write(os.path.join(coretemp, "temp3_label"), "Core 1\n")
+    nvme = os.path.join(root, "class", "hwmon", "hwmon10")
+    write(os.path.join(nvme, "name"), "nvme\n")
+    write(os.path.join(nvme, "temp1_input"), "41850\n")
+    write(os.path.join(nvme, "temp1_label"), "Composite\n")
+    os.makedirs(os.path.join(root, "devices", "nvme0"))
+    os.symlink(os.path.join(root, "devices", "nvme0"), os.path.join(nvme, "device"))
+    fan = os.path.join(root, "class", "hwmon", "hwmon3")
+    write(os.path.join(fan, "name"), "nct6798\n")
+    write(os.path.join(fan, "fan1_input"), "1200\n")
+    # acpitz已作为hwmon出现，对应的thermal_zone不应重复计入
+    write(os.path.join(root, "class", "hwmon", "hwmon0", "name"), "acpitz\n")
+    write(os.path.join(root, "class", "hwmon", "hwmon0", "temp1_input"), "27800\n")
+    write(os.path.join(root, "class", "thermal", "thermal_zone0", "type"), "acpitz\n")
+    write(os.path.join(root, "class", "thermal", "thermal_zone0", "temp"), "27800\n")
+    
+    sensors = SensorRegistry(root)
+    assert len(sensors.sensors) == 6
+    package, cores = sensors.cpu_temperatures()
+    assert package == 58.0 and cores == {"Core 0": 55.0, "Core 1": 57.0}
+    assert sensors.sensors[1]["crit"] == 100.0
+    assert sensors.device_temperatures(("nvme", "disk")) == {"nvme0": 41.85}
+    assert sensors.fan_speeds() == {"nct6798 fan1": 1200}
+    
+    # max_age内复用上次读数，过期后重新读取
+    write(os.path.join(coretemp, "temp1_input"), "71000\n")
+    assert sensors.cpu_temperatures(max_age=60)[0] == 58.0
+    assert sensors.cpu_temperatures()[0] == 71.0
+    
+    cpu_info = CPUMonitor(sensors=sensors, sensor_max_age=0).get_cpu_info()
+    assert cpu_info["cpu_temperature"] == 71.0 and cpu_info["cpu_temperature_per_core"]["Core 1"] == 57.0
+    assert DiskMonitor(sensors=sensors).get_disk_temperature() == {"nvme0": 41.85}
+    sensors.close()
+
+def test_power_fake_sysfs(tmp_path, write, clock):
+    """用伪造的powercap/hwmon目录树测试RAPL功耗计算"""
+    from core.power import PowerCollector
+    
+    root = str(tmp_path)
+    powercap = os.path.join(root, "class", "powercap")
+    max_range = 262143328850
+    for zone, name, energy in (("intel-rapl:0", "package-0", max_range - 10_000_000),
+                               ("intel-rapl:0:0", "core", 5_000_000),
+                               ("intel-rapl:0:1", "dram", 1_000_000)):
+        write(os.path.join(powercap, zone, "name"), name + "\n")
+        write(os.path.join(powercap, zone, "energy_uj"), f"{energy}\n")
+        write(os.path.join(powercap, zone, "max_energy_range_uj"), f"{max_range}\n")
+    gpu = os.path.join(root, "class", "hwmon", "hwmon4")
+    write(os.path.join(gpu, "name"), "amdgpu\n")
+    write(os.path.join(gpu, "power1_average"), "215000000\n")
+    write(os.path.join(gpu, "power1_label"), "PPT\n")
+    
+    power = PowerCollector(root, clock=clock)
+    first = power.sample()
+    assert [d["name"] for d in first["domains"]] == ["package-0", "package-0/core", "package-0/dram", "amdgpu PPT"]
+    assert first["package_watts"] is None and first["gpu_watts"] == 215.0
+    
+    # 经过1秒，package计数器在max_energy_range_uj处回绕
+    clock.advance(1)
+    write(os.path.join(powercap, "intel-rapl:0", "energy_uj"), "115000000\n")
+    write(os.path.join(powercap, "intel-rapl:0:0", "energy_uj"), "85000000\n")
+    write(os.path.join(powercap, "intel-rapl:0:1", "energy_uj"), "6000000\n")
+    result = power.sample()
+    assert result["package_watts"] == 125.0
+    assert result["totals"]["core"] == 80.0 and result["dram_watts"] == 5.0
+    power.close()
+
+def test_cpu_frequency_fake_sysfs(tmp_path, write):
+    """用伪造的sysfs目录树测试每核频率、节流计数和P/E核分组"""
+    from core.cpu_freq import CPUFrequencyCollector
+    
+    root = str(tmp_path)
+    cpu_root = os.path.join(root, "devices", "system", "cpu")
+    write(os.path.join(cpu_root, "online"), "0-3\n")
+    write(os.path.join(root, "devices", "cpu_core", "cpus"), "0-1\n")
+    write(os.path.join(root, "devices", "cpu_atom", "cpus"), "2-3\n")
+    # cpu0/cpu1是同一个P核的两个超线程，cpu2/cpu3是两个E核
+    for cpu, core_id, freq in ((0, 0, 5300000), (1, 0, 5100000), (2, 8, 3900000), (3, 9, 3700000)):
+        base = os.path.join(cpu_root, f"cpu{cpu}")
+        write(os.path.join(base, "cpufreq", "scaling_cur_freq"), f"{freq}\n")
+        write(os.path.join(base, "topology", "core_id"), f"{core_id}\n")
+        write(os.path.join(base, "topology", "physical_package_id"), "0\n")
+        write(os.path.join(base, "thermal_throttle", "core_throttle_count"), "10\n")
+        write(os.path.join(base, "thermal_throttle", "package_throttle_count"), "3\n")
+    
+    frequency = CPUFrequencyCollector(root)
+    first = frequency.sample([90.0, 70.0, 10.0, 20.0])
+    assert first["hybrid"] and not first["throttling"]
+    p_cores = first["core_types"]["p_core"]
+    e_cores = first["core_types"]["e_core"]
+    assert p_cores["cpus"] == [0, 1] and p_cores["freq_mhz_avg"] == 5200 and p_cores["usage_percent"] == 80.0
+    assert e_cores["freq_mhz_max"] == 3900 and e_cores["usage_percent"] == 15.0
+    
+    # 共享的core/package计数器只计一次
+    for cpu in range(4):
+        if cpu < 2:
+            write(os.path.join(cpu_root, f"cpu{cpu}", "thermal_throttle", "core_throttle_count"), "12\n")
+        write(os.path.join(cpu_root, f"cpu{cpu}", "thermal_throttle", "package_throttle_count"), "4\n")
+    second = frequency.sample()
+    assert second["throttling"]
+    assert second["core_types"]["p_core"]["throttle_events"] == 2
+    assert second["core_types"]["e_core"]["throttle_events"] == 0
+    assert second["package_throttle_events"] == 1
+    frequency.close()
+
+def test_pressure_fake_proc(tmp_path, write, clock):
+    """用伪造的/proc/pressure和cgroup目录测试PSI采集与告警"""
+    from core.alerts import AlertEngine
+    from core.pressure_monitor import PressureMonitor
+    
+    proc = str(tmp_path / "proc")
+    cgroup = str(tmp_path / "cgroup")
+    line = "some avg10={avg:.2f} avg60=0.00 avg300=0.00 total={some}\nfull avg10=0.00 avg60=0.00 avg300=0.00 total={full}\n"
+    for resource in ("cpu", "memory", "io"):
+        write(os.path.join(proc, "pressure", resource), line.format(avg=0, some=1000, full=0))
+    write(os.path.join(cgroup, "system.slice", "cgroup.procs"), "")
+    write(os.path.join(cgroup, "system.slice", "memory.pressure"), line.format(avg=0, some=500, full=0))
+    
+    pressure = PressureMonitor(proc, cgroup, clock=clock)
+    first = pressure.get_pressure_info()
+    assert first["available"] and first["system"]["memory"]["some"]["stall_percent"] is None
+    assert list(first["cgroups"]) == ["system.slice"]
+    
+    # 经过1秒，内存some停顿了0.25秒；全系统数据由调度任务刷新，读取只计算cgroup
+    clock.advance(1)
+    write(os.path.join(proc, "pressure", "memory"), line.format(avg=25.5, some=251000, full=100000))
+    write(os.path.join(cgroup, "system.slice", "memory.pressure"), line.format(avg=0, some=100500, full=0))
+    pressure.refresh_cache("system")
+    info = pressure.get_pressure_info()
+    memory = info["system"]["memory"]
+    assert memory["some"]["stall_percent"] == 25.0 and memory["some"]["avg10"] == 25.5
+    assert memory["full"]["stall_percent"] == 10.0
+    assert info["cgroups"]["system.slice"]["memory"]["some"]["stall_percent"] == 10.0
+    # 再次读取不推进全系统计数器
+    assert pressure.get_pressure_info()["system"] is info["system"]
+    assert len(pressure.history) == 2
+    
+    # 告警：内存some超过20%持续30秒才触发
+    engine = AlertEngine({"alerts": {"memory_pressure_threshold": 20, "rules": {"memory_pressure": {"duration": 30}}}},
+                         {"pressure": pressure})
+    assert engine.evaluate() == []
+    start = pressure.history.since(-1)[0][-1]
+    for seconds in (10, 31):
+        pressure.history.append({"memory_some": 30.0}, monotonic_ns=start + seconds * 1_000_000_000)
+    alerts = engine.evaluate()
+    assert [alert["type"] for alert in alerts] == ["memory_pressure"]
+
+def test_vmstat_rates():
+    """测试vmstat分页/回收速率（含旧内核按zone拆分的字段）"""
+    from types import SimpleNamespace
+    from core.vmstat import VMStatCollector
+    
+    first = {"pgfault": 1000, "pgmajfault": 10, "pgscan_kswapd_normal": 100, "pgscan_kswapd_movable": 50,
+             "pgscan_direct": 0, "pgscan_direct_throttle": 7, "pgsteal_direct": 0, "oom_kill": 0}
+    second = {**first, "pgfault": 3000, "pgmajfault": 60, "pgscan_kswapd_normal": 300, "pgscan_direct": 400,
+              "pgsteal_direct": 100, "pgscan_direct_throttle": 9, "oom_kill": 1}
+    collector = VMStatCollector()
+    collector.collect(SimpleNamespace(vmstat=first, monotonic_ns=0))
+    result = collector.collect(SimpleNamespace(vmstat=second, monotonic_ns=2_000_000_000))
+    rates = result["rates"]
+    assert rates["pgfault"] == 1000 and rates["pgmajfault"] == 25
+    assert result["counters"]["pgscan_kswapd"] == 350 and rates["pgscan_kswapd"] == 100
+    assert rates["pgscan_direct"] == 200 and rates["oom_kill"] == 0.5
+    assert result["reclaim_efficiency"] == 16.7
+
+def test_numa_fake_sysfs(tmp_path, write, clock):
+    """用伪造的双节点sysfs目录树测试NUMA拓扑统计"""
+    from core.numa import NUMATopology
+    
+    root = str(tmp_path)
+    write(os.path.join(root, "devices", "system", "cpu", "online"), "0-3\n")
+    numastat = "numa_hit {hit}\nnuma_miss {miss}\nnuma_foreign 0\ninterleave_hit 0\nlocal_node {hit}\nother_node {miss}\n"
+    for node, cpus, free in ((0, "0-1", 1024), (1, "2-3", 6 * 1024 * 1024)):
+        base = os.path.join(root, "devices", "system", "node", f"node{node}")
+        write(os.path.join(base, "cpulist"), cpus + "\n")
+        write(os.path.join(base, "meminfo"),
+              f"Node {node} MemTotal:        8388608 kB\nNode {node} MemFree:         {free} kB\n"
+              f"Node {node} FilePages:       1048576 kB\nNode {node} HugePages_Total:     0\n")
+        write(os.path.join(base, "numastat"), numastat.format(hit=1000, miss=0))
+    
+    topology = NUMATopology(root, clock=clock)
+    first = topology.memory()
+    assert [node["node"] for node in first] == [0, 1]
+    assert first[0]["free"] == 1024 * 1024 and first[0]["percent"] == 100.0
+    assert first[1]["file_pages"] == 1024 ** 3 and first[1]["used"] == 2 * 1024 ** 3
+    
+    # 经过2秒，节点0新增100次numa_miss
+    clock.advance(2)
+    write(os.path.join(root, "devices", "system", "node", "node0", "numastat"), numastat.format(hit=1900, miss=100))
+    node0 = topology.memory()[0]
+    assert node0["numa_miss_per_sec"] == 50.0 and node0["remote_percent"] == 10.0
+    
+    usage = topology.cpu_usage([90.0, 70.0, 10.0, 0.0])
+    assert [node["usage_percent"] for node in usage] == [80.0, 5.0]
+    topology.close()
+
+def test_interrupts_fake_proc(tmp_path, write, clock):
+    """用伪造的/proc/interrupts与/proc/softirqs测试中断分布和不均衡检测"""
+    from core.interrupts import InterruptCollector
+    
+    root = str(tmp_path)
+    
+    def write_counts(step):
+        lines = ["           CPU0       CPU1       CPU2       CPU3"]
+        lines.append(f"  0:         {step}          0          0          0   IO-APIC   2-edge      timer")
+        # 网卡的4个队列中断全部落在CPU0上
+        for queue in range(4):
+            lines.append(f" {30 + queue}:  {step * 100}  0  0  0   PCI-MSI 524288-edge      eth0-TxRx-{queue}")
+        lines.append(f"LOC:  {step * 50}  {step * 50}  {step * 50}  {step * 50}   Local timer interrupts")
+        lines.append("ERR:          0")
+        write(os.path.join(root, "interrupts"), "\n".join(lines) + "\n")
+        write(os.path.join(root, "softirqs"),
+              "                    CPU0       CPU1       CPU2       CPU3\n"
+              f"      TIMER:  {step * 10}  {step * 10}  {step * 10}  {step * 10}\n"
+              f"     NET_RX:  {step * 300}  {step}  {step}  {step}\n")
+    
+    write_counts(1)
+    collector = InterruptCollector(root, clock=clock)
+    first = collector.collect()
+    assert "interrupts" not in first and first["imbalances"] == []
+    
+    # 经过1秒，速率等于计数增量
+    clock.advance(1)
+    write_counts(2)
+    result = collector.collect()
+    interrupts = result["interrupts"]
+    assert interrupts["cpus"] == [0, 1, 2, 3] and len(interrupts["top"]) == 6
+    assert interrupts["per_cpu_per_sec"] == [451.0, 50.0, 50.0, 50.0]
+    assert interrupts["top"][0]["irq"] == "LOC" and interrupts["top"][1]["description"].endswith("eth0-TxRx-0")
+    assert result["softirqs"]["types"] == {"TIMER": 40.0, "NET_RX": 303.0}
+    
+    imbalances = {(item["source"], item["name"]): item for item in result["imbalances"]}
+    assert imbalances[("interrupts", "eth0-TxRx")]["cpu"] == 0
+    assert imbalances[("interrupts", "eth0-TxRx")]["queues"] == 4
+    assert imbalances[("softirqs", "NET_RX")]["share_percent"] > 95
+    assert ("softirqs", "TIMER") not in imbalances
+    collector.close()
+
+def test_schedstat_fake_proc(tmp_path, write, clock):
+    """用伪造的/proc/schedstat和进程schedstat测试运行队列等待时间"""
+    from core.schedstat import SchedStatCollector
+    
+    root = str(tmp_path)
+    
+    def write_counts(step):
+        # cpu1 每个时间片在运行队列中等待 50us，cpu0 不等待
+        write(os.path.join(root, "schedstat"),
+              "version 15\ntimestamp 4295\n"
+              f"cpu0 0 0 0 0 0 0 {step * 10 ** 9} 0 {step * 1000}\n"
+              "domain0 00000003 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0\n"
+              f"cpu1 0 0 0 0 0 0 {step * 10 ** 9} {step * 10 ** 8} {step * 2000}\n")
+        write(os.path.join(root, "42", "schedstat"), f"{step * 10 ** 9} {step * 10 ** 7} {step * 100}\n")
+        write(os.path.join(root, "43", "schedstat"), f"{step * 10 ** 9} 0 {step * 100}\n")
+    
+    write_counts(1)
+    collector = SchedStatCollector(root, clock=clock)
+    processes = [{"pid": 43, "name": "idle"}, {"pid": 42, "name": "busy"}, {"pid": 99, "name": "gone"}]
+    first = collector.sample()
+    assert first["available"] and [cpu["cpu"] for cpu in first["cpus"]] == [0, 1]
+    assert first["cpus"][1]["wait_ms_per_sec"] == 0
+    collector.task_delays(processes)
+    
+    # 经过1秒
+    clock.advance(1)
+    write_counts(2)
+    result = collector.sample()
+    cpu0, cpu1 = result["cpus"]
+    assert cpu0["avg_wait_us"] == 0 and cpu1["avg_wait_us"] == 50.0
+    assert cpu1["wait_ms_per_sec"] == 100.0 and cpu1["run_ms_per_sec"] == 1000.0
+    assert cpu1["timeslices_per_sec"] == 2000.0 and result["wait_ms_per_sec"] == 100.0
+    assert result["avg_wait_us"] == round(10 ** 8 / 3000 / 1e3, 2)
+    
+    tasks = collector.task_delays(processes)
+    assert [task["pid"] for task in tasks] == [42, 43]
+    assert tasks[0]["name"] == "busy" and tasks[0]["avg_wait_us"] == 100.0
+    assert tasks[0]["wait_ms_per_sec"] == 10.0 and tasks[1]["wait_ms_per_sec"] == 0
+    collector.close()
+
+def test_cgroups_fake_root(tmp_path, write, clock):
+    """用伪造的cgroup v2目录树测试cgroup资源树、速率和汇总"""
+    from core.cgroup_monitor import CgroupMonitor
+    
+    root = str(tmp_path)
+    write(os.path.join(root, "cgroup.controllers"), "cpu io memory pids\n")
+    
+    def write_group(path, usage, memory, pids, wbytes=0):
+        directory = os.path.join(root, path)
+        write(os.path.join(directory, "cpu.stat"),
+              f"usage_usec {usage}\nuser_usec {usage}\nsystem_usec 0\nnr_throttled 0\nthrottled_usec 0\n")
+        write(os.path.join(directory, "io.stat"), f"8:0 rbytes=0 wbytes={wbytes} rios=0 wios={wbytes // 4096}\n")
+        if path:
+            write(os.path.join(directory, "memory.current"), f"{memory}\n")
+            write(os.path.join(directory, "memory.stat"), f"anon {memory // 2}\nfile {memory // 2}\npgmajfault 0\n")
+            write(os.path.join(directory, "pids.current"), f"{pids}\n")
+    
+    write_group("", 0, 0, 0)
+    write_group("system.slice", 0, 3 * 2 ** 20, 30)
+    write_group("system.slice/nginx.service", 0, 2 * 2 ** 20, 20)
+    write_group("user.slice", 0, 2 ** 20, 5)
+    
+    monitor = CgroupMonitor(root, rescan_interval=3600, clock=clock)
+    first = monitor.sample()
+    assert first["count"] == 4
+    system = first["root"]["children"][0]
+    assert system["path"] == "system.slice" and system["children"][0]["name"] == "nginx.service"
+    files = monitor._groups["system.slice/nginx.service"]["files"]
+    
+    # 经过1秒：nginx 0.5个CPU、每秒写入1MB
+    clock.advance(1)
+    write_group("", 800000, 0, 0, 2 ** 20)
+    write_group("system.slice", 600000, 3 * 2 ** 20, 30, 2 ** 20)
+    write_group("system.slice/nginx.service", 500000, 2 * 2 ** 20, 20, 2 ** 20)
+    write_group("user.slice", 200000, 2 ** 20, 5)
+    result = monitor.sample()
+    tree = result["root"]
+    nginx = tree["children"][0]["children"][0]
+    assert nginx["cpu_percent"] == 50.0 and nginx["io_write_ops_per_sec"] == 256.0
+    assert nginx["memory_anon"] == 2 ** 20 and nginx["pids_current"] == 20
+    # 根cgroup没有memory.current和pids.current，由子cgroup汇总
+    assert tree["memory_current"] == 4 * 2 ** 20 and tree["pids_current"] == 35
+    assert tree["cpu_percent"] == 80.0
+    
+    # 增量扫描：已知cgroup复用文件句柄，删除的cgroup被移除
+    import shutil
+    shutil.rmtree(os.path.join(root, "user.slice"))
+    write_group("system.slice/db.service", 0, 2 ** 20, 3)
+    monitor.rescan_interval = 0
+    result = monitor.sample()
+    assert result["count"] == 4
+    assert [child["name"] for child in result["root"]["children"][0]["children"]] == ["db.service", "nginx.service"]
+    assert monitor._groups["system.slice/nginx.service"]["files"] is files
+    monitor.close()
+
+def test_cgroups_open_file_cap(tmp_path, clock):
+    """cgroup数量超过句柄上限时，超出部分每次打开读取后关闭"""
+    from core.cgroup_monitor import CgroupMonitor
+    
+    (tmp_path / "cgroup.controllers").write_text("cpu pids\n")
+    names = [f"app{i}.service" for i in range(5)]
+    
+    def write_groups(usage):
+        for name in [""] + names:
+            directory = tmp_path / name
+            directory.mkdir(exist_ok=True)
+            (directory / "cpu.stat").write_text(f"usage_usec {usage}\nnr_throttled 0\nthrottled_usec 0\n")
+            if name:
+                (directory / "pids.current").write_text("1\n")
+    
+    def open_files():
+        count = 0
+        for fd in os.listdir("/proc/self/fd"):
+            try:
+                count += os.readlink(f"/proc/self/fd/{fd}").startswith(str(tmp_path))
+            except OSError:
+                continue
+        return count
+    
+    write_groups(0)
+    monitor = CgroupMonitor(str(tmp_path), rescan_interval=3600, max_open_files=3, clock=clock)
+    assert monitor.sample()["count"] == 6
+    assert open_files() == 3
+    
+    clock.advance(1)
+    write_groups(250000)
+    tree = monitor.sample()["root"]
+    assert open_files() == 3
+    assert [child["cpu_percent"] for child in tree["children"]] == [25.0] * 5
+    assert tree["pids_current"] == 5
+    monitor.close()
+    assert open_files() == 0
+
+def test_process_io_fake_proc(tmp_path, write, clock):
+    """用伪造的/proc测试进程IO速率，空闲进程不读取/proc/<pid>/io"""
+    from core.process_tracker import ProcessTracker
+    
+    root = str(tmp_path)
+    write(os.path.join(root, "stat"), "cpu  0 0 0 0 0 0 0 0\n")
+    write(os.path.join(root, "uptime"), "1000.00 4000.00\n")
+    
+    def write_process(pid, name, state, utime, read_bytes, write_bytes, cancelled=0):
+        fields = [state, "1", pid, pid, "0", "-1", "0", "0", "0", "0", "0",
+                  str(utime), "0", "0", "0", "20", "0", "1", "0", "100", "0", "256"]
+        write(os.path.join(root, pid, "stat"), f"{pid} ({name}) " + " ".join(fields) + "\n")
+        write(os.path.join(root, pid, "io"),
+              f"rchar: 0\nwchar: 0\nsyscr: 0\nsyscw: 0\nread_bytes: {read_bytes}\n"
+              f"write_bytes: {write_bytes}\ncancelled_write_bytes: {cancelled}\n")
+    
+    write_process("100", "writer", "S", 100, 0, 0)
+    write_process("200", "idle", "S", 100, 0, 0)
+    write_process("300", "reader", "D", 100, 0, 0)
+    tracker = ProcessTracker(root, clock=clock)
+    tracker.update()
+    
+    # 经过1秒；idle进程CPU时间不变，即使IO计数变化也不会被读取
+    clock.advance(1)
+    write_process("100", "writer", "S", 150, 0, 8 * 2 ** 20, 2 ** 20)
+    write_process("200", "idle", "S", 100, 0, 2 ** 30)
+    write_process("300", "reader", "D", 100, 4 * 2 ** 20, 0)
+    tracker.update()
+    
+    top = tracker.top(3, "io_write")
+    assert top[0]["pid"] == 100 and top[0]["io_write_bytes_per_sec"] == 7 * 2 ** 20
+    rates = {proc["pid"]: proc for proc in top}
+    assert rates[200]["io_write_bytes_per_sec"] == 0
+    assert tracker.top(1, "io_read")[0]["pid"] == 300
+
+def test_process_cpu_percent_and_pid_reuse(tmp_path, write, clock):
+    """进程CPU%按真实经过时间的增量计算，pid被复用时按新进程处理"""
+    import shutil
+    import pytest
+    from core.process_tracker import ProcessTracker
+    
+    root = str(tmp_path)
+    write(os.path.join(root, "stat"), "cpu  0 0 0 0 0 0 0 0\n")
+    tracker = ProcessTracker(root, clock=clock)
+    ticks = tracker.clock_ticks
+    
+    def write_process(pid, name, cpu_seconds, start_seconds, read_bytes=0):
+        fields = ["S", "1", pid, pid, "0", "-1", "0", "0", "0", "0", "0",
+                  str(int(cpu_seconds * ticks)), "0", "0", "0", "20", "0", "1", "0", str(start_seconds * ticks), "0", "256"]
+        write(os.path.join(root, pid, "stat"), f"{pid} ({name}) " + " ".join(fields) + "\n")
+        write(os.path.join(root, pid, "io"), f"read_bytes: {read_bytes}\nwrite_bytes: 0\ncancelled_write_bytes: 0\n")
+    
+    # 开机1000秒，进程在第200秒启动：首次按生命周期平均
+    write(os.path.join(root, "uptime"), "1000.00 4000.00\n")
+    write_process("100", "worker", 400, 200)
+    write_process("200", "old", 80, 200, read_bytes=800 * 2 ** 20)
+    write_process("300", "exiting", 0, 200)
+    tracker.update()
+    stats = {proc["pid"]: proc for proc in tracker.top(10, "cpu")}
+    assert stats[100]["cpu_percent"] == 50.0 and stats[200]["cpu_percent"] == 10.0
+    assert stats[200]["io_read_bytes_per_sec"] == 2 ** 20
+    
+    # 经过2秒：worker用了1.5秒CPU；pid 200被第995秒启动的新进程复用；300退出
+    clock.advance(2)
+    write(os.path.join(root, "uptime"), "1002.00 4008.00\n")
+    write_process("100", "worker", 401.5, 200)
+    write_process("200", "new", 3.5, 995, read_bytes=7 * 2 ** 20)
+    shutil.rmtree(os.path.join(root, "300"))
+    tracker.update()
+    stats = {proc["pid"]: proc for proc in tracker.top(10, "cpu")}
+    assert sorted(stats) == [100, 200]
+    assert stats[100]["cpu_percent"] == 75.0
+    # 新进程不与旧进程的计数求差，按自己的生命周期（7秒）平均
+    assert stats[200]["name"] == "new" and stats[200]["cpu_percent"] == 50.0
+    assert stats[200]["io_read_bytes_per_sec"] == 2 ** 20
+    assert tracker.top(1, "cpu")[0]["pid"] == 100
+    
+    # 缓存的进程表在max_age内复用，过期后重新扫描
+    table = tracker.get_table()
+    assert tracker.age() == 0 and tracker.get_table(max_age=1) is table
+    clock.advance(6)
+    assert tracker.get_table() is not table and tracker.age() == 0
+    
+    # max_age=0 也不会在 min_interval 内重新扫描，避免几毫秒窗口的CPU%覆盖共享状态
+    table = tracker.get_table()
+    clock.advance(0.01)
+    assert tracker.get_table(max_age=0) is table and tracker.top(10, "cpu", max_age=0) == tracker.top(10, "cpu")
+    clock.advance(tracker.min_interval)
+    assert tracker.get_table(max_age=0) is not table
+    with pytest.raises(ValueError):
+        tracker.top(5, "unknown")
+
+def test_connection_table_fake_proc(tmp_path, write):
+    """解析伪造的/proc/net/{tcp,tcp6,udp}，按状态、远端IP和本地端口聚合"""
+    from core.net_connections import ConnectionTable
+    
+    root = str(tmp_path)
+    header = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+    
+    def table(*rows):
+        lines = [f"{i:4}: {local} {remote} {state} 00000000:00000000 00:00000000 00000000  1000        0 {inode} 1"
+                 for i, (local, remote, state, inode) in enumerate(rows)]
+        return header + "\n".join(lines) + "\n"
+    
+    # 地址按32位字的主机字节序：0100000A = 10.0.0.1，1401A8C0 = 192.168.1.20，0500000A = 10.0.0.5
+    write(os.path.join(root, "net", "tcp"), table(
+        ("00000000:0016", "00000000:0000", "0A", 100),
+        ("0100000A:0016", "1401A8C0:C350", "01", 101),
+        ("0100000A:0016", "1401A8C0:C351", "01", 102),
+        ("0100000A:01BB", "0500000A:9C40", "06", 0)
+    ) + "   4: truncated\n")
+    v6_any = "0" * 32
+    write(os.path.join(root, "net", "tcp6"), table(
+        (f"{v6_any}:0050", f"{v6_any}:0000", "0A", 103),
+        # IPv4映射地址 ::ffff:10.0.0.1 <- ::ffff:10.0.0.5 按IPv4统计
+        ("0000000000000000FFFF00000100000A:0050", "0000000000000000FFFF00000500000A:A028", "01", 104),
+        # 2001:db8::2 <- 2001:db8::1
+        ("B80D0120000000000000000002000000:0050", "B80D0120000000000000000001000000:A410", "01", 105)
+    ))
+    write(os.path.join(root, "net", "udp"), table(
+        ("00000000:0035", "00000000:0000", "07", 106),
+        ("0100000A:1388", "0500000A:0035", "01", 107)
+    ))
+    # 没有udp6（未启用IPv6等情况）时跳过
+    
+    connections = ConnectionTable(root)
+    assert connections.use_proc
+    summary = connections.collect()
+    assert summary["total"] == 9 and summary["established"] == 4
+    assert summary["tcp_states"] == {"LISTEN": 2, "ESTABLISHED": 4, "TIME_WAIT": 1}
+    assert summary["udp_states"] == {"UNCONNECTED": 1, "ESTABLISHED": 1}
+    assert summary["top_remote"] == [
+        {"address": "10.0.0.5", "connections": 3},
+        {"address": "192.168.1.20", "connections": 2},
+        {"address": "2001:db8::1", "connections": 1}
+    ]
+    assert summary["top_local_ports"][:2] == [
+        {"protocol": "tcp", "port": 22, "connections": 2},
+        {"protocol": "tcp", "port": 80, "connections": 2}
+    ]
+    assert summary["listen_ports"] == [
+        {"protocol": "tcp", "port": 22}, {"protocol": "tcp", "port": 80}, {"protocol": "udp", "port": 53}
+    ]
+    assert "top_processes" not in summary and connections.collect(top=1)["top_remote"][0]["address"] == "10.0.0.5"
+    
+    # 按socket inode对应到进程，监听socket不计入
+    for pid, fd, inode in (("1000", "3", 101), ("1000", "4", 102), ("2000", "5", 105), ("2000", "6", 100)):
+        os.makedirs(os.path.join(root, pid, "fd"), exist_ok=True)
+        os.symlink(f"socket:[{inode}]", os.path.join(root, pid, "fd", fd))
+    os.symlink("/dev/null", os.path.join(root, "2000", "fd", "0"))
+    owners = connections.collect(resolve_pids=True)["top_processes"]
+    assert [(owner["pid"], owner["connections"]) for owner in owners] == [(1000, 2), (2000, 1)]
+
+def test_history_rejects_out_of_order():
+    """环形历史按单调时钟丢弃不晚于最新记录的样本，since() 的二分查找保持有效"""
+    from core.history import RingHistory
+    
+    history = RingHistory(("value",), 4)
+    assert history.append({"value": 1}, 1000, 100)
+    assert history.append({"value": 2}, 2000, 200)
+    # 重复发布同一快照、并发写入的旧样本都被丢弃
+    assert not history.append({"value": 3}, 3000, 200)
+    assert not history.append({"value": 4}, 4000, 150)
+    # NTP把墙上时间向后调整时样本照常写入，墙上时间只用于显示
+    assert history.append({"value": 5}, 500, 300)
+    assert len(history) == 3
+    monotonic, timestamps, columns = history.since(100)
+    assert list(monotonic) == [200, 300] and list(timestamps) == [2000, 500]
+    assert list(columns["value"]) == [2.0, 5.0]
+
+def test_history_ring_wraparound():
+    """环形历史回绕后窗口仍是连续的零拷贝视图，since() 只返回更新的记录"""
+    from core.history import RingHistory
+    
+    history = RingHistory(("value", "other"), 4)
+    assert not history and history.last() is None
+    for i in range(1, 7):
+        history.append({"value": i * 10, "other": "n/a" if i == 6 else i}, i * 100, i)
+    assert len(history) == 4
+    
+    # 写入了6条，只保留最近4条，按时间顺序排列
+    timestamps, columns = history.window()
+    assert list(timestamps) == [300, 400, 500, 600]
+    assert list(columns["value"]) == [30.0, 40.0, 50.0, 60.0]
+    # 镜像写入使跨越回绕点的窗口也是底层数组上的连续切片
+    assert timestamps.obj is history._timestamps and columns["value"].obj is history._data["value"]
+    assert list(history.column("value", 2)) == [50.0, 60.0]
+    assert list(history.column("value", 10)) == [30.0, 40.0, 50.0, 60.0]
+    assert list(history.window(0)[0]) == []
+    
+    monotonic, timestamps, columns = history.since(4)
+    assert list(monotonic) == [5, 6] and list(timestamps) == [500, 600] and list(columns["value"]) == [50.0, 60.0]
+    assert list(history.since(6)[0]) == [] and list(history.since(0)[1]) == [300, 400, 500, 600]
+    
+    # 无法转换的值记为NaN，输出记录中为None
+    records = history.to_records(2)
+    assert [record["value"] for record in records] == [50.0, 60.0]
+    assert records[0]["other"] == 5.0 and records[1]["other"] is None
+    assert history.last()["value"] == 60.0
+    
+    # 继续写满一整圈
+    for i in range(7, 11):
+        history.append({"value": i * 10}, i * 100, i)
+    assert list(history.window()[0]) == [700, 800, 900, 1000]
+    history.clear()
+    assert len(history) == 0 and history.append({"value": 1}, 1)
+
+def test_scheduler_absolute_deadlines():
+    """调度器按绝对截止时间推进，采集耗时不产生漂移，错过的周期跳过并计数"""
+    import pytest
+    from core.scheduler import CollectionScheduler
+    
+    now = {"t": 0.0, "duration": 0.25}
+    
+    def fast():
+        now["t"] += now["duration"]
+    
+    def broken():
+        raise RuntimeError("读取失败")
+    
+    scheduler = CollectionScheduler(clock=lambda: now["t"])
+    scheduler.register("fast", fast, 1)
+    scheduler.register("slow", lambda: None, 4, run_immediately=False)
+    with pytest.raises(ValueError):
+        scheduler.register("bad", fast, 0)
+    
+    # 耗时0.25秒，下一个截止时间仍是1.0而不是1.25
+    assert scheduler.run_pending() == 0.75
+    now["t"] = 1.0
+    assert scheduler.run_pending() == 0.75
+    assert scheduler.get_stats()["fast"]["runs"] == 2 and scheduler.get_stats()["slow"]["runs"] == 0
+    
+    # 一次采集耗时2.5秒：截止时间3.0、4.0都已错过，跳到5.0
+    now["t"] = 2.0
+    now["duration"] = 2.5
+    assert scheduler.run_pending() == 0.0
+    stats = scheduler.get_stats()["fast"]
+    assert stats["runs"] == 3 and stats["missed"] == 2 and stats["last_duration_ms"] == 2500.0
+    
+    # 慢任务在4.0到期，快任务在5.0之前不再运行
+    assert scheduler.run_pending() == 0.5
+    assert scheduler.get_stats()["slow"]["runs"] == 1 and scheduler.get_stats()["fast"]["runs"] == 3
+    now["t"] = 5.0
+    now["duration"] = 0.0
+    assert scheduler.run_pending() == 1.0
+    assert scheduler.get_stats()["fast"]["missed"] == 2
+    # 恰好在下一个截止时间完成不算错过，立即再次运行
+    now["t"] = 6.0
+    now["duration"] = 1.0
+    assert scheduler.run_pending() == 0.0
+    assert scheduler.get_stats()["fast"]["missed"] == 2
+    now["duration"] = 0.0
+    
+    # 按分组执行时只运行该组的任务
+    scheduler.register("other", fast, 1, worker="slow")
+    scheduler.run_pending("default")
+    assert scheduler.get_stats()["other"]["runs"] == 0
+    assert scheduler.run_pending("slow") == 1.0 and scheduler.get_stats()["other"]["runs"] == 1
+    scheduler.unregister("other")
+    
+    # 任务异常被记录，仍按周期继续调度
+    scheduler.register("broken", broken, 1)
+    scheduler.run_pending()
+    stats = scheduler.get_stats()["broken"]
+    assert stats["runs"] == 1 and stats["errors"] == 1 and stats["last_error"] == "读取失败"
+    for name in ("fast", "slow", "broken"):
+        scheduler.unregister(name)
+    assert scheduler.run_pending() is None
+
+def test_scheduler_workers_do_not_block_each_other():
+    """慢速分组的任务阻塞时，高频采样分组照常按周期运行"""
+    import threading
+    from core.scheduler import CollectionScheduler
+    
+    release = threading.Event()
+    ticks = threading.Semaphore(0)
+    scheduler = CollectionScheduler()
+    scheduler.register("cpu", ticks.release, 0.01, worker="sampling")
+    scheduler.register("processes", release.wait, 0.01, worker="slow")
+    scheduler.start()
+    try:
+        for _ in range(5):
+            assert ticks.acquire(timeout=5)
+        assert scheduler.get_stats()["processes"]["runs"] == 0
+    finally:
+        release.set()
+        scheduler.stop()
+    assert not scheduler.is_running() and scheduler.get_stats()["processes"]["runs"] >= 1
+
+def test_alert_engine_duration_and_hysteresis():
+    """告警超过阈值持续duration后触发，回落到 threshold - hysteresis 以下才恢复"""
+    from datetime import datetime
+    from types import SimpleNamespace
+    from core.alerts import AlertEngine
+    from core.history import RingHistory
+    
+    cpu = SimpleNamespace(history=RingHistory(("cpu_usage_percent",), 100))
+    engine = AlertEngine({"alerts": {"cpu_usage_threshold": 90, "duration": 10, "hysteresis": 5}}, {"cpu": cpu})
+    start = 1_700_000_000 * 10 ** 9
+    
+    def feed(*samples):
+        for seconds, value in samples:
+            cpu.history.append({"cpu_usage_percent": value}, start + seconds * 10 ** 9, seconds * 10 ** 9)
+        return engine.evaluate()
+    
+    def state():
+        return engine._states[("cpu_usage", None)]["state"]
+    
+    # 超过阈值后短暂回落，pending被取消，持续时间从下一次超过阈值重新计算
+    assert feed((0, 95), (5, 80), (6, 95), (15, 96)) == []
+    assert state() == "pending"
+    assert [alert["state"] for alert in engine.get_alerts(include_pending=True)] == ["pending"]
+    alerts = feed((16, 97))
+    assert len(alerts) == 1 and alerts[0]["type"] == "cpu_usage" and alerts[0]["value"] == 97.0
+    assert alerts[0]["since"] == datetime.fromtimestamp((start + 6 * 10 ** 9) / 1e9).isoformat()
+    
+    # 回落到阈值以下但未低于 90 - 5 时保持触发
+    assert len(feed((17, 87))) == 1 and state() == "firing"
+    assert feed((18, 85)) == [] and state() == "ok"
+    # 已处理的样本不会重复计算
+    assert engine.evaluate() == [] and state() == "ok"
+    
+    # 按实例判断的指标：读取发布的数据，消失的实例清除状态
+    def disk(percent, seconds):
+        data = {"disk": {"basic_info": {"disks": [{"mountpoint": "/", "percent": percent}]}}}
+        return engine.evaluate(data, SimpleNamespace(timestamp=start / 1e9 + seconds, monotonic_ns=seconds * 10 ** 9))
+    
+    assert disk(95, 100) == []
+    alerts = disk(95, 110)
+    assert [(alert["type"], alert["instance"]) for alert in alerts] == [("disk_usage", "/")]
+    assert engine.evaluate({"disk": {"basic_info": {"disks": []}}}) == []
+    assert ("disk_usage", "/") not in engine._states
+
+def test_publish_reuses_job_samples():
+    """发布读取调度任务的采样结果，不重新计算速率或重复写入历史"""
+    from core.collector import SharedCollector
+    from core.scheduler import SAMPLING_JOBS
+    
+    shared = SharedCollector({})
+    # 只保留采样任务和发布任务，避免测试中扫描文件系统
+    for name in list(shared.scheduler.get_stats()):
+        if name not in SAMPLING_JOBS and name != "publish":
+            shared.scheduler.unregister(name)
+    shared.scheduler.run_pending()
+    lengths = {name: len(shared.monitors[name].history) for name in ("cpu", "memory", "disk", "network")}
+    cpu_info = shared.monitors["cpu"].cache.get("cpu_info", lambda: None, 60)
+    network_io = shared.monitors["network"].cache.get("io", lambda: None, 60)
+    
+    data = shared.publish()
+    assert data["cpu"]["basic_info"] is cpu_info
+    assert data["network"]["speed"] is network_io
+    assert {name: len(shared.monitors[name].history) for name in lengths} == lengths
+    
+    # 调度器未运行、缓存过期时发布自行采样一次
+    shared.monitors["cpu"].cache.clear()
+    data = shared.publish()
+    assert data["cpu"]["basic_info"] is not cpu_info
+    
+    # max_age=0 不复用已发布数据和各模块缓存，基于新快照重新采样
+    snapshot = shared.snapshots.latest
+    assert shared.get_system_data(60) is data
+    fresh = shared.get_system_data(0)
+    assert fresh is not data and shared.snapshots.latest is not snapshot
+    assert fresh["network"]["speed"] is not network_io
+    assert fresh["network"]["speed"] is shared.monitors["network"].cache.get("io", lambda: None, 60)
+    
+    # 较慢的明细在采集锁外读取，不阻塞高频采样任务
+    held = []
+    shared.monitors["cgroups"].get_detailed_info = lambda snapshot=None: held.append(shared._collect_lock.locked())
+    shared.publish()
+    assert held == [False]
+
+def _fake_block_devices(root):
+    """伪造 /sys/class/block：sda整盘、sda1分区、loop0虚拟设备"""
+    block = root / "class" / "block"
+    (block / "sda").mkdir(parents=True)
+    (block / "sda1").mkdir()
+    (block / "sda1" / "partition").write_text("1\n")
+    (root / "devices" / "virtual" / "block" / "loop0").mkdir(parents=True)
+    (block / "loop0").symlink_to(root / "devices" / "virtual" / "block" / "loop0")
+    return str(root)
+
+def _disk_snapshot(diskstats, seconds):
+    """构造只包含磁盘计数器的快照"""
+    from core.proc_snapshot import ProcSnapshot
+    return ProcSnapshot(seconds, int(seconds * 1e9), (), [], {}, {}, diskstats, {}, (), {})
+
+def _disk_stat(reads, read_time=0):
+    from core.proc_snapshot import DiskStat
+    return DiskStat(reads, 0, reads * 4096, read_time, 0, 0, 0, 0, 0, read_time, read_time)
+
+def test_disk_latency_filters_keep_counters(tmp_path):
+    """不同过滤条件交替调用时，被过滤的设备仍保留计数器基线"""
+    from core.disk_latency import DiskLatencyCollector
+    
+    latency = DiskLatencyCollector(_fake_block_devices(tmp_path))
+    first = _disk_snapshot({"sda": _disk_stat(100), "sda1": _disk_stat(100)}, 1)
+    assert set(latency.collect(first, include_partitions=True)) == {"sda", "sda1"}
+    # 默认不含分区的调用不应清理sda1的计数器
+    assert set(latency.collect(first)) == {"sda"}
+    
+    second = _disk_snapshot({"sda": _disk_stat(300, 400), "sda1": _disk_stat(200, 100)}, 2)
+    assert latency.collect(second)["sda"]["r_s"] == 200.0
+    devices = latency.collect(second, include_partitions=True)
+    assert devices["sda1"]["r_s"] == 100.0 and devices["sda1"]["r_await"] == 1.0
+    
+    # 从快照中消失的设备才被清理
+    latency.collect(_disk_snapshot({"sda": _disk_stat(300, 400)}, 3), include_partitions=True)
+    assert latency.collect(_disk_snapshot({"sda": _disk_stat(300), "sda1": _disk_stat(500)}, 4),
+                           include_partitions=True)["sda1"]["r_s"] == 0.0
+
+def test_counter_delta_wraparound():
+    """计数器增量处理32/64位回绕和重置"""
+    from core.rate import counter_delta
+    
+    assert counter_delta(100, 250) == 150
+    assert counter_delta(2 ** 32 - 10, 5) == 15
+    assert counter_delta(2 ** 64 - 10, 5) == 15
+    # 远离回绕边界的下降视为计数器重置，从0开始计
+    assert counter_delta(2 ** 31, 7) == 7
+    assert counter_delta(2 ** 40, 7) == 7
+
+def test_disk_io_totals_physical_only(tmp_path):
+    """磁盘IO总量只累加物理整盘，不重复统计分区和虚拟设备"""
+    from core.disk_latency import DiskLatencyCollector
+    from core.disk_monitor import DiskMonitor
+    
+    monitor = DiskMonitor()
+    monitor.latency = DiskLatencyCollector(_fake_block_devices(tmp_path))
+    devices = ("sda", "sda1", "loop0")
+    monitor.get_disk_io(_disk_snapshot({name: _disk_stat(0) for name in devices}, 1))
+    io = monitor.get_disk_io(_disk_snapshot({name: _disk_stat(100) for name in devices}, 3))
+    assert io["read_count_per_sec"] == 50.0
+    assert io["read_bytes_per_sec"] == 50.0 * 4096
+    assert io["per_disk"]["sda1"]["is_partition"] and io["per_disk"]["loop0"]["type"] == "virtual"
+    assert io["per_disk"]["loop0"]["read_count_per_sec"] == 50.0
+
+def test_file_scanner_bounded_and_incremental(tmp_path):
+    """全局只保留top_k个大文件，目录mtime未变时复用索引（含重新加载的索引）"""
+    from core.file_scanner import LargeFileScanner
+    
+    root = tmp_path / "data"
+    for directory, sizes in (("a", (100, 500)), ("b", (300, 50)), ("b/c", (400, 200))):
+        (root / directory).mkdir(parents=True)
+        for size in sizes:
+            (root / directory / f"f{size}").write_bytes(b"x" * size)
+    
+    def scanner():
+        return LargeFileScanner(str(tmp_path / "index"), top_k=3, min_size=100, workers=2)
+    
+    def sizes(result):
+        return [item["size_bytes"] for item in result["files"]]
+    
+    first = scanner().scan(str(root), limit=10)
+    assert first["complete"] and first["directories"] == 4 and first["reused_directories"] == 0
+    assert sizes(first) == [500, 400, 300]
+    assert first["files"][0]["path"] == str(root / "a" / "f500")
+    
+    # 新实例从磁盘加载索引，未变化的目录全部复用，大文件从全局列表取回
+    second_scanner = scanner()
+    second = second_scanner.scan(str(root), limit=10)
+    assert second["reused_directories"] == 4 and sizes(second) == [500, 400, 300]
+    
+    # 只有新增文件的目录被重新扫描
+    changed = root / "b" / "c"
+    mtime_ns = changed.stat().st_mtime_ns
+    (changed / "f600").write_bytes(b"x" * 600)
+    # 避免文件系统时间戳粒度过粗导致目录mtime看起来没变
+    os.utime(changed, ns=(mtime_ns + 10 ** 9, mtime_ns + 10 ** 9))
+    third = second_scanner.scan(str(root), limit=2)
+    assert third["reused_directories"] == 3 and sizes(third) == [600, 500]
+    records = second_scanner.get_directories(str(root))
+    assert records[str(root / "b")][1] == ["c"] and records[str(changed)][1] == []
+    # 目录自身加三个文件
+    assert records[str(changed)][3] == 4
+
+def test_disk_usage_tree_query_and_growth():
+    """占用树按子树合计排序查询，增长只报告真正增长的子目录"""
+    from core.disk_usage import DiskUsageTree
+    
+    def tree(sizes):
+        # sizes: {相对路径: 自身占用字节}，记录格式与文件扫描器一致
+        directories = {}
+        for relative, size in sizes.items():
+            path = os.path.join("/data", relative) if relative else "/data"
+            subdirs = [name for name in (child.rsplit("/", 1)[-1] for child in sizes
+                                         if child and os.path.dirname(child) == relative)]
+            directories[path] = (0, subdirs, size, 1)
+        return DiskUsageTree("/data", directories)
+    
+    old = tree({"": 10, "a": 100, "a/x": 1000, "b": 50})
+    assert len(old) == 4
+    usage = old.query(depth=1, limit=1)
+    assert usage["bytes"] == 1160 and usage["inodes"] == 4
+    assert [child["path"] for child in usage["children"]] == ["/data/a"]
+    assert old.query("/data/a", depth=1)["children"][0]["bytes"] == 1000
+    assert old.query("/data/missing") is None and old.query("/elsewhere") is None
+    
+    new = tree({"": 10, "a": 100, "a/x": 1600, "b": 60, "c": 30})
+    growth = {item["path"]: item for item in new.growth(old)}
+    # a和根目录的增长几乎都来自a/x，只报告a/x
+    assert list(growth) == ["/data/a/x", "/data/c", "/data/b"]
+    assert growth["/data/a/x"]["growth_bytes"] == 600 and not growth["/data/a/x"]["new"]
+    assert growth["/data/c"]["new"] and growth["/data/b"]["growth_bytes"] == 10
+    assert new.growth(None) == [] and new.growth(tree({"": 1}), limit=1)[0]["path"] == "/data/a/x"
+    # 超出时间预算的不完整扫描不能作为对比基线
+    partial = DiskUsageTree("/data", {"/data": (0, [], 10, 1)}, complete=False)
+    assert new.growth(partial) == []
+
+def test_disk_usage_baseline_and_full_rescan():
+    """只有完整的占用树作为增长基线，后台刷新定期完整重扫"""
+    from core.disk_monitor import DiskMonitor
+    
+    full = {"/data": (0, ["a"], 10, 1), "/data/a": (0, [], 100, 1)}
+    scans = []
+    
+    class FakeScanner:
+        def __init__(self):
+            self.results = []
+        
+        def scan(self, root, limit=10, time_budget=None, full=False):
+            scans.append(full)
+            self.directories, complete = self.results.pop(0)
+            return {"complete": complete}
+        
+        def get_directories(self, root):
+            return self.directories
+    
+    monitor = DiskMonitor()
+    monitor.file_scanner = FakeScanner()
+    # 按需查询的首次扫描超出时间预算，只扫到根目录；后台扫描完成后目录都未变化
+    monitor.file_scanner.results = [({"/data": (0, ["a"], 10, 1)}, False), (full, True), (full, True)]
+    monitor.refresh_disk_usage("/data", time_budget=2)
+    monitor.refresh_disk_usage("/data")
+    tree, previous = monitor.usage_trees["/data"]
+    assert tree.complete and previous is None and tree.growth(previous) == []
+    monitor.refresh_disk_usage("/data")
+    tree, previous = monitor.usage_trees["/data"]
+    assert previous.complete and tree.growth(previous) == []
+    assert scans == [False, False, False]
+    
+    # 超过完整重扫间隔后，调度器触发的后台刷新完整重扫（发现原地增长的文件）
+    monitor.usage_full_rescan_interval = 0
+    monitor.file_scanner.results = [({**full, "/data/a": (0, [], 600, 1)}, True)]
+    monitor.refresh_usage_trees()
+    monitor._usage_refresh_thread.join()
+    assert scans[-1] is True
+    tree, previous = monitor.usage_trees["/data"]
+    assert [item["path"] for item in tree.growth(previous)] == ["/data/a"]
+
+def test_cpu_usage_sampler(clock):
+    """CPU使用率按两次计数器增量计算，min_interval内沿用上次结果"""
+    from core.cpu_monitor import CPUUsageSampler
+    
+    def times(user, idle, iowait=0):
+        return (user, 0, 0, idle, iowait, 0, 0, 0)
+    
+    sampler = CPUUsageSampler(min_interval=0.5, clock=clock)
+    # 首次采样按开机以来的平均值
+    assert sampler.update(times(100, 300), [times(50, 150), times(50, 150)]) == (25.0, [25.0, 25.0])
+    
+    # 经过1秒：core0满载，core1空闲（iowait也视为空闲）
+    clock.advance(1)
+    total, per_core = sampler.update(times(200, 350, 50), [times(150, 150), times(50, 200, 50)])
+    assert total == 50.0 and per_core == [100.0, 0.0]
+    
+    # 距上次更新不足min_interval，沿用上次结果且不推进基线
+    clock.advance(0.1)
+    assert sampler.update(times(300, 350, 50), [times(200, 150), times(100, 200, 50)]) == (50.0, [100.0, 0.0])
+    
+    # 计数器没有前进时沿用上次结果
+    clock.advance(1)
+    assert sampler.update(times(200, 350, 50), [times(150, 150), times(50, 200, 50)]) == (50.0, [100.0, 0.0])
+    
+    # 某个核心计数器没有前进时沿用该核心上次的使用率
+    clock.advance(1)
+    total, per_core = sampler.update(times(250, 400, 50), [times(150, 150), times(100, 250, 50)])
+    assert total == 50.0 and per_core == [100.0, 50.0]
+    
+    # CPU上下线导致核心数变化时，每核重新以开机以来的平均值为基线
+    clock.advance(1)
+    total, per_core = sampler.update(times(300, 450, 50), [times(100, 300), times(100, 100), times(100, 100)])
+    assert total == 50.0 and per_core == [25.0, 50.0, 50.0]
+
 def main():
     """主测试函数"""
     print("=== 系统监控工具测试 ===")
@@ -125,6 +1095,7 @@ def main():
     test_imports()
     test_monitors()
     test_helpers()
+    # 其余使用伪造目录树的测试依赖pytest fixture，请使用 python -m pytest 运行
     
     print("\n=== 测试完成 ===")
     print("如果所有测试都通过，说明系统监控工具可以正常运行")
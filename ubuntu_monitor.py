@@ -8,7 +8,6 @@ Ubuntu系统监控工具
 
 import argparse
 import time
-import threading
 import json
 import os
 import sys
@@ -16,11 +15,7 @@ from datetime import datetime
 import subprocess
 
 # 导入监控模块
-from core.cpu_monitor import CPUMonitor
-from core.memory_monitor import MemoryMonitor
-from core.gpu_monitor import GPUMonitor
-from core.disk_monitor import DiskMonitor
-from core.network_monitor import NetworkMonitor
+from core.collector import get_shared_collector
 from utils.helpers import load_config, save_data, get_system_info
 from utils.logger import logger
 
@@ -28,15 +23,12 @@ class UbuntuSystemMonitor:
     def __init__(self, config_file="ubuntu_monitor_config.json"):
         """初始化Ubuntu系统监控器"""
         self.config = self.load_ubuntu_config(config_file)
-        self.monitors = {
-            'cpu': CPUMonitor(),
-            'memory': MemoryMonitor(),
-            'gpu': GPUMonitor(),
-            'disk': DiskMonitor(),
-            'network': NetworkMonitor()
-        }
+        # 进程内共享的采集器，CLI、Web、API都从它读取已发布的数据
+        self.shared = get_shared_collector(self.config)
+        self.collector = self.shared.snapshots
+        self.monitors = self.shared.monitors
+        self.os_info = get_system_info()
         self.running = False
-        self.monitoring_thread = None
         self.hardware_info = self.get_hardware_info()
         
         # 初始化硬件特定监控
@@ -144,93 +136,45 @@ class UbuntuSystemMonitor:
         if interval is None:
             interval = self.config.get('monitoring', {}).get('interval', 2)
         
+        # 各指标族按各自周期采集，汇总、告警和保存按interval执行
         self.running = True
-        self.monitoring_thread = threading.Thread(target=self._monitoring_loop, args=(interval,))
-        self.monitoring_thread.daemon = True
-        self.monitoring_thread.start()
+        self.shared.scheduler.register('report', self._report, interval)
+        self.shared.start()
         logger.info(f"Ubuntu系统监控已启动，监控间隔: {interval}秒")
     
     def stop_monitoring(self):
         """停止监控"""
         self.running = False
-        if self.monitoring_thread:
-            self.monitoring_thread.join()
+        self.shared.scheduler.unregister('report')
+        self.shared.stop()
         logger.info("Ubuntu系统监控已停止")
     
-    def _monitoring_loop(self, interval):
-        """监控循环"""
-        while self.running:
-            try:
-                # 收集所有监控数据
-                system_data = self.get_system_data()
-                
-                # 检查硬件特定告警
-                self.check_hardware_specific_alerts()
-                
-                # 保存数据
-                self.save_monitoring_data(system_data)
-                
-                time.sleep(interval)
-                
-            except Exception as e:
-                logger.error(f"监控循环出错: {e}")
-                time.sleep(interval)
+    def _report(self):
+        """汇总数据并保存"""
+        system_data = self.get_system_data()
+        self.save_monitoring_data(system_data)
     
-    def get_system_data(self):
-        """获取系统数据"""
+    def get_system_data(self, max_age=None):
+        """获取系统数据（读取共享采集器发布的最新数据，max_age秒内不重新采样）"""
+        published = self.shared.get_system_data(max_age)
         data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": published["timestamp"],
             "system_info": {
                 "name": "Ubuntu系统监控",
                 "hardware": self.hardware_info,
-                "os_info": get_system_info()
-            },
-            "cpu": self.monitors['cpu'].get_detailed_info(),
-            "memory": self.monitors['memory'].get_detailed_info(),
-            "gpu": self.monitors['gpu'].get_detailed_info(),
-            "disk": self.monitors['disk'].get_detailed_info(),
-            "network": self.monitors['network'].get_detailed_info()
+                "os_info": self.os_info
+            }
         }
+        data.update((name, published[name]) for name in ('cpu', 'memory', 'gpu', 'disk', 'network'))
         return data
     
+    def get_current_status(self, max_age=None):
+        """获取当前状态"""
+        return self.get_system_data(max_age)
+    
     def check_hardware_specific_alerts(self):
-        """检查硬件特定告警"""
-        alerts = self.config.get('alerts', {})
-        
-        # CPU特定告警
-        cpu_data = self.monitors['cpu'].get_detailed_info()
-        if cpu_data:
-            # CPU温度告警 (i5-14600KF TDP 125W)
-            if cpu_data.get('temperature', 0) > alerts.get('cpu_temp_threshold', 85):
-                logger.warning(f"CPU温度过高: {cpu_data.get('temperature')}°C")
-            
-            # CPU使用率告警
-            if cpu_data.get('usage_percent', 0) > alerts.get('cpu_usage_threshold', 85):
-                logger.warning(f"CPU使用率过高: {cpu_data.get('usage_percent')}%")
-        
-        # GPU特定告警
-        gpu_data = self.monitors['gpu'].get_detailed_info()
-        if gpu_data:
-            # GPU温度告警 (RX 9070 XT)
-            if gpu_data.get('temperature', 0) > alerts.get('gpu_temp_threshold', 85):
-                logger.warning(f"GPU温度过高: {gpu_data.get('temperature')}°C")
-            
-            # GPU内存使用率告警
-            if gpu_data.get('memory_usage_percent', 0) > alerts.get('gpu_memory_threshold', 90):
-                logger.warning(f"GPU内存使用率过高: {gpu_data.get('memory_usage_percent')}%")
-        
-        # 内存告警
-        memory_data = self.monitors['memory'].get_detailed_info()
-        if memory_data:
-            if memory_data.get('usage_percent', 0) > alerts.get('memory_usage_threshold', 80):
-                logger.warning(f"内存使用率过高: {memory_data.get('usage_percent')}%")
-        
-        # 磁盘告警
-        disk_data = self.monitors['disk'].get_detailed_info()
-        if disk_data:
-            for disk in disk_data.get('disks', []):
-                if disk.get('usage_percent', 0) > alerts.get('disk_usage_threshold', 85):
-                    logger.warning(f"磁盘使用率过高: {disk.get('mountpoint')} - {disk.get('usage_percent')}%")
+        """获取当前硬件告警（阈值来自配置 alerts 部分，由告警引擎持续评估）"""
+        return self.shared.alerts.get_alerts()
     
     def save_monitoring_data(self, data):
         """保存监控数据"""
@@ -277,6 +221,7 @@ class UbuntuSystemMonitor:
         print(f"GPU: {self.hardware_info['gpu']['model']}")
         print(f"存储: {self.hardware_info['storage']['ssd']} + {self.hardware_info['storage']['hdd']}")
         print("=" * 50)
+        self.shared.start()
         
         try:
             while True:
@@ -346,6 +291,7 @@ class UbuntuSystemMonitor:
         """运行API模式"""
         from api.secure_routes import create_secure_api_app
         app = create_secure_api_app(self)
+        self.shared.start()
         
         host = self.config.get('web', {}).get('host', '0.0.0.0')
         port = self.config.get('web', {}).get('port', 5000)
@@ -0,0 +1,30 @@
+import threading
+import time
+
+class TTLCache:
+    """按key缓存计算结果，超过有效期才重新计算"""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, ttl):
+        """返回不超过ttl秒的缓存值，否则调用loader()刷新"""
+        entry = self._values.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= ttl:
+            return entry[1]
+        return self.put(key, loader())
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = (time.monotonic(), value)
+        return value
+
+    def age(self, key):
+        """缓存值距今的秒数，不存在时返回None"""
+        entry = self._values.get(key)
+        return time.monotonic() - entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
@@ -0,0 +1,79 @@
+import os
+import threading
+
+class CachedFile:
+    """保持打开状态的/proc、/sys文件，每次通过pread从头重新读取"""
+
+    def __init__(self, path, bufsize=4096):
+        self.path = path
+        self.bufsize = bufsize
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        return self._fd
+
+    def read(self):
+        """读取文件全部内容（bytes），缓冲区不足时自动扩容"""
+        with self._lock:
+            for _ in range(2):
+                try:
+                    fd = self._open()
+                    while True:
+                        data = os.pread(fd, self.bufsize, 0)
+                        if len(data) < self.bufsize:
+                            return data
+                        # 一次读满说明缓冲区偏小，扩容后整体重读以保证内容一致
+                        self.bufsize *= 2
+                except OSError:
+                    # 设备被移除或句柄失效时重新打开一次
+                    self._close()
+            raise OSError(f"无法读取 {self.path}")
+
+    def read_int(self):
+        """读取单个整数值（sysfs常见格式）"""
+        return int(self.read())
+
+    def _close(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def __del__(self):
+        self._close()
+
+def parse_key_value(data, scale=1):
+    """解析 "Key: value [kB]" 或 "key value" 格式的内容为字典"""
+    result = {}
+    for line in data.split(b'\n'):
+        fields = line.split()
+        if len(fields) < 2:
+            continue
+        key = fields[0].rstrip(b':').decode()
+        try:
+            value = int(fields[1])
+        except ValueError:
+            continue
+        if len(fields) > 2 and fields[2] == b'kB':
+            value *= scale
+        result[key] = value
+    return result
+
+def parse_cpu_list(text):
+    """解析 "0-5,8,10-11" 格式的CPU列表（sysfs cpulist），返回编号列表"""
+    cpus = []
+    for part in (text or "").strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return cpus
@@ -2,9 +2,7 @@ from flask import Flask, render_template, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import json
-import threading
-import time
-from web.ubuntu_blueprint import ubuntu_monitor_bp, register_socketio_events, monitors, check_alerts, config
+from web.ubuntu_blueprint import ubuntu_monitor_bp, register_socketio_events
 
 def create_app(monitor):
     app = Flask(__name__)
@@ -16,28 +14,14 @@ def create_app(monitor):
     # 注册 Ubuntu 监控的 SocketIO 事件
     register_socketio_events(socketio)
 
-    # 启动 Ubuntu 监控推送线程
-    def ubuntu_background_monitoring():
-        while True:
-            try:
-                data = {
-                    "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
-                    "cpu": monitors['cpu'].get_detailed_info(),
-                    "memory": monitors['memory'].get_detailed_info(),
-                    "gpu": monitors['gpu'].get_detailed_info(),
-                    "disk": monitors['disk'].get_detailed_info(),
-                    "network": monitors['network'].get_detailed_info(),
-                    "alerts": check_alerts()
-                }
-                socketio.emit('ubuntu_system_update', data, namespace='/ubuntu_monitor')
-                time.sleep(config.get('monitoring', {}).get('interval', 2))
-            except Exception as e:
-                print(f"Ubuntu 监控推送出错: {e}")
-                time.sleep(2)
-    ubuntu_monitor_thread = threading.Thread(target=ubuntu_background_monitoring)
-    ubuntu_monitor_thread.daemon = True
-    ubuntu_monitor_thread.start()
-    
+    shared = monitor.shared
+    # Blueprint从这里读取共享采集器，导入时不创建
+    app.extensions['shared_collector'] = shared
+
+    def max_age():
+        """读取请求中的max_age参数（秒），0表示丢弃各模块缓存、强制重新采样"""
+        return request.args.get('max_age', type=float)
+
     @app.route('/')
     def index():
         """主页"""
@@ -47,7 +31,7 @@ def create_app(monitor):
     def get_status():
         """获取系统状态API"""
         try:
-            data = monitor.get_current_status()
+            data = monitor.get_current_status(max_age())
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -56,7 +40,7 @@ def create_app(monitor):
     def get_cpu():
         """获取CPU信息"""
         try:
-            data = monitor.monitors['cpu'].get_detailed_info()
+            data = shared.get_section('cpu', max_age())
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -65,7 +49,7 @@ def create_app(monitor):
     def get_memory():
         """获取内存信息"""
         try:
-            data = monitor.monitors['memory'].get_detailed_info()
+            data = shared.get_section('memory', max_age())
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -74,7 +58,7 @@ def create_app(monitor):
     def get_gpu():
         """获取GPU信息"""
         try:
-            data = monitor.monitors['gpu'].get_detailed_info()
+            data = shared.get_section('gpu', max_age())
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -83,7 +67,7 @@ def create_app(monitor):
     def get_disk():
         """获取磁盘信息"""
         try:
-            data = monitor.monitors['disk'].get_detailed_info()
+            data = shared.get_section('disk', max_age())
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -92,7 +76,7 @@ def create_app(monitor):
     def get_network():
         """获取网络信息"""
         try:
-            data = monitor.monitors['network'].get_detailed_info()
+            data = shared.get_section('network', max_age())
             return jsonify(data)
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -135,20 +119,13 @@ def create_app(monitor):
         except Exception as e:
             emit('error', {'error': str(e)})
     
-    def background_monitoring():
-        """后台监控线程"""
-        while True:
-            try:
-                data = monitor.get_current_status()
-                socketio.emit('system_data', data)
-                time.sleep(2)  # 每2秒发送一次数据
-            except Exception as e:
-                print(f"后台监控出错: {e}")
-                time.sleep(2)
-    
-    # 启动后台监控线程
-    monitor_thread = threading.Thread(target=background_monitoring)
-    monitor_thread.daemon = True
-    monitor_thread.start()
+    def push_updates(data, snapshot):
+        """共享采集器每次发布后推送给主页面和Ubuntu监控页面"""
+        socketio.emit('system_data', monitor.get_current_status())
+        socketio.emit('ubuntu_system_update', data, namespace='/ubuntu_monitor')
+
+    # 订阅共享采集器的发布，不再各自起线程重复采样
+    shared.subscribe(push_updates)
+    shared.start()
     
     return app 
\ No newline at end of file
@@ -10,16 +10,10 @@ from flask import Flask, render_template, jsonify, request
 from flask_socketio import SocketIO, emit
 import json
 import os
-import time
 from datetime import datetime
-import threading
 
 # 导入监控模块
-from core.cpu_monitor import CPUMonitor
-from core.memory_monitor import MemoryMonitor
-from core.gpu_monitor import GPUMonitor
-from core.disk_monitor import DiskMonitor
-from core.network_monitor import NetworkMonitor
+from core.collector import get_shared_collector
 from utils.logger import logger
 
 class UbuntuWebApp:
@@ -32,14 +26,9 @@ class UbuntuWebApp:
         # 加载配置
         self.config = self.load_config(config_file)
         
-        # 初始化监控器
-        self.monitors = {
-            'cpu': CPUMonitor(),
-            'memory': MemoryMonitor(),
-            'gpu': GPUMonitor(),
-            'disk': DiskMonitor(),
-            'network': NetworkMonitor()
-        }
+        # 使用进程内共享的采集器和监控器
+        self.shared = get_shared_collector(self.config)
+        self.monitors = self.shared.monitors
         
         # 硬件信息
         self.hardware_info = {
@@ -111,7 +100,7 @@ class UbuntuWebApp:
         def get_cpu_info():
             """获取CPU信息"""
             try:
-                cpu_data = self.monitors['cpu'].get_detailed_info()
+                cpu_data = self.shared.get_section('cpu', self._max_age())
                 return jsonify(cpu_data)
             except Exception as e:
                 logger.error(f"获取CPU信息失败: {e}")
@@ -121,7 +110,7 @@ class UbuntuWebApp:
         def get_memory_info():
             """获取内存信息"""
             try:
-                memory_data = self.monitors['memory'].get_detailed_info()
+                memory_data = self.shared.get_section('memory', self._max_age())
                 return jsonify(memory_data)
             except Exception as e:
                 logger.error(f"获取内存信息失败: {e}")
@@ -131,7 +120,7 @@ class UbuntuWebApp:
         def get_gpu_info():
             """获取GPU信息"""
             try:
-                gpu_data = self.monitors['gpu'].get_detailed_info()
+                gpu_data = self.shared.get_section('gpu', self._max_age())
                 return jsonify(gpu_data)
             except Exception as e:
                 logger.error(f"获取GPU信息失败: {e}")
@@ -141,7 +130,7 @@ class UbuntuWebApp:
         def get_disk_info():
             """获取磁盘信息"""
             try:
-                disk_data = self.monitors['disk'].get_detailed_info()
+                disk_data = self.shared.get_section('disk', self._max_age())
                 return jsonify(disk_data)
             except Exception as e:
                 logger.error(f"获取磁盘信息失败: {e}")
@@ -151,7 +140,7 @@ class UbuntuWebApp:
         def get_network_info():
             """获取网络信息"""
             try:
-                network_data = self.monitors['network'].get_detailed_info()
+                network_data = self.shared.get_section('network', self._max_age())
                 return jsonify(network_data)
             except Exception as e:
                 logger.error(f"获取网络信息失败: {e}")
@@ -161,14 +150,7 @@ class UbuntuWebApp:
         def get_all_info():
             """获取所有监控信息"""
             try:
-                data = {
-                    "timestamp": datetime.now().isoformat(),
-                    "cpu": self.monitors['cpu'].get_detailed_info(),
-                    "memory": self.monitors['memory'].get_detailed_info(),
-                    "gpu": self.monitors['gpu'].get_detailed_info(),
-                    "disk": self.monitors['disk'].get_detailed_info(),
-                    "network": self.monitors['network'].get_detailed_info()
-                }
+                data = self.shared.get_system_data(self._max_age())
                 return jsonify(data)
             except Exception as e:
                 logger.error(f"获取所有信息失败: {e}")
@@ -211,107 +193,25 @@ class UbuntuWebApp:
             }
             return jsonify(tips)
     
+    def _max_age(self):
+        """读取请求中的max_age参数（秒），0表示丢弃各模块缓存、强制重新采样"""
+        return request.args.get('max_age', type=float)
+    
     def check_alerts(self):
-        """检查告警"""
-        alerts = []
-        alerts_config = self.config.get('alerts', {})
-        
-        try:
-            # CPU告警
-            cpu_data = self.monitors['cpu'].get_detailed_info()
-            if cpu_data:
-                if cpu_data.get('temperature', 0) > alerts_config.get('cpu_temp_threshold', 85):
-                    alerts.append({
-                        "type": "cpu_temperature",
-                        "level": "warning",
-                        "message": f"CPU温度过高: {cpu_data.get('temperature', 0):.1f}°C",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                
-                if cpu_data.get('usage_percent', 0) > alerts_config.get('cpu_usage_threshold', 85):
-                    alerts.append({
-                        "type": "cpu_usage",
-                        "level": "warning",
-                        "message": f"CPU使用率过高: {cpu_data.get('usage_percent', 0):.1f}%",
-                        "timestamp": datetime.now().isoformat()
-                    })
-            
-            # GPU告警
-            gpu_data = self.monitors['gpu'].get_detailed_info()
-            if gpu_data:
-                if gpu_data.get('temperature', 0) > alerts_config.get('gpu_temp_threshold', 85):
-                    alerts.append({
-                        "type": "gpu_temperature",
-                        "level": "warning",
-                        "message": f"GPU温度过高: {gpu_data.get('temperature', 0):.1f}°C",
-                        "timestamp": datetime.now().isoformat()
-                    })
-                
-                if gpu_data.get('memory_usage_percent', 0) > alerts_config.get('gpu_memory_threshold', 90):
-                    alerts.append({
-                        "type": "gpu_memory",
-                        "level": "warning",
-                        "message": f"GPU内存使用率过高: {gpu_data.get('memory_usage_percent', 0):.1f}%",
-                        "timestamp": datetime.now().isoformat()
-                    })
-            
-            # 内存告警
-            memory_data = self.monitors['memory'].get_detailed_info()
-            if memory_data:
-                if memory_data.get('usage_percent', 0) > alerts_config.get('memory_usage_threshold', 80):
-                    alerts.append({
-                        "type": "memory_usage",
-                        "level": "warning",
-                        "message": f"内存使用率过高: {memory_data.get('usage_percent', 0):.1f}%",
-                        "timestamp": datetime.now().isoformat()
-                    })
-            
-            # 磁盘告警
-            disk_data = self.monitors['disk'].get_detailed_info()
-            if disk_data:
-                for disk in disk_data.get('disks', []):
-                    if disk.get('usage_percent', 0) > alerts_config.get('disk_usage_threshold', 85):
-                        alerts.append({
-                            "type": "disk_usage",
-                            "level": "warning",
-                            "message": f"磁盘使用率过高: {disk.get('mountpoint')} - {disk.get('usage_percent', 0):.1f}%",
-                            "timestamp": datetime.now().isoformat()
-                        })
-        
-        except Exception as e:
-            logger.error(f"检查告警失败: {e}")
-        
-        return alerts
+        """检查告警（读取告警引擎状态，不重新采样）"""
+        return self.shared.alerts.get_alerts()
     
     def start_realtime_updates(self):
         """启动实时数据更新"""
-        def update_data():
-            while True:
-                try:
-                    data = {
-                        "timestamp": datetime.now().isoformat(),
-                        "cpu": self.monitors['cpu'].get_detailed_info(),
-                        "memory": self.monitors['memory'].get_detailed_info(),
-                        "gpu": self.monitors['gpu'].get_detailed_info(),
-                        "disk": self.monitors['disk'].get_detailed_info(),
-                        "network": self.monitors['network'].get_detailed_info(),
-                        "alerts": self.check_alerts()
-                    }
-                    
-                    self.socketio.emit('system_update', data)
-                    
-                    # 保存数据
-                    self.save_monitoring_data(data)
-                    
-                    time.sleep(self.config.get('monitoring', {}).get('interval', 2))
-                    
-                except Exception as e:
-                    logger.error(f"实时数据更新失败: {e}")
-                    time.sleep(5)
+        def push_update(data, snapshot):
+            self.socketio.emit('system_update', data)
+            
+            # 保存数据
+            self.save_monitoring_data(data)
         
-        # 启动后台线程
-        update_thread = threading.Thread(target=update_data, daemon=True)
-        update_thread.start()
+        # 订阅共享采集器的发布，由其后台调度按interval采样
+        self.shared.subscribe(push_update)
+        self.shared.start()
     
     def save_monitoring_data(self, data):
         """保存监控数据"""
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, jsonify, current_app, request
+from flask import Blueprint, render_template, jsonify, current_app, request, has_app_context
 from flask_socketio import emit
 import json
 import os
@@ -7,24 +7,12 @@ from datetime import datetime
 import threading
 
 # 导入监控模块
-from core.cpu_monitor import CPUMonitor
-from core.memory_monitor import MemoryMonitor
-from core.gpu_monitor import GPUMonitor
-from core.disk_monitor import DiskMonitor
-from core.network_monitor import NetworkMonitor
+from core.collector import get_shared_collector
 from utils.logger import logger
 
 ubuntu_monitor_bp = Blueprint('ubuntu_monitor', __name__, template_folder='templates')
 
-# 全局监控器和硬件信息
-monitors = {
-    'cpu': CPUMonitor(),
-    'memory': MemoryMonitor(),
-    'gpu': GPUMonitor(),
-    'disk': DiskMonitor(),
-    'network': NetworkMonitor()
-}
-
+# 硬件信息
 hardware_info = {
     "cpu": {
         "model": "Intel i5-14600KF",
@@ -66,6 +54,21 @@ def load_config(config_file="ubuntu_monitor_config.json"):
 
 config = load_config()
 
+def _shared():
+    """返回主应用在 create_app 中登记的共享采集器
+
+    导入本模块时不创建采集器；单独注册Blueprint时在首次请求时按配置创建。
+    """
+    if has_app_context():
+        shared = current_app.extensions.get('shared_collector')
+        if shared is not None:
+            return shared
+    return get_shared_collector(config)
+
+def _max_age():
+    """读取请求中的max_age参数（秒），0表示丢弃各模块缓存、强制重新采样"""
+    return request.args.get('max_age', type=float)
+
 @ubuntu_monitor_bp.route('/')
 def index():
     return render_template('ubuntu_index.html', hardware_info=hardware_info, config=config)
@@ -81,7 +84,7 @@ def get_system_info():
 @ubuntu_monitor_bp.route('/api/cpu')
 def get_cpu_info():
     try:
-        cpu_data = monitors['cpu'].get_detailed_info()
+        cpu_data = _shared().get_section('cpu', _max_age())
         return jsonify(cpu_data)
     except Exception as e:
         logger.error(f"获取CPU信息失败: {e}")
@@ -90,7 +93,7 @@ def get_cpu_info():
 @ubuntu_monitor_bp.route('/api/memory')
 def get_memory_info():
     try:
-        memory_data = monitors['memory'].get_detailed_info()
+        memory_data = _shared().get_section('memory', _max_age())
         return jsonify(memory_data)
     except Exception as e:
         logger.error(f"获取内存信息失败: {e}")
@@ -99,7 +102,7 @@ def get_memory_info():
 @ubuntu_monitor_bp.route('/api/gpu')
 def get_gpu_info():
     try:
-        gpu_data = monitors['gpu'].get_detailed_info()
+        gpu_data = _shared().get_section('gpu', _max_age())
         return jsonify(gpu_data)
     except Exception as e:
         logger.error(f"获取GPU信息失败: {e}")
@@ -108,7 +111,7 @@ def get_gpu_info():
 @ubuntu_monitor_bp.route('/api/disk')
 def get_disk_info():
     try:
-        disk_data = monitors['disk'].get_detailed_info()
+        disk_data = _shared().get_section('disk', _max_age())
         return jsonify(disk_data)
     except Exception as e:
         logger.error(f"获取磁盘信息失败: {e}")
@@ -117,7 +120,7 @@ def get_disk_info():
 @ubuntu_monitor_bp.route('/api/network')
 def get_network_info():
     try:
-        network_data = monitors['network'].get_detailed_info()
+        network_data = _shared().get_section('network', _max_age())
         return jsonify(network_data)
     except Exception as e:
         logger.error(f"获取网络信息失败: {e}")
@@ -126,14 +129,7 @@ def get_network_info():
 @ubuntu_monitor_bp.route('/api/all')
 def get_all_info():
     try:
-        data = {
-            "timestamp": datetime.now().isoformat(),
-            "cpu": monitors['cpu'].get_detailed_info(),
-            "memory": monitors['memory'].get_detailed_info(),
-            "gpu": monitors['gpu'].get_detailed_info(),
-            "disk": monitors['disk'].get_detailed_info(),
-            "network": monitors['network'].get_detailed_info()
-        }
+        data = _shared().get_system_data(_max_age())
         return jsonify(data)
     except Exception as e:
         logger.error(f"获取所有信息失败: {e}")
@@ -175,63 +171,8 @@ def get_optimization_tips():
     return jsonify(tips)
 
 def check_alerts():
-    alerts = []
-    alerts_config = config.get('alerts', {})
-    try:
-        cpu_data = monitors['cpu'].get_detailed_info()
-        if cpu_data:
-            if cpu_data.get('temperature', 0) > alerts_config.get('cpu_temp_threshold', 85):
-                alerts.append({
-                    "type": "cpu_temperature",
-                    "level": "warning",
-                    "message": f"CPU温度过高: {cpu_data.get('temperature', 0):.1f}°C",
-                    "timestamp": datetime.now().isoformat()
-                })
-            if cpu_data.get('usage_percent', 0) > alerts_config.get('cpu_usage_threshold', 85):
-                alerts.append({
-                    "type": "cpu_usage",
-                    "level": "warning",
-                    "message": f"CPU使用率过高: {cpu_data.get('usage_percent', 0):.1f}%",
-                    "timestamp": datetime.now().isoformat()
-                })
-        gpu_data = monitors['gpu'].get_detailed_info()
-        if gpu_data:
-            if gpu_data.get('temperature', 0) > alerts_config.get('gpu_temp_threshold', 85):
-                alerts.append({
-                    "type": "gpu_temperature",
-                    "level": "warning",
-                    "message": f"GPU温度过高: {gpu_data.get('temperature', 0):.1f}°C",
-                    "timestamp": datetime.now().isoformat()
-                })
-            if gpu_data.get('memory_usage_percent', 0) > alerts_config.get('gpu_memory_threshold', 90):
-                alerts.append({
-                    "type": "gpu_memory",
-                    "level": "warning",
-                    "message": f"GPU内存使用率过高: {gpu_data.get('memory_usage_percent', 0):.1f}%",
-                    "timestamp": datetime.now().isoformat()
-                })
-        memory_data = monitors['memory'].get_detailed_info()
-        if memory_data:
-            if memory_data.get('usage_percent', 0) > alerts_config.get('memory_usage_threshold', 80):
-                alerts.append({
-                    "type": "memory_usage",
-                    "level": "warning",
-                    "message": f"内存使用率过高: {memory_data.get('usage_percent', 0):.1f}%",
-                    "timestamp": datetime.now().isoformat()
-                })
-        disk_data = monitors['disk'].get_detailed_info()
-        if disk_data:
-            for disk in disk_data.get('disks', []):
-                if disk.get('usage_percent', 0) > alerts_config.get('disk_usage_threshold', 85):
-                    alerts.append({
-                        "type": "disk_usage",
-                        "level": "warning",
-                        "message": f"磁盘使用率过高: {disk.get('mountpoint')} - {disk.get('usage_percent', 0):.1f}%",
-                        "timestamp": datetime.now().isoformat()
-                    })
-    except Exception as e:
-        logger.error(f"检查告警失败: {e}")
-    return alerts
+    """返回告警引擎的当前告警，不重新采样"""
+    return _shared().alerts.get_alerts()
 
 def register_socketio_events(socketio):
     @socketio.on('connect', namespace='/ubuntu_monitor')
@@ -241,18 +182,9 @@ def register_socketio_events(socketio):
     @socketio.on('request_ubuntu_data', namespace='/ubuntu_monitor')
     def handle_request_ubuntu_data():
         try:
-            data = {
-                "timestamp": datetime.now().isoformat(),
-                "cpu": monitors['cpu'].get_detailed_info(),
-                "memory": monitors['memory'].get_detailed_info(),
-                "gpu": monitors['gpu'].get_detailed_info(),
-                "disk": monitors['disk'].get_detailed_info(),
-                "network": monitors['network'].get_detailed_info(),
-                "alerts": check_alerts()
-            }
-            emit('ubuntu_system_update', data, namespace='/ubuntu_monitor')
+            emit('ubuntu_system_update', _shared().get_system_data(), namespace='/ubuntu_monitor')
         except Exception as e:
             emit('error', {'error': str(e)}, namespace='/ubuntu_monitor')
 
-# 导出 monitors、check_alerts、config 供主应用调用
-__all__ = ['ubuntu_monitor_bp', 'register_socketio_events', 'monitors', 'check_alerts', 'config'] 
\ No newline at end of file
+# 导出 check_alerts、config 供主应用调用
+__all__ = ['ubuntu_monitor_bp', 'register_socketio_events', 'check_alerts', 'config'] 
\ No newline at end of file